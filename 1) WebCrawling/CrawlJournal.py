@@ -0,0 +1,127 @@
+"""
+__Brief Summary__:
+A persistent progress journal of a crawl.
+It remembers which (city index, neighborhood index) pairs, and which whole cities,
+were already scraped, so a crawl that crashed can be restarted and skip straight
+to the first unfinished neighborhood.
+
+The journal is committed together with the output sinks: a neighborhood is marked
+as finished only once the sinks have actually written its rows to the output files,
+and the journal also saves the sinks' positions at that moment.
+When a crawl is resumed, the outputs are truncated back to these positions, so rows
+that were written after the last commit (and will be scraped again) are not duplicated.
+A journal may be attached to several sinks (for example, the housing units sink and
+the environment sink of a combined crawl): the first one drives the commits, and
+the others are flushed right before every commit.
+A neighborhood's rows are handed over to the sinks through 'store_neighborhood', which marks
+the neighborhood as pending first, and holds back any commit until all the sinks got its rows
+(so a commit never saves only some of a neighborhood's rows).
+"""
+
+import os
+import json
+from typing import Callable
+from NadlanSink import NadlanSink
+
+
+class CrawlJournal(object):
+    def __init__(self, journal_file_name: str) -> None:
+        self.journal_file_name = journal_file_name
+
+        # What was already written to the output file (and committed)
+        self.finished_neighborhoods: set[tuple[int, int]] = set()
+        self.finished_cities: set[int] = set()
+        self.sink_positions: list[int] = []
+
+        # The sinks this journal is committed together with
+        self.sinks: list[NadlanSink] = []
+
+        # What was scraped, but is still waiting in the sink's buffer
+        self.pending_neighborhoods: set[tuple[int, int]] = set()
+        self.pending_cities: set[int] = set()
+
+        # Whether the commits are held back (while a neighborhood's rows are being written),
+        # and whether a flush asked for a commit in the meantime
+        self.is_holding_commits = False
+        self.is_commit_held = False
+
+        self.load()
+
+    # Load the journal of a previous run (if there is one)
+    def load(self) -> None:
+        if not os.path.exists(self.journal_file_name):
+            return
+        with open(self.journal_file_name, "r", encoding="utf-8") as journal_file:
+            journal = json.load(journal_file)
+        self.finished_neighborhoods = {(int(city_num), neighborhood_num)
+                                       for city_num, neighborhood_nums in journal["finished_neighborhoods"].items()
+                                       for neighborhood_num in neighborhood_nums}
+        self.finished_cities = set(journal["finished_cities"])
+        self.sink_positions = journal["sink_positions"]
+        print(f"Resuming the crawl: {len(self.finished_cities)} cities and "
+              f"{len(self.finished_neighborhoods)} neighborhoods are already finished")
+
+    # Bring the sinks' outputs back to the last commit, and commit the journal after every flush of the first sink
+    def attach(self, *sinks: NadlanSink) -> None:
+        self.sinks = list(sinks)
+        for sink_num, sink in enumerate(self.sinks):
+            sink.truncate_to(self.sink_positions[sink_num] if sink_num < len(self.sink_positions) else 0)
+        self.sinks[0].add_flush_listener(self.commit_sinks)
+
+    # Make sure all the other sinks wrote their rows too, and commit the journal
+    def commit_sinks(self) -> None:
+        if self.is_holding_commits:
+            self.is_commit_held = True
+            return
+        for sink in self.sinks[1:]:
+            sink.flush()
+        self.commit([sink.get_position() for sink in self.sinks])
+
+    def is_neighborhood_finished(self, city_num: int, neighborhood_num: int) -> bool:
+        return (city_num, neighborhood_num) in self.finished_neighborhoods
+
+    def is_city_finished(self, city_num: int) -> bool:
+        return city_num in self.finished_cities
+
+    # The neighborhood's rows are about to be handed over to the sink (they will be committed on the next flush).
+    # NOTE: It must be called before the rows are written, since writing them may already flush and commit
+    def mark_neighborhood_finished(self, city_num: int, neighborhood_num: int) -> None:
+        self.pending_neighborhoods.add((city_num, neighborhood_num))
+
+    # Hand the rows of a finished neighborhood over to the sinks (with the given function).
+    # The neighborhood is marked as pending first, and a commit is held back until all the sinks got its rows
+    def store_neighborhood(self, city_num: int, neighborhood_num: int, store_rows: Callable[[], None]) -> None:
+        self.mark_neighborhood_finished(city_num, neighborhood_num)
+        self.is_holding_commits = True
+        try:
+            store_rows()
+        finally:
+            self.is_holding_commits = False
+        if self.is_commit_held:
+            self.is_commit_held = False
+            self.commit_sinks()
+
+    # All the city's neighborhoods were handed over to the sink
+    def mark_city_finished(self, city_num: int) -> None:
+        self.pending_cities.add(city_num)
+
+    # Everything that was pending is now in the output file --> save the journal to disk
+    def commit(self, sink_positions: list[int]) -> None:
+        self.finished_neighborhoods |= self.pending_neighborhoods
+        self.finished_cities |= self.pending_cities
+        self.pending_neighborhoods = set()
+        self.pending_cities = set()
+        self.sink_positions = sink_positions
+
+        finished_neighborhoods_dict = {}
+        for city_num, neighborhood_num in sorted(self.finished_neighborhoods):
+            finished_neighborhoods_dict.setdefault(str(city_num), []).append(neighborhood_num)
+        journal = {
+            "finished_neighborhoods": finished_neighborhoods_dict,
+            "finished_cities": sorted(self.finished_cities),
+            "sink_positions": self.sink_positions
+        }
+        # We write into a temporary file first, so a crash never leaves a broken journal behind
+        with open(self.journal_file_name + ".tmp", "w", encoding="utf-8") as journal_file:
+            json.dump(journal, journal_file)
+        os.replace(self.journal_file_name + ".tmp", self.journal_file_name)
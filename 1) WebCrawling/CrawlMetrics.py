@@ -0,0 +1,322 @@
+"""
+__Brief Summary__:
+The instrumentation layer of our scrapers.
+When a crawl is slow, the "collected data of ..." lines don't tell us where the time went,
+so the class wraps the scraper's methods (and its driver, waiter and output sinks) and records:
+
+    1.  Phases --> every instrumented method call is timed. Phases are nested (for example,
+        'enter_page' runs inside 'open_neighborhood'), so each phase gets both its total time
+        and its self time (its total minus the time of the phases that ran inside it).
+        A phase that raised is counted as an error of that phase.
+
+    2.  WebDriver calls --> every command the driver sends to the browser (a '.text' read,
+        a 'find_elements', an 'execute_script', a 'back()' or a 'refresh()' etc') is counted
+        and timed, both by its command name and by the phase it was sent from.
+
+    3.  Cities --> the rows every output sink got while a city was being crawled,
+        and how many rows per second that is.
+
+    4.  Failures --> the retries (and the backoff time we slept before them),
+        the failed recoveries and the crawls we gave up on.
+
+Everything is written into two files:
+a structured log (a JSON object per line, for every phase call, city and failure),
+and a metrics file in the Prometheus text format (rewritten every few seconds, so a
+node exporter's textfile collector, or anything else, can scrape it while the crawl runs).
+Once the crawl is done, 'finish' prints a profile summary of the whole run.
+
+Usage:
+    scraper = NadlanScraper(metrics=CrawlMetrics())
+"""
+
+import os
+import json
+import time
+import functools
+from datetime import datetime
+
+
+# Escape a Prometheus label value (backslashes, double quotes and line feeds)
+def escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{escape_label_value(value)}"' for key, value in labels.items()) + "}"
+
+
+class CrawlMetrics(object):
+    def __init__(self, log_file_name: str = "CrawlLog.jsonl", metrics_file_name: str = "CrawlMetrics.prom",
+                 write_every_seconds: float = 10.0) -> None:
+        # Where we write the structured log and the metrics file
+        self.log_file_name = log_file_name
+        self.metrics_file_name = metrics_file_name
+
+        # How often (at most) we rewrite the metrics file while the crawl runs
+        self.write_every_seconds = write_every_seconds
+        self.last_write_time = time.perf_counter()
+
+        # When the run started (reset once a scraper is instrumented)
+        self.start_time = time.perf_counter()
+
+        # The phases that are currently running (the innermost is the last one):
+        # [[phase name, start time, seconds of its inner phases], ...]
+        self.phase_stack: list[list] = []
+
+        # {phase name: {"calls", "seconds", "self_seconds", "max_seconds", "errors", "webdriver_calls"}}
+        self.phases_dict: dict[str, dict] = {}
+
+        # {WebDriver command name: {"calls", "seconds"}}
+        self.webdriver_calls_dict: dict[str, dict] = {}
+
+        # The rows our sinks got: {(dataset, city name): rows}, and the time spent in each city: {city name: seconds}
+        self.rows_dict: dict[tuple[str, str], int] = {}
+        self.city_seconds_dict: dict[str, float] = {}
+
+        # The city that is currently crawled: its name (taken from the rows it wrote), start time and rows
+        self.current_city_name: str | None = None
+        self.current_city_start_time: float | None = None
+        self.current_city_rows_dict: dict[str, int] = {}
+
+        # {failure kind ("retry", "recover" or "give_up"): count}
+        self.failures_dict: dict[str, int] = {}
+
+        # A JSON object per line, appended as the crawl runs (line buffered, so a crash doesn't lose it)
+        self.log_file = open(log_file_name, "a", encoding="utf-8", buffering=1)
+
+    # Append an event to the structured log
+    def log(self, event: str, **fields) -> None:
+        self.log_file.write(json.dumps({"time": datetime.now().isoformat(timespec="milliseconds"), "event": event,
+                                        **fields}, ensure_ascii=False) + "\n")
+
+    # Wrap the scraper's phase methods, its driver, its waiter and its output sinks.
+    # The methods in 'city_method_names' crawl a whole city (their time is counted as the city's time)
+    def instrument(self, scraper, method_names: list[str], city_method_names: list[str], driver,
+                   waiter=None, sinks: list | None = None) -> None:
+        self.start_time = time.perf_counter()
+        for method_name in method_names:
+            self.instrument_method(scraper, method_name, method_name)
+        for method_name in city_method_names:
+            self.instrument_city_method(scraper, method_name)
+        self.instrument_driver(driver)
+        if waiter is not None:
+            for method_name in ["wait_for_elements", "wait_for_dom_to_settle", "wait_for_page_change"]:
+                self.instrument_method(waiter, method_name, f"waiter.{method_name}")
+        for sink in [] if sinks is None else sinks:
+            self.instrument_sink(sink)
+        self.log("start", scraper=type(scraper).__name__)
+
+    # Replace the object's method (on the object itself, not on its class) with a timed one
+    def instrument_method(self, owner, method_name: str, phase_name: str) -> None:
+        method = getattr(owner, method_name)
+
+        @functools.wraps(method)
+        def instrumented_method(*args, **kwargs):
+            self.start_phase(phase_name)
+            try:
+                return method(*args, **kwargs)
+            except Exception as exception:
+                self.phases_dict[phase_name]["errors"] += 1
+                self.log("phase_error", phase=phase_name, error=str(exception))
+                raise
+            finally:
+                self.finish_phase()
+        setattr(owner, method_name, instrumented_method)
+
+    # Like 'instrument_method', and the rows written during the call are counted as the city's rows
+    def instrument_city_method(self, owner, method_name: str) -> None:
+        self.instrument_method(owner, method_name, method_name)
+        method = getattr(owner, method_name)
+
+        # ('city' is the city's index, or its entry in the navigation index)
+        @functools.wraps(method)
+        def instrumented_city_method(city, *args, **kwargs):
+            self.start_city()
+            try:
+                return method(city, *args, **kwargs)
+            finally:
+                # (a city that wrote no rows is named by the navigation index, or by its index)
+                self.finish_city(city["name"] if isinstance(city, dict) else f"#{city}")
+        setattr(owner, method_name, instrumented_city_method)
+
+    # Count and time every command the driver sends to the browser
+    # (the elements and the waits of the driver send their commands through it as well)
+    def instrument_driver(self, driver) -> None:
+        execute = driver.execute
+
+        @functools.wraps(execute)
+        def instrumented_execute(driver_command: str, params: dict | None = None):
+            start_time = time.perf_counter()
+            try:
+                return execute(driver_command, params)
+            finally:
+                command_stats = self.webdriver_calls_dict.setdefault(driver_command, {"calls": 0, "seconds": 0.0})
+                command_stats["calls"] += 1
+                command_stats["seconds"] += time.perf_counter() - start_time
+                if len(self.phase_stack) > 0:
+                    self.phases_dict[self.phase_stack[-1][0]]["webdriver_calls"] += 1
+        driver.execute = instrumented_execute
+
+    # Time the sink's flushes (the file writes), and count the rows it gets
+    def instrument_sink(self, sink) -> None:
+        self.instrument_method(sink, "flush", "sink.flush")
+        dataset = os.path.basename(sink.output_file_name)
+        write = sink.write
+
+        @functools.wraps(write)
+        def counted_write(data_dict: dict[str, list]) -> None:
+            self.count_rows(dataset, data_dict)
+            write(data_dict)
+        sink.write = counted_write
+
+    def get_phase_stats(self, phase_name: str) -> dict:
+        if phase_name not in self.phases_dict:
+            self.phases_dict[phase_name] = {"calls": 0, "seconds": 0.0, "self_seconds": 0.0, "max_seconds": 0.0,
+                                            "errors": 0, "webdriver_calls": 0}
+        return self.phases_dict[phase_name]
+
+    def start_phase(self, phase_name: str) -> None:
+        self.get_phase_stats(phase_name)
+        self.phase_stack.append([phase_name, time.perf_counter(), 0.0])
+
+    def finish_phase(self) -> None:
+        phase_name, start_time, inner_seconds = self.phase_stack.pop()
+        seconds = time.perf_counter() - start_time
+        phase_stats = self.phases_dict[phase_name]
+        phase_stats["calls"] += 1
+        phase_stats["seconds"] += seconds
+        phase_stats["self_seconds"] += seconds - inner_seconds
+        phase_stats["max_seconds"] = max(phase_stats["max_seconds"], seconds)
+        # The outer phase's self time doesn't include this phase
+        if len(self.phase_stack) > 0:
+            self.phase_stack[-1][2] += seconds
+        self.log("phase", phase=phase_name, seconds=round(seconds, 4), depth=len(self.phase_stack),
+                 city=self.current_city_name)
+        if time.perf_counter() - self.last_write_time >= self.write_every_seconds:
+            self.write_metrics_file()
+
+    def start_city(self) -> None:
+        self.current_city_name = None
+        self.current_city_start_time = time.perf_counter()
+        self.current_city_rows_dict = {}
+
+    def finish_city(self, fallback_city_name: str) -> None:
+        city_name = fallback_city_name if self.current_city_name is None else self.current_city_name
+        seconds = time.perf_counter() - self.current_city_start_time
+        self.city_seconds_dict[city_name] = self.city_seconds_dict.get(city_name, 0.0) + seconds
+        self.log("city", city=city_name, seconds=round(seconds, 3), rows=self.current_city_rows_dict,
+                 rows_per_second={dataset: round(rows / seconds, 2) if seconds > 0 else None
+                                  for dataset, rows in self.current_city_rows_dict.items()})
+        self.current_city_name = None
+        self.current_city_start_time = None
+
+    # Count the rows of a data dictionary that was handed over to a sink (by its City column)
+    def count_rows(self, dataset: str, data_dict: dict[str, list]) -> None:
+        cities_list = data_dict.get("City", [])
+        if len(cities_list) == 0:
+            return
+        # (a data dictionary holds a single neighborhood, so all of its rows are of the same city)
+        city_name = cities_list[0]
+        self.rows_dict[(dataset, city_name)] = self.rows_dict.get((dataset, city_name), 0) + len(cities_list)
+        if self.current_city_start_time is not None:
+            self.current_city_name = city_name
+            self.current_city_rows_dict[dataset] = self.current_city_rows_dict.get(dataset, 0) + len(cities_list)
+
+    # Record a failure of a scraping step. 'backoff_seconds' is how long we are going to sleep before retrying
+    def record_failure(self, kind: str, exception: Exception, backoff_seconds: float = 0.0) -> None:
+        self.failures_dict[kind] = self.failures_dict.get(kind, 0) + 1
+        if backoff_seconds > 0:
+            # (the backoff sleep is a phase of its own, so the time we waited shows up in the profile)
+            backoff_stats = self.get_phase_stats("retry_backoff")
+            backoff_stats["calls"] += 1
+            backoff_stats["seconds"] += backoff_seconds
+            backoff_stats["self_seconds"] += backoff_seconds
+            backoff_stats["max_seconds"] = max(backoff_stats["max_seconds"], backoff_seconds)
+            # The sleep itself runs inside the phase that is still open (like 'scrape_city_by_clicking'),
+            # so it is counted as that phase's inner time (and not once more as its self time)
+            if len(self.phase_stack) > 0:
+                self.phase_stack[-1][2] += backoff_seconds
+        self.log("failure", kind=kind, error=str(exception), backoff_seconds=backoff_seconds,
+                 phase=self.phase_stack[-1][0] if len(self.phase_stack) > 0 else None, city=self.current_city_name)
+        # (we may be about to give up on the crawl, so the metrics file must be up to date)
+        self.write_metrics_file()
+
+    def get_rows_per_second(self, dataset: str, city_name: str) -> float | None:
+        seconds = self.city_seconds_dict.get(city_name, 0.0)
+        return self.rows_dict[(dataset, city_name)] / seconds if seconds > 0 else None
+
+    # All the metrics, in the Prometheus text format
+    def get_metrics_text(self) -> str:
+        lines = [
+            "# HELP nadlan_crawl_run_seconds How long the crawl has been running.",
+            "# TYPE nadlan_crawl_run_seconds gauge",
+            f"nadlan_crawl_run_seconds {time.perf_counter() - self.start_time:.3f}"
+        ]
+        phase_metrics = [("calls", "nadlan_crawl_phase_calls_total", "How many times each phase ran."),
+                         ("seconds", "nadlan_crawl_phase_seconds_total", "Total time of each phase (inner phases included)."),
+                         ("self_seconds", "nadlan_crawl_phase_self_seconds_total", "Time of each phase, without its inner phases."),
+                         ("errors", "nadlan_crawl_phase_errors_total", "How many times each phase raised."),
+                         ("webdriver_calls", "nadlan_crawl_phase_webdriver_calls_total",
+                          "WebDriver commands sent directly from each phase.")]
+        for stat_name, metric_name, help_text in phase_metrics:
+            lines += [f"# HELP {metric_name} {help_text}", f"# TYPE {metric_name} counter"]
+            lines += [f"{metric_name}{format_labels(phase=phase_name)} {phase_stats[stat_name]:g}"
+                      for phase_name, phase_stats in self.phases_dict.items()]
+        for stat_name, metric_name, help_text in [("calls", "nadlan_crawl_webdriver_calls_total", "WebDriver commands sent."),
+                                                  ("seconds", "nadlan_crawl_webdriver_seconds_total",
+                                                   "Time of the WebDriver commands round trips.")]:
+            lines += [f"# HELP {metric_name} {help_text}", f"# TYPE {metric_name} counter"]
+            lines += [f"{metric_name}{format_labels(command=command)} {command_stats[stat_name]:g}"
+                      for command, command_stats in self.webdriver_calls_dict.items()]
+        lines += ["# HELP nadlan_crawl_rows_total Rows handed over to each output sink, by city.",
+                  "# TYPE nadlan_crawl_rows_total counter"]
+        lines += [f"nadlan_crawl_rows_total{format_labels(dataset=dataset, city=city_name)} {rows}"
+                  for (dataset, city_name), rows in self.rows_dict.items()]
+        lines += ["# HELP nadlan_crawl_city_seconds_total Time spent crawling each city.",
+                  "# TYPE nadlan_crawl_city_seconds_total counter"]
+        lines += [f"nadlan_crawl_city_seconds_total{format_labels(city=city_name)} {seconds:.3f}"
+                  for city_name, seconds in self.city_seconds_dict.items()]
+        lines += ["# HELP nadlan_crawl_city_rows_per_second Rows per second of each finished city.",
+                  "# TYPE nadlan_crawl_city_rows_per_second gauge"]
+        for dataset, city_name in self.rows_dict:
+            rows_per_second = self.get_rows_per_second(dataset, city_name)
+            if rows_per_second is not None:
+                lines.append(f"nadlan_crawl_city_rows_per_second{format_labels(dataset=dataset, city=city_name)} "
+                             f"{rows_per_second:.3f}")
+        lines += ["# HELP nadlan_crawl_failures_total Failed scraping steps, by what we did about them.",
+                  "# TYPE nadlan_crawl_failures_total counter"]
+        lines += [f"nadlan_crawl_failures_total{format_labels(kind=kind)} {count}" for kind, count in self.failures_dict.items()]
+        return "\n".join(lines) + "\n"
+
+    # Rewrite the metrics file (through a temporary file, so a scraper never reads half of it)
+    def write_metrics_file(self) -> None:
+        with open(self.metrics_file_name + ".tmp", "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(self.get_metrics_text())
+        os.replace(self.metrics_file_name + ".tmp", self.metrics_file_name)
+        self.last_write_time = time.perf_counter()
+
+    # The end of the run --> write the final metrics and print the profile summary
+    def finish(self) -> None:
+        self.write_metrics_file()
+        self.log("finish", seconds=round(time.perf_counter() - self.start_time, 3), failures=self.failures_dict)
+        self.print_summary()
+
+    # Print where the time of the run went (the phases by their self time, the WebDriver commands and the cities)
+    def print_summary(self) -> None:
+        run_seconds = time.perf_counter() - self.start_time
+        print(f"Crawl profile summary ({run_seconds:.1f}s):")
+        print("\tPhases (by self time):")
+        for phase_name, phase_stats in sorted(self.phases_dict.items(), key=lambda item: -item[1]["self_seconds"]):
+            print(f"\t\t{phase_name}: {phase_stats['calls']} calls, self {phase_stats['self_seconds']:.1f}s "
+                  f"({100 * phase_stats['self_seconds'] / run_seconds:.1f}%), total {phase_stats['seconds']:.1f}s, "
+                  f"max {phase_stats['max_seconds']:.2f}s, {phase_stats['webdriver_calls']} WebDriver calls, "
+                  f"{phase_stats['errors']} errors")
+        print(f"\tWebDriver calls ({sum(stats['calls'] for stats in self.webdriver_calls_dict.values())}):")
+        for command, command_stats in sorted(self.webdriver_calls_dict.items(), key=lambda item: -item[1]["seconds"]):
+            print(f"\t\t{command}: {command_stats['calls']} calls, {command_stats['seconds']:.1f}s")
+        print("\tCities:")
+        for dataset, city_name in self.rows_dict:
+            rows_per_second = self.get_rows_per_second(dataset, city_name)
+            print(f"\t\t{city_name} ({dataset}): {self.rows_dict[(dataset, city_name)]} rows"
+                  + ("" if rows_per_second is None else f", {rows_per_second:.1f} rows per second"))
+        print(f"\tFailures: {self.failures_dict if len(self.failures_dict) > 0 else 'none'}")
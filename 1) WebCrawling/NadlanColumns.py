@@ -0,0 +1,43 @@
+"""
+__Brief Summary__:
+The columns of the datasets our crawlers produce.
+Both the Selenium scrapers and the HTTP crawler build their data dictionaries
+from these lists, so all of them produce exactly the same columns.
+"""
+
+# The columns of the housing units dataset (NadlanScraper)
+HOUSING_UNITS_COLUMNS = [
+    "Sale_Date",
+    "City",
+    "Neighborhood",
+    "Street",
+    "Building_Number",
+    "Property_Type",
+    "Rooms",
+    "Floor",
+    "Square_Meter",
+    "Price"
+]
+
+# The columns of the neighborhoods environment dataset (NadlanEnvironmentScraper)
+ENVIRONMENT_COLUMNS = [
+    "City",
+    "Neighborhood",
+    "Schools",
+    "Kindergartens_And_Dormitories",
+    "Non_Formal_Educational_Institutions",
+    "Education_Average_Distance",
+    "Green_Areas_SQM",
+    "Parks_And_Gardens",
+    "Green_Areas_Average_Distance",
+    "Parks_And_Gardens_Average_Distance",
+    "Public_Institutions",
+    "Community_Institutions",
+    "Religious_Institutions",
+    "Public_Building_Average_Distance",
+]
+
+# The environment columns, based on the category they belong to
+EDUCATION_COLUMNS = ["Schools", "Kindergartens_And_Dormitories", "Non_Formal_Educational_Institutions", "Education_Average_Distance"]
+GREEN_AREAS_COLUMNS = ["Green_Areas_SQM", "Parks_And_Gardens", "Green_Areas_Average_Distance", "Parks_And_Gardens_Average_Distance"]
+PUBLIC_BUILDINGS_COLUMNS = ["Public_Institutions", "Community_Institutions", "Religious_Institutions", "Public_Building_Average_Distance"]
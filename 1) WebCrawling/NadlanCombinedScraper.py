@@ -0,0 +1,122 @@
+"""
+__Brief Summary__:
+A single-pass crawl of both our datasets.
+NadlanScraper and NadlanEnvironmentScraper repeat the same city -> neighborhood
+navigation, so every neighborhood used to be loaded twice, in two separate browser sessions.
+The class visits each neighborhood once, and during that one visit it collects both
+the housing units table (like NadlanScraper) and the "מה בסביבה" iframe data
+(like NadlanEnvironmentScraper), roughly halving the total page loads.
+
+The navigation, waits, retries and housing units collecting come from NadlanScraper,
+and the environmental data collecting comes from NadlanEnvironmentScraper.
+Both datasets are written through one pipeline: each one has its own output sink,
+and both sinks are committed together by the same crawl journal.
+"""
+
+import os
+from selenium.webdriver import ActionChains
+from NadlanScraper import NadlanScraper
+from NadlanEnvironmentScraper import NadlanEnvironmentScraper
+from NadlanSink import NadlanSink, create_sink
+from NadlanNavigationIndex import NadlanNavigationIndex
+from SaleDateWatermarks import SaleDateWatermarks
+from CrawlMetrics import CrawlMetrics
+from NadlanColumns import ENVIRONMENT_COLUMNS, EDUCATION_COLUMNS, GREEN_AREAS_COLUMNS, PUBLIC_BUILDINGS_COLUMNS
+
+
+class NadlanCombinedScraper(NadlanScraper, NadlanEnvironmentScraper):
+    def __init__(self, city_indices: list[int] | None = None,
+                 crawling_target_url: str = "https://www.nadlan.gov.il/Pricing",
+                 output_file_name: str = "Test.csv",
+                 environment_output_file_name: str | None = None,
+                 nadlan_sink: NadlanSink | None = None,
+                 environment_sink: NadlanSink | None = None,
+                 idle_timeout: float = 3.0,
+                 bulk_extraction: bool = True,
+                 navigation_index: NadlanNavigationIndex | None = None,
+                 typed_output: bool = False,
+                 watermarks: SaleDateWatermarks | None = None,
+                 metrics: CrawlMetrics | None = None) -> None:
+        # By default, the environment data is saved next to the housing units data
+        # (for example: Test.csv -> Test_Environment.csv)
+        if environment_output_file_name is None:
+            name, extension = os.path.splitext(output_file_name)
+            environment_output_file_name = f"{name}_Environment{extension}"
+        self.environment_output_file_name = environment_output_file_name
+
+        # Where we store the current neighbourhood's environmental data, before handing it over to its sink.
+        # NOTE: It must exist before NadlanScraper.__init__, which attaches all of our sinks to the journal
+        self.environment_dict = {key: [] for key in ENVIRONMENT_COLUMNS}
+        self.education_keys_list = EDUCATION_COLUMNS
+        self.green_areas_keys_list = GREEN_AREAS_COLUMNS
+        self.public_buildings_keys_list = PUBLIC_BUILDINGS_COLUMNS
+        # The environment sink is flushed by the journal together with the housing units sink
+        self.environment_sink = create_sink(environment_output_file_name, ENVIRONMENT_COLUMNS, flush_every_rows=10**9) \
+            if environment_sink is None else environment_sink
+
+        NadlanScraper.__init__(self, city_indices=city_indices, crawling_target_url=crawling_target_url,
+                               output_file_name=output_file_name, nadlan_sink=nadlan_sink,
+                               idle_timeout=idle_timeout, bulk_extraction=bulk_extraction,
+                               navigation_index=navigation_index, typed_output=typed_output,
+                               watermarks=watermarks, metrics=metrics)
+
+        # The environment collecting methods (from NadlanEnvironmentScraper) use the same single driver
+        self.environment_driver = self.nadlan_driver
+        self.action = ActionChains(self.environment_driver)
+
+    def get_output_sinks(self) -> list[NadlanSink]:
+        return [self.nadlan_sink, self.environment_sink]
+
+    # Both the housing units phases, and the environment collecting phases
+    def get_instrumented_methods(self) -> list[str]:
+        return NadlanScraper.get_instrumented_methods(self) + ["scrape_environmental_data", "collect_environmental_data"]
+
+    # Reset the data from both of our dictionaries
+    def reset_dict_data(self) -> None:
+        NadlanScraper.reset_dict_data(self)
+        NadlanEnvironmentScraper.reset_dict_data(self)
+
+    # Enter the given neighborhood page and collect both its housing units and its environmental data.
+    # Returns the neighborhood's name (or None if there are no more neighborhoods in the city)
+    def scrape_neighborhood_housing_units(self, city_name: str, neighborhood_num: int) -> None | str:
+        neighborhood_name = self.scrape_neighborhood(idx=neighborhood_num, city_name=city_name)
+        if neighborhood_name is not None:
+            self.scrape_all_housing_units(city_name, neighborhood_name)
+            self.scrape_environmental_data(city_name, neighborhood_name)
+            # Focus back on the page itself (the environmental data is inside an iframe)
+            self.environment_driver.switch_to.default_content()
+        return neighborhood_name
+
+    # Load the neighborhood page by its url and collect both its housing units and its environmental data
+    def scrape_neighborhood_by_url(self, city_name: str, neighborhood: dict) -> str:
+        self.environment_driver.switch_to.default_content()
+        NadlanScraper.scrape_neighborhood_by_url(self, city_name, neighborhood)
+        self.scrape_environmental_data(city_name, neighborhood["name"])
+        self.environment_driver.switch_to.default_content()
+        return neighborhood["name"]
+
+    # Hand the collected data of both datasets over to their output sinks
+    def store_the_dict_in_the_sink(self) -> None:
+        NadlanScraper.store_the_dict_in_the_sink(self)
+        NadlanEnvironmentScraper.store_the_dict_in_the_sink(self)
+
+    # The environment iframe leaves the page in a state that only a refresh cleans up
+    # (see NadlanEnvironmentScraper.exit_to_the_previous_page)
+    def exit_to_the_previous_page(self) -> None:
+        NadlanEnvironmentScraper.exit_to_the_previous_page(self)
+
+    # Start over from the cities page (we may still be focused on the environment iframe)
+    def reload_the_main_page(self) -> None:
+        NadlanEnvironmentScraper.reload_the_main_page(self)
+
+    # Where we close the web driver and end the crawling
+    def close_nadlan_driver(self) -> None:
+        self.environment_sink.close()
+        NadlanScraper.close_nadlan_driver(self)
+
+
+if __name__ == '__main__':
+    scraper = NadlanCombinedScraper(output_file_name="AllCities.csv",
+                                    environment_output_file_name="AllCitiesEnvironment.csv")
+    scraper.main_scraper()
+    scraper.close_nadlan_driver()
@@ -26,69 +26,119 @@ In terms of the environmental data itself, there are 3 types of data we collect:
 """
 
 
-import pandas as pd
 import numpy as np
 import sys
 from selenium import webdriver
 from selenium.webdriver import ActionChains
 from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.remote.webelement import WebElement
-from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.wait import WebDriverWait 
-from selenium.webdriver.support import expected_conditions as EC
 import time
+from typing import Callable
+from NadlanSink import NadlanSink, create_sink
+from CrawlJournal import CrawlJournal
+from NadlanWaiter import NadlanWaiter
+from NadlanColumns import ENVIRONMENT_COLUMNS, EDUCATION_COLUMNS, GREEN_AREAS_COLUMNS, PUBLIC_BUILDINGS_COLUMNS
+from NadlanNavigationIndex import NadlanNavigationIndex, get_neighborhood_name
+from CrawlMetrics import CrawlMetrics
+
+# Returns the text of all the environmental data elements of the iframe
+# with a single WebDriver round trip (instead of one per element)
+EXTRACT_ENVIRONMENTAL_DATA_SCRIPT = """
+const texts = selector => Array.from(document.querySelectorAll(selector), element => element.innerText.trim());
+return {
+    education: texts('div.mwa-education__item-title.ng-binding'),
+    public_buildings_and_green_areas: texts('b.ng-binding'),
+    public_building_average_distance: texts('div.mwa-cols__item-title.ng-binding').slice(0, 1)
+};
+"""
+
+# The methods our crawl metrics time as the phases of the crawl,
+# and the methods that crawl a whole city (see CrawlMetrics.instrument)
+# NOTE: Be advised, these are CONSTANT variables!
+INSTRUMENTED_METHODS = ["enter_city", "display_neighborhood_table", "scrape_city", "scrape_neighborhood", "enter_page",
+                        "scrape_neighborhood_environment_by_url", "scrape_environmental_data",
+                        "collect_environmental_data", "return_to_the_neighborhoods_page", "exit_to_the_previous_page",
+                        "reload_the_main_page", "store_the_dict_in_the_sink"]
+INSTRUMENTED_CITY_METHODS = ["scrape_city_environment_by_clicking", "scrape_city_environment_by_navigation_index"]
 
 class NadlanEnvironmentScraper(object):
-    def __init__(self) -> None:
-        # Where we store neighbourhoods' environmental data, 
-        # before converting it into a Pandas DataFrame
+    def __init__(self, city_indices: list[int] | None = None,
+                 crawling_target_url: str = "https://www.nadlan.gov.il/Pricing",
+                 output_file_name: str = "AllCitiesEnvironment5.csv",
+                 environment_sink: NadlanSink | None = None,
+                 idle_timeout: float = 3.0,
+                 navigation_index: NadlanNavigationIndex | None = None,
+                 metrics: CrawlMetrics | None = None) -> None:
+        # Where we store the current neighbourhood's environmental data,
+        # before handing it over to our output sink
         self.environment_dict = self.create_data_dict_keys()
         
         # Following lists contain the names of the keys of our dictionary
         # based on the category the belong to
-        self.education_keys_list = ["Schools", "Kindergartens_And_Dormitories", "Non_Formal_Educational_Institutions", "Education_Average_Distance"]
-        self.green_areas_keys_list = ["Green_Areas_SQM", "Parks_And_Gardens", "Green_Areas_Average_Distance", "Parks_And_Gardens_Average_Distance"]
-        self.public_buildings_keys_list = ["Public_Institutions", "Community_Institutions", "Religious_Institutions", "Public_Building_Average_Distance"]
+        self.education_keys_list = EDUCATION_COLUMNS
+        self.green_areas_keys_list = GREEN_AREAS_COLUMNS
+        self.public_buildings_keys_list = PUBLIC_BUILDINGS_COLUMNS
 
-        # Our main Neighbourhoods' environmental data container.
-        self.environment_df = pd.DataFrame(data=self.environment_dict)
-        
         # How many cities are we going to scrape data from.
         # NOTE: Be advised, this is a CONSTANT variable!
         self.NUM_OF_CITIES: int = 80
 
+        # Which cities (by their button index) this scraper is in charge of.
+        # By default we scrape all of them, a parallel worker gets only its own shard
+        self.city_indices = list(range(self.NUM_OF_CITIES)) if city_indices is None else city_indices
+
+        # Where we crawl from (the real website or a local stand-in of it),
+        # and where we save the collected data
+        self.crawling_target_url = crawling_target_url
+        self.output_file_name = output_file_name
+
+        # Our main Neighbourhoods' environmental data container --> appends only the new rows to the output file.
+        # We collect a single row per neighborhood, so here it is mostly the time that triggers a flush
+        self.environment_sink = create_sink(output_file_name, list(self.environment_dict.keys()), flush_every_rows=50) \
+            if environment_sink is None else environment_sink
+
+        # Our progress journal --> lets a restarted crawl skip everything that was already written
+        self.crawl_journal = CrawlJournal(output_file_name + ".journal.json")
+        self.crawl_journal.attach(self.environment_sink)
+
+        # How many times we retry a failed city/neighborhood before giving up on the crawl,
+        # and how long we wait before the first retry (doubled after every failure)
+        # NOTE: Be advised, these are CONSTANT variables!
+        self.MAX_RETRIES: int = 3
+        self.RETRY_BACKOFF_SECONDS: float = 10.0
+
         # Where we contain our web scraping driver
         self.environment_driver = self.create_environment_driver()
 
+        # Our wait layer --> waits only as long as each page (and the environment iframe) actually needs
+        self.waiter = NadlanWaiter(self.environment_driver, timeout=30, idle_timeout=idle_timeout)
+
+        # If given, we jump straight to each neighborhood of the cities it contains
+        # (instead of going back, refreshing and clicking our way to it).
+        # NOTE: The index is built by NadlanScraper.build_navigation_index
+        self.navigation_index = navigation_index
+
         # action chain object creation -> will help us click some complicated buttons
         self.action = ActionChains(self.environment_driver)
+
+        # If given, we record the time of every phase of the crawl, the WebDriver calls,
+        # the rows per second of every city and the failures (see CrawlMetrics)
+        self.metrics = metrics
+        if self.metrics is not None:
+            self.metrics.instrument(self, INSTRUMENTED_METHODS, INSTRUMENTED_CITY_METHODS,
+                                    self.environment_driver, self.waiter, [self.environment_sink])
     
     # Create the WebDriver and set it on the scraping target url
     def create_environment_driver(self) -> WebDriver:
-        crawling_target_url = "https://www.nadlan.gov.il/Pricing"
         environment_driver = webdriver.Chrome()
         environment_driver.maximize_window()
-        environment_driver.get(crawling_target_url)
+        environment_driver.get(self.crawling_target_url)
         return environment_driver
 
     def create_data_dict_keys(self) -> dict[str, list]:
-        return {
-            "City": [],
-            "Neighborhood": [],
-            "Schools": [],
-            "Kindergartens_And_Dormitories": [],
-            "Non_Formal_Educational_Institutions": [],
-            "Education_Average_Distance": [],
-            "Green_Areas_SQM": [],
-            "Parks_And_Gardens": [],
-            "Green_Areas_Average_Distance": [],
-            "Parks_And_Gardens_Average_Distance": [],
-            "Public_Institutions": [],
-            "Community_Institutions": [],
-            "Religious_Institutions": [],
-            "Public_Building_Average_Distance": [],
-        }
+        return {key: [] for key in ENVIRONMENT_COLUMNS}
 
     # Reset the data from our environment dictionary
     def reset_dict_data(self) -> None:
@@ -100,30 +150,123 @@ class NadlanEnvironmentScraper(object):
     # 3. Environmental Data Scraper --> Where we collect the data!
     def main_scrapper(self) -> None:
         # Iterate through each city
-        for city_num in range(self.NUM_OF_CITIES):
-            self.display_neighborhood_table()
-             # Enter the current city page and get its name
-            city_name = self.scrape_city(idx=city_num)
-            # Iterate through each neighborhood in the city
-            for neighborhood_num in range(self.get_number_of_neighborhoods()):
-                # Enter the current neighborhood page
-                neighborhood_name = self.scrape_neighborhood(idx=neighborhood_num)
-                 # If there are no more neighborhood in the city, break out of the loop
-                if neighborhood_name is None: break
-                # Collect all the environmental data in the current neighborhood
-                self.scrape_environmental_data(city_name, neighborhood_name)
-                # Store the collected data to a CSV file
-                self.store_the_dict_in_the_df()
-                self.environment_df.to_csv("AllCitiesEnvironment5.csv", index=False)
+        for city_num in self.city_indices:
+            # Skip the cities we have already finished in a previous run
+            if self.crawl_journal.is_city_finished(city_num): continue
+            if self.navigation_index is not None and self.navigation_index.has_city(city_num):
+                self.scrape_city_environment_by_navigation_index(self.navigation_index.get_city(city_num))
+            else:
+                self.scrape_city_environment_by_clicking(city_num)
+            self.crawl_journal.mark_city_finished(city_num)
+        # Store any remaining data & Write it to the output file
+        self.store_the_dict_in_the_sink()
+        self.reset_dict_data()
+        self.environment_sink.close()
+        self.waiter.print_wait_times_summary()
+        if self.metrics is not None:
+            self.metrics.finish()
+
+    # Reach each neighborhood of the city by clicking on its button (and going back to the city's page afterwards)
+    def scrape_city_environment_by_clicking(self, city_num: int) -> None:
+        # Enter the current city page and get its name (and how many neighborhoods it has)
+        city_name, num_of_neighborhoods = self.run_with_retries(
+            lambda: self.enter_city(city_num), recover=self.reload_the_main_page)
+        # Iterate through each neighborhood in the city
+        for neighborhood_num in range(num_of_neighborhoods):
+            # Skip the neighborhoods we have already finished in a previous run
+            if self.crawl_journal.is_neighborhood_finished(city_num, neighborhood_num): continue
+            # Enter the current neighborhood page & Collect all the environmental data in it
+            neighborhood_name = self.run_with_retries(
+                lambda: self.scrape_neighborhood_environment(city_name, neighborhood_num),
+                recover=lambda: self.reload_the_city_page(city_num))
+             # If there are no more neighborhood in the city, break out of the loop
+            if neighborhood_name is None: break
+            # Hand the collected data over to our output sinks (through the journal, so a flush in the middle
+            # never commits the rows of a neighborhood that is not marked as finished, or only some of its rows)
+            self.crawl_journal.store_neighborhood(city_num, neighborhood_num, self.store_the_dict_in_the_sink)
+            self.reset_dict_data()
+            # Go back to the current city's neighborhoods page
+            self.return_to_the_neighborhoods_page(city_num)
+        # Go back to the cities page
+        self.exit_to_the_previous_page()
+
+    # Jump straight to each neighborhood of the city by its url in the navigation index
+    def scrape_city_environment_by_navigation_index(self, city: dict) -> None:
+        for neighborhood in city["neighborhoods"]:
+            # Skip the neighborhoods we have already finished in a previous run
+            if self.crawl_journal.is_neighborhood_finished(city["city_num"], neighborhood["neighborhood_num"]): continue
+            self.run_with_retries(lambda: self.scrape_neighborhood_environment_by_url(city["name"], neighborhood),
+                                  recover=self.reload_the_main_page)
+            # Hand the collected data over to our output sinks (through the journal, see above)
+            self.crawl_journal.store_neighborhood(city["city_num"], neighborhood["neighborhood_num"],
+                                                  self.store_the_dict_in_the_sink)
+            self.reset_dict_data()
+
+    # Load the neighborhood page by its url and collect all its environmental data
+    def scrape_neighborhood_environment_by_url(self, city_name: str, neighborhood: dict) -> str:
+        self.environment_driver.switch_to.default_content()
+        self.environment_driver.get(neighborhood["url"])
+        self.scrape_environmental_data(city_name, neighborhood["name"])
+        return neighborhood["name"]
+
+    # Run the given scraping step, and if it fails, recover to a known page and try it again
+    # (waiting twice as long after every failure). If it keeps failing, we end the crawl
+    # (everything that was already committed will be skipped once the crawl is restarted)
+    def run_with_retries(self, scraping_step: Callable, recover: Callable[[], None]):
+        for attempt in range(self.MAX_RETRIES + 1):
+            try:
+                return scraping_step()
+            except Exception as exception:
+                # Throw away whatever was partially collected in the failed attempt
                 self.reset_dict_data()
-                # Go back to the current city's neighborhoods page
-                self.exit_to_the_previous_page()
-                self.display_neighborhood_table()
-            # Go back to the cities page
+                if attempt == self.MAX_RETRIES:
+                    if self.metrics is not None:
+                        self.metrics.record_failure("give_up", exception)
+                    self.close_environment_driver()
+                    raise Exception(f"Giving up after {attempt + 1} attempts: {exception}")
+                backoff_seconds = self.RETRY_BACKOFF_SECONDS * 2 ** attempt
+                print(f"Failure ({exception}), retrying in {backoff_seconds} seconds")
+                if self.metrics is not None:
+                    self.metrics.record_failure("retry", exception, backoff_seconds)
+                time.sleep(backoff_seconds)
+                try:
+                    recover()
+                except Exception as recover_exception:
+                    print(f"Failure while recovering ({recover_exception})")
+                    if self.metrics is not None:
+                        self.metrics.record_failure("recover", recover_exception)
+
+    # Enter the given city page, and return its name and its number of neighborhoods
+    def enter_city(self, city_num: int) -> tuple[str, int]:
+        self.display_neighborhood_table()
+        city_name = self.scrape_city(idx=city_num)
+        return city_name, self.get_number_of_neighborhoods()
+
+    # Enter the given neighborhood page and collect all its environmental data.
+    # Returns the neighborhood's name (or None if there are no more neighborhoods in the city)
+    def scrape_neighborhood_environment(self, city_name: str, neighborhood_num: int) -> None | str:
+        neighborhood_name = self.scrape_neighborhood(idx=neighborhood_num)
+        if neighborhood_name is not None:
+            self.scrape_environmental_data(city_name, neighborhood_name)
+        return neighborhood_name
+
+    # Go back to the city's neighborhoods page (or reload it, if going back didn't work)
+    def return_to_the_neighborhoods_page(self, city_num: int) -> None:
+        try:
             self.exit_to_the_previous_page()
-        # Store any remaining data & Write the final data to a CSV file
-        self.store_the_dict_in_the_df()
-        self.environment_df.to_csv("AllCitiesEnvironment5.csv", index=False)
+            self.display_neighborhood_table()
+        except Exception:
+            self.reload_the_city_page(city_num)
+
+    # Start over from the cities page (we may still be focused on the environment iframe)
+    def reload_the_main_page(self) -> None:
+        self.environment_driver.switch_to.default_content()
+        self.environment_driver.get(self.crawling_target_url)
+
+    # Start over from the cities page, and enter the given city
+    def reload_the_city_page(self, city_num: int) -> None:
+        self.reload_the_main_page()
+        self.enter_city(city_num)
 
     # This method navigates to the specified city after clicking on the corresponding button.
     # After getting the button element for the city's neighborhoods page.
@@ -131,9 +274,8 @@ class NadlanEnvironmentScraper(object):
         # Find all the city buttons presented in the current page
         # (we do it because everytime a new page is loaded, the previous elements become stale)
         try:
-            time.sleep(2)
             # button.text -> means that we are searching for elements with a tag name of button who stands in the 'text' css class
-            cities_buttons_list = self.wait().until(EC.presence_of_all_elements_located((By.CSS_SELECTOR,'button.text')))
+            cities_buttons_list = self.waiter.wait_for_elements('button.text', label="scrape_city", min_count=idx + 1)
         except:
             cities_buttons_list = [] # ignore
             raise Exception("Failure in 'scrape_city' method!")
@@ -147,19 +289,11 @@ class NadlanEnvironmentScraper(object):
     # of the housing units on the neighborhood.
     def scrape_neighborhood(self, idx: int) -> None | str:
         try:
-            time.sleep(2)
             # button.text -> means that we are searching for elements with a tag name of button who stands in the 'text' css class
-            neighborhoods_buttons_list = self.wait().until(EC.presence_of_all_elements_located((By.CSS_SELECTOR,'button.text')))
+            neighborhoods_buttons_list = self.waiter.wait_for_elements('button.text', label="scrape_neighborhood", min_count=idx + 1)
         except:
-            neighborhoods_buttons_list = [] # ignore
-            print("Failure in 'scrape_neighborhood' method!")
-            self.close_environment_driver()
-        neighborhood_name = neighborhoods_buttons_list[idx].text
-        if idx == 0:
-            # This condition is necessary for extracting the first neighborhood name of Herzliya because of the way the website is programmed
-            neighborhood_name = neighborhood_name[6::]
-            if neighborhood_name == '': 
-                neighborhood_name ="מרכז מזרחי"   
+            raise Exception("Failure in 'scrape_neighborhood' method!")
+        neighborhood_name = get_neighborhood_name(neighborhoods_buttons_list[idx].text, idx)
         # If there are no more neighborhoods, return None
         if self.is_button_empty(neighborhood_name):
             return None
@@ -174,63 +308,61 @@ class NadlanEnvironmentScraper(object):
         try:
             # We click on the "מה בסביבה" button to gain acessess to the
             # environmental information of the current neighborhood
-            time.sleep(2)
-            environmental_info_button = self.wait().until(EC.presence_of_element_located((By.CSS_SELECTOR,'a.mwa-top-bar__mwa')))
+            environmental_info_button = self.waiter.wait_for_elements('a.mwa-top-bar__mwa', label="environmental_info_button")[0]
             self.action.click(environmental_info_button).perform()
             #self.action.double_click(environmental_info_button).perform()
             # The data is inside an inner HTML, which is inside another iframe.
             # We just tell the driver to focus on the desired iframe
-            iframe = self.wait().until(EC.presence_of_all_elements_located((By.CSS_SELECTOR,'iframe')))[1]
+            iframe = self.waiter.wait_for_elements('iframe', label="environment_iframe", min_count=2)[1]
             self.environment_driver.switch_to.frame(iframe)
             self.collect_environmental_data(city_name, neighborhood_name)
         except:
             raise Exception("Failure in 'scrape_environmental_data' method!") 
 
     # For each valid valid environmental information we collect its data
+    # (we wait until all the iframe's data bindings are present, instead of a fixed sleep,
+    # and then pull all of their text with a single script call)
     def collect_environmental_data(self, city_name: str, neighborhood_name: str) -> None:
-        time.sleep(10)
         try:
+            self.waiter.wait_for_elements('b.ng-binding', label="collect_environmental_data", min_count=12)
+            self.waiter.wait_for_elements('div.mwa-cols__item-title.ng-binding', label="collect_environmental_data")
+            environmental_data = self.environment_driver.execute_script(EXTRACT_ENVIRONMENTAL_DATA_SCRIPT)
             self.environment_dict["City"].append(city_name)
             self.environment_dict["Neighborhood"].append(neighborhood_name)
-            self.collect_education_related_data()
-            public_buildings_and_green_areas_list = self.wait().until(EC.presence_of_all_elements_located((By.CSS_SELECTOR,'b.ng-binding')))
+            self.collect_education_related_data(environmental_data["education"])
+            public_buildings_and_green_areas_list = environmental_data["public_buildings_and_green_areas"]
             self.collect_green_areas_related_data(public_buildings_and_green_areas_list[5:9])
-            self.collect_public_buildings_related_data(public_buildings_and_green_areas_list[9:])
+            self.collect_public_buildings_related_data(public_buildings_and_green_areas_list[9:]
+                                                       + environmental_data["public_building_average_distance"])
         except:
             raise Exception("Failure in 'collect_environmental_data' method!")
             
-    def collect_education_related_data(self) -> None:
-        data_list = self.wait().until(EC.presence_of_all_elements_located((By.CSS_SELECTOR,'div.mwa-education__item-title.ng-binding')))
+    def collect_education_related_data(self, data_list: list[str]) -> None:
         for data, key in list(zip(data_list, self.education_keys_list)):
-            self.environment_dict[key].append(data.text)
+            self.environment_dict[key].append(data)
 
-    def collect_green_areas_related_data(self, data_list: list[WebElement]) -> None:
+    def collect_green_areas_related_data(self, data_list: list[str]) -> None:
         for data, key in list(zip(data_list, self.green_areas_keys_list)):
-            self.environment_dict[key].append(data.text)
+            self.environment_dict[key].append(data)
     
-    def collect_public_buildings_related_data(self, data_list: list[WebElement]) -> None:
-        data_list.append(self.wait().until(EC.presence_of_element_located((By.CSS_SELECTOR,'div.mwa-cols__item-title.ng-binding'))))
+    def collect_public_buildings_related_data(self, data_list: list[str]) -> None:
         for data, key in list(zip(data_list, self.public_buildings_keys_list)):
-            self.environment_dict[key].append(data.text)
+            self.environment_dict[key].append(data)
         
     # For the page to contain table data of neighborhoods and not streets
     def display_neighborhood_table(self) -> None:
-        time.sleep(2)
         try:
-            neighborhoods_button = self.wait().until(EC.presence_of_all_elements_located((By.TAG_NAME,"button")))[10]
+            neighborhoods_button = self.waiter.wait_for_elements("button", label="display_neighborhood_table", min_count=11)[10]
             neighborhoods_button.click()
         except:
             raise Exception("Failure in 'display_neighborhood_table' method!")
 
     def get_number_of_neighborhoods(self) -> int:
         try:
-            time.sleep(2)
-            neighborhoods_buttons_list = self.wait().until(EC.presence_of_all_elements_located((By.CSS_SELECTOR,"button.text")))
+            neighborhoods_buttons_list = self.waiter.wait_for_elements("button.text", label="get_number_of_neighborhoods")
         except:
-            neighborhoods_buttons_list = [] # ignore
             raise Exception("Failure in 'get_number_of_neighborhoods' method!")
-        finally:
-            return len(neighborhoods_buttons_list)
+        return len(neighborhoods_buttons_list)
 
     # Check if the text in a given button element is empty
     def is_button_empty(self, button_text: str) -> bool:
@@ -244,17 +376,21 @@ class NadlanEnvironmentScraper(object):
     # Click on a given button element and wait for it to reload
     def enter_page(self, button: WebElement) -> None:
         button.click()
+        self.waiter.wait_for_page_change(button, label="enter_page")
 
     # Go back to the previous page and wait for it to reload
     def exit_to_the_previous_page(self) -> None:
         self.environment_driver.back()
         self.environment_driver.refresh()
 
-    # Store the contents of the nadlan_dict dictionary in the environment_df dataframe
-    def store_the_dict_in_the_df(self) -> None:
-        self.environment_df = self.environment_df.append(pd.DataFrame.from_dict(self.environment_dict))
+    # Store the contents of the environment_dict dictionary in our output sink
+    # (which appends them to the output file once its buffer is full)
+    def store_the_dict_in_the_sink(self) -> None:
+        self.environment_sink.write(self.environment_dict)
 
     # Where we close the web driver and end the crawling
     def close_environment_driver(self) -> None:
+        # Don't lose the rows that are still waiting in the sink's buffer
+        self.environment_sink.close()
         self.environment_driver.close()
         print("Finished Crawling!")
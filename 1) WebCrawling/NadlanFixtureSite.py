@@ -0,0 +1,285 @@
+"""
+__Brief Summary__:
+A local stand-in copy of the "https://www.nadlan.gov.il/Pricing" page.
+It serves (from a background thread) a single HTML page that mimics the
+parts of the real website our scrapers rely on:
+
+    1.  A toolbar of plain buttons, where button index 10 is the
+        "display the neighborhoods table" button.
+
+    2.  The cities and neighborhoods 'button.text' lists
+        (including the same name prefixes the real website has).
+
+    3.  The housing units table, built out of 'div.tableCol' cells
+        (10 cells per housing unit), that keeps loading more rows
+        as we scroll to the bottom of the page.
+
+    4.  The "מה בסביבה" button and the environment iframe.
+
+The data itself is random (but reproducible by a seed), so we can measure
+how the crawlers scale without touching the real website.
+"""
+
+import json
+import random
+from datetime import datetime
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+CITY_NAMES = ["חולון", "אילת", "אופקים", "הרצליה", "נתניה", "חיפה", "באר שבע", "רעננה",
+              "אשדוד", "רחובות", "בת ים", "כפר סבא", "עפולה", "טבריה", "נהריה", "דימונה"]
+NEIGHBORHOOD_NAMES = ["מרכז העיר", "בן גוריון", "נווה עוז", "רמת אביב", "שכונת הפרחים",
+                      "גני העיר", "נאות אשכול", "אזור תעשיה", "קרית שרת", "נווה ים"]
+STREET_NAMES = ["הרצל", "ויצמן", "סוקולוב", "ז'בוטינסקי", "רוטשילד", "בגין", "העצמאות", "הנביאים"]
+PROPERTY_TYPES = ["דירה בבית קומות", "בית פרטי", "קוטג' טורי", "דירת גן", "דירת גג", "דופלקס"]
+FLOORS = ["קרקע", "ראשונה", "שניה", "שלישית", "רביעית", "חמישית", "קומה 7", "ראשונה, שניה"]
+
+# The real website shows the cities and the first neighborhood with a prefix,
+# which our scrapers slice away (see 'scrape_city' and 'scrape_neighborhood')
+CITY_BUTTON_PREFIX = "ישוב -- "
+FIRST_NEIGHBORHOOD_PREFIX = "שכונה "
+
+PRICING_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="he" dir="rtl">
+<head><meta charset="utf-8"><title>Nadlan Pricing (Fixture)</title></head>
+<body>
+<div id="toolbar"></div>
+<a class="mwa-top-bar__mwa" href="javascript:void(0)" onclick="showEnvironment()">מה בסביבה</a>
+<div id="content"></div>
+<div id="environment"></div>
+<script>
+const SITE_DATA = __SITE_DATA__;
+const PAGE_SIZE = __PAGE_SIZE__;
+const LOAD_DELAY_MS = __LOAD_DELAY_MS__;
+let loadedRows = 0;
+let loading = false;
+
+function route() {
+    const params = new URLSearchParams(location.hash.slice(1));
+    return {city: params.get("c"), neighborhood: params.get("n")};
+}
+
+function renderToolbar() {
+    const toolbar = document.getElementById("toolbar");
+    for (let i = 0; i < 11; i++) {
+        const button = document.createElement("button");
+        button.textContent = i === 10 ? "שכונות" : "כפתור " + i;
+        toolbar.appendChild(button);
+    }
+}
+
+function renderButtons(names, prefixes, onClick) {
+    const content = document.getElementById("content");
+    names.forEach((name, idx) => {
+        const button = document.createElement("button");
+        button.className = "text";
+        button.textContent = (prefixes[idx] || "") + name;
+        button.onclick = () => onClick(idx);
+        content.appendChild(button);
+    });
+}
+
+function appendRows(rows) {
+    const content = document.getElementById("content");
+    rows.forEach(row => row.forEach(cell => {
+        const col = document.createElement("div");
+        col.className = "tableCol";
+        col.textContent = cell;
+        content.appendChild(col);
+    }));
+    // Make sure the page is always taller than the window while there are rows left to load
+    document.body.style.minHeight = (window.innerHeight + 40 * loadedRows) + "px";
+}
+
+function loadMoreRows() {
+    const {city, neighborhood} = route();
+    const rows = SITE_DATA[city].neighborhoods[neighborhood].rows;
+    if (loading || loadedRows >= rows.length) return;
+    loading = true;
+    setTimeout(() => {
+        const page = rows.slice(loadedRows, loadedRows + PAGE_SIZE);
+        loadedRows += page.length;
+        appendRows(page);
+        loading = false;
+    }, LOAD_DELAY_MS);
+}
+
+function showEnvironment() {
+    const {city, neighborhood} = route();
+    if (city === null || neighborhood === null) return;
+    const environment = SITE_DATA[city].neighborhoods[neighborhood].environment;
+    const container = document.getElementById("environment");
+    container.innerHTML = "";
+    container.appendChild(document.createElement("iframe"));
+    const iframe = document.createElement("iframe");
+    iframe.srcdoc = environment;
+    container.appendChild(iframe);
+}
+
+function render() {
+    const {city, neighborhood} = route();
+    document.getElementById("content").innerHTML = "";
+    document.getElementById("environment").innerHTML = "";
+    loadedRows = 0;
+    if (city === null) {
+        renderButtons(SITE_DATA.map(c => c.name), SITE_DATA.map(() => "__CITY_BUTTON_PREFIX__"),
+                      idx => { location.hash = "c=" + idx; });
+    } else if (neighborhood === null) {
+        renderButtons(SITE_DATA[city].neighborhoods.map(n => n.name), ["__FIRST_NEIGHBORHOOD_PREFIX__"],
+                      idx => { location.hash = "c=" + city + "&n=" + idx; });
+    } else {
+        loadMoreRows();
+    }
+}
+
+window.addEventListener("scroll", () => {
+    if (route().neighborhood !== null &&
+        window.innerHeight + window.scrollY >= document.body.scrollHeight - 10) {
+        loadMoreRows();
+    }
+});
+window.addEventListener("hashchange", render);
+renderToolbar();
+render();
+</script>
+</body>
+</html>
+"""
+
+ENVIRONMENT_IFRAME_TEMPLATE = """<html lang="he" dir="rtl"><body>
+<div class="mwa-education__item-title ng-binding">{schools} בתי ספר</div>
+<div class="mwa-education__item-title ng-binding">{kindergartens} גני ילדים ומעונות</div>
+<div class="mwa-education__item-title ng-binding">{non_formal} מוסדות חינוך בלתי פורמלי</div>
+<div class="mwa-education__item-title ng-binding">{education_distance} מטר</div>
+<b class="ng-binding">{schools}</b><b class="ng-binding">{kindergartens}</b><b class="ng-binding">{non_formal}</b>
+<b class="ng-binding">{education_distance}</b><b class="ng-binding">-</b>
+<b class="ng-binding">{green_areas:,} מ"ר</b>
+<b class="ng-binding">{parks}</b>
+<b class="ng-binding">{green_distance} מטר</b>
+<b class="ng-binding">{parks_distance} מטר</b>
+<b class="ng-binding">{public_institutions} מוסדות ציבור</b>
+<b class="ng-binding">{community_institutions} מוסדות קהילתיים</b>
+<b class="ng-binding">{religious_institutions} מוסדות דת</b>
+<div class="mwa-cols__item-title ng-binding">{public_distance} מ״ר</div>
+</body></html>
+"""
+
+
+class NadlanFixtureSite(object):
+    def __init__(self, num_of_cities: int = 4, num_of_neighborhoods: int = 3,
+                 num_of_housing_units: int = 60, page_size: int = 30,
+                 load_delay_ms: int = 300, port: int = 0, seed: int = 0) -> None:
+        # The size of the fake website
+        self.num_of_cities = num_of_cities
+        self.num_of_neighborhoods = num_of_neighborhoods
+        self.num_of_housing_units = num_of_housing_units
+
+        # How many housing units are loaded on each scroll, and how long it takes
+        self.page_size = page_size
+        self.load_delay_ms = load_delay_ms
+
+        # Where we serve the page from (port 0 means any free port)
+        self.port = port
+        self.random = random.Random(seed)
+        self.site_data = self.generate_site_data()
+        self.server = None
+        self.server_thread = None
+
+    # The url the scrapers should use as their 'crawling_target_url'
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/Pricing"
+
+    # Create the cities -> neighborhoods -> housing units data of the page
+    def generate_site_data(self) -> list[dict]:
+        site_data = []
+        for city_num in range(self.num_of_cities):
+            city_name = CITY_NAMES[city_num % len(CITY_NAMES)] + ("" if city_num < len(CITY_NAMES) else f" {city_num}")
+            neighborhoods = []
+            for neighborhood_num in range(self.num_of_neighborhoods):
+                neighborhoods.append({
+                    "name": NEIGHBORHOOD_NAMES[neighborhood_num % len(NEIGHBORHOOD_NAMES)]
+                            + ("" if neighborhood_num < len(NEIGHBORHOOD_NAMES) else f" {neighborhood_num}"),
+                    "rows": self.generate_housing_units(),
+                    "environment": self.generate_environment()
+                })
+            site_data.append({"name": city_name, "neighborhoods": neighborhoods})
+        return site_data
+
+    # The housing units of a neighborhood, from the newest sale to the oldest one (like the real website)
+    def generate_housing_units(self) -> list[list[str]]:
+        rows = [self.generate_housing_unit() for _ in range(self.num_of_housing_units)]
+        return sorted(rows, key=lambda row: datetime.strptime(row[0], '%d.%m.%Y'), reverse=True)
+
+    # A single housing unit, as the 10 cells of its table row
+    def generate_housing_unit(self) -> list[str]:
+        sale_date = f"{self.random.randint(1, 28):02d}.{self.random.randint(1, 12):02d}.{self.random.randint(2015, 2022)}"
+        address = f"{self.random.choice(STREET_NAMES)} {self.random.randint(1, 120)}"
+        return [
+            sale_date,
+            address,
+            "",
+            self.random.choice(PROPERTY_TYPES),
+            str(self.random.choice([2, 3, 3.5, 4, 4.5, 5, 6])),
+            self.random.choice(FLOORS),
+            str(self.random.randint(35, 250)),
+            f"{self.random.randint(600, 6000) * 1000:,}",
+            "",
+            ""
+        ]
+
+    # The inner HTML of the "מה בסביבה" iframe
+    def generate_environment(self) -> str:
+        return ENVIRONMENT_IFRAME_TEMPLATE.format(
+            schools=self.random.randint(0, 8),
+            kindergartens=self.random.randint(0, 30),
+            non_formal=self.random.randint(0, 6),
+            education_distance=self.random.randint(200, 1500),
+            green_areas=self.random.randint(1000, 90000),
+            parks=self.random.randint(0, 5),
+            green_distance=self.random.randint(100, 800),
+            parks_distance=self.random.randint(100, 800),
+            public_institutions=self.random.randint(0, 15),
+            community_institutions=self.random.randint(0, 40),
+            religious_institutions=self.random.randint(0, 10),
+            public_distance=self.random.randint(50, 600)
+        )
+
+    # The full HTML of the Pricing page, with the site data embedded in it
+    def render_pricing_page(self) -> str:
+        site_data_json = json.dumps(self.site_data, ensure_ascii=False).replace("</", "<\\/")
+        return (PRICING_PAGE_TEMPLATE
+                .replace("__SITE_DATA__", site_data_json)
+                .replace("__PAGE_SIZE__", str(self.page_size))
+                .replace("__LOAD_DELAY_MS__", str(self.load_delay_ms))
+                .replace("__CITY_BUTTON_PREFIX__", CITY_BUTTON_PREFIX)
+                .replace("__FIRST_NEIGHBORHOOD_PREFIX__", FIRST_NEIGHBORHOOD_PREFIX))
+
+    # Start serving the page on a background thread, and return its url
+    def start(self) -> str:
+        pricing_page = self.render_pricing_page().encode("utf-8")
+
+        class PricingPageHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(pricing_page)))
+                self.end_headers()
+                self.wfile.write(pricing_page)
+
+            # Keep the crawling output clean
+            def log_message(self, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", self.port), PricingPageHandler)
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+        return self.url
+
+    # Stop serving the page
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
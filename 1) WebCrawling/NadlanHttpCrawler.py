@@ -0,0 +1,279 @@
+"""
+__Brief Summary__:
+A browserless backend for our crawl.
+The Pricing page fills its tables from background data requests, so instead of
+driving a full Chrome session and clicking buttons, the class calls these data
+endpoints directly with an asyncio HTTP client (aiohttp):
+
+    1.  All the requests share one pooled set of keep-alive connections.
+
+    2.  At most 'max_concurrency' requests are in flight at the same time,
+        and at most 'requests_per_second' requests are sent every second.
+
+    3.  Failed requests (connection errors, 429 and 5xx responses)
+        are retried with an exponential backoff. Other 4xx responses fail right away.
+
+    4.  A neighborhood (or a city) that keeps failing is recorded in 'failures_list'
+        and skipped, and the rest of the crawl goes on.
+
+The rows are built with exactly the same columns (and the same raw text formats)
+as NadlanScraper and NadlanEnvironmentScraper, and are written through the same
+output sinks, so everything downstream works the same way.
+
+Every response can also be recorded into a JSON file, which NadlanMockApiServer
+can later replay --> the crawler can be tested offline against a local mock server.
+
+NOTE: The endpoints paths and the response field names below are the ones the
+Pricing page used when we recorded it. If the website changes, only
+'NADLAN_API_ENDPOINTS' and the '*_FIELDS' dictionaries need to be updated.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import numpy as np
+import aiohttp
+from NadlanColumns import HOUSING_UNITS_COLUMNS, ENVIRONMENT_COLUMNS
+from NadlanSink import NadlanSink, create_sink
+
+# The typed values parsing is shared with the data handling stage
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "2) DataHandling"))
+from NadlanNormalizer import normalize_housing_units
+
+# The data endpoints of the Pricing page: (HTTP method, path)
+NADLAN_API_ENDPOINTS = {
+    "cities": ("GET", "/Nadlan.REST/Main/GetSettlementsList"),
+    "neighborhoods": ("POST", "/Nadlan.REST/Main/GetNeighborhoodsListBySettlement"),
+    "deals": ("POST", "/Nadlan.REST/Main/GetAssestAndDeals"),
+    "environment": ("POST", "/Nadlan.REST/Main/GetNeighborhoodEnvironment")
+}
+
+# Which field of a deal (housing unit) response holds the text of each housing units column
+DEAL_FIELDS = {
+    "Sale_Date": "DEALDATE",
+    "Property_Type": "DEALNATUREDESCRIPTION",
+    "Rooms": "ASSETROOMNUM",
+    "Floor": "FLOORNO",
+    "Square_Meter": "DEALNATURE",
+    "Price": "DEALAMOUNT"
+}
+DEAL_ADDRESS_FIELD = "DISPLAYADRESS"
+
+# Which field of the environment response holds the text of each environment column
+ENVIRONMENT_FIELDS = {
+    "Schools": "SchoolsText",
+    "Kindergartens_And_Dormitories": "KindergartensText",
+    "Non_Formal_Educational_Institutions": "NonFormalEducationText",
+    "Education_Average_Distance": "EducationDistanceText",
+    "Green_Areas_SQM": "GreenAreasText",
+    "Parks_And_Gardens": "ParksText",
+    "Green_Areas_Average_Distance": "GreenAreasDistanceText",
+    "Parks_And_Gardens_Average_Distance": "ParksDistanceText",
+    "Public_Institutions": "PublicInstitutionsText",
+    "Community_Institutions": "CommunityInstitutionsText",
+    "Religious_Institutions": "ReligiousInstitutionsText",
+    "Public_Building_Average_Distance": "PublicBuildingDistanceText"
+}
+
+
+# Makes sure we don't send more than 'requests_per_second' requests every second
+class RateLimiter(object):
+    def __init__(self, requests_per_second: float) -> None:
+        self.interval = 1.0 / requests_per_second
+        self.next_request_time = 0.0
+        self.lock = asyncio.Lock()
+
+    # Wait for the next free request slot
+    async def acquire(self) -> None:
+        async with self.lock:
+            now = asyncio.get_running_loop().time()
+            wait_time = self.next_request_time - now
+            self.next_request_time = max(now, self.next_request_time) + self.interval
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+
+
+class NadlanHttpCrawler(object):
+    def __init__(self, base_url: str = "https://www.nadlan.gov.il",
+                 output_file_name: str = "Test.csv",
+                 environment_output_file_name: str = "AllCitiesEnvironment5.csv",
+                 max_concurrency: int = 8, requests_per_second: float = 10.0,
+                 max_connections: int = 8, recorded_responses_file_name: str | None = None,
+                 nadlan_sink: NadlanSink | None = None, environment_sink: NadlanSink | None = None,
+                 typed_output: bool = False) -> None:
+        # Where the data endpoints are (the real website or a local mock server)
+        self.base_url = base_url.rstrip("/")
+
+        # How many requests may be in flight at the same time, how many we send every second,
+        # and how many keep-alive connections our pool holds
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.max_connections = max_connections
+
+        # How many times we retry a failed request, and how long we wait before the first retry
+        # NOTE: Be advised, these are CONSTANT variables!
+        self.MAX_RETRIES: int = 3
+        self.RETRY_BACKOFF_SECONDS: float = 1.0
+
+        # Our output containers --> the same sinks (and columns) the Selenium scrapers use
+        # (with 'typed_output', the housing units numeric and date columns are written already typed)
+        self.nadlan_sink = create_sink(output_file_name, HOUSING_UNITS_COLUMNS,
+                                       transform=normalize_housing_units if typed_output else None) \
+            if nadlan_sink is None else nadlan_sink
+        self.environment_sink = create_sink(environment_output_file_name, ENVIRONMENT_COLUMNS, flush_every_rows=50) \
+            if environment_sink is None else environment_sink
+
+        # If given, every response is recorded into this file (so NadlanMockApiServer can replay it)
+        self.recorded_responses_file_name = recorded_responses_file_name
+        self.recorded_responses_list: list[dict] = []
+
+        # The cities and neighborhoods we gave up on: [{"City", "Neighborhood", "Error"}, ...]
+        self.failures_list: list[dict] = []
+
+        # Created inside the event loop (see 'main_crawler')
+        self.session = None
+        self.semaphore = None
+        self.rate_limiter = None
+
+    # Send a single request to one of the data endpoints and return its JSON response
+    async def request(self, endpoint_name: str, body: dict | None = None) -> dict | list:
+        method, path = NADLAN_API_ENDPOINTS[endpoint_name]
+        for attempt in range(self.MAX_RETRIES + 1):
+            try:
+                async with self.semaphore:
+                    await self.rate_limiter.acquire()
+                    async with self.session.request(method, self.base_url + path, json=body) as response:
+                        if response.status == 429 or response.status >= 500:
+                            raise aiohttp.ClientResponseError(response.request_info, response.history,
+                                                              status=response.status)
+                        # Any other client error (like 400 or 404) won't be fixed by a retry
+                        # (it is not an aiohttp.ClientError, so it goes right past our retries)
+                        if response.status >= 400:
+                            raise Exception(f"Failure in '{endpoint_name}' request (status {response.status})")
+                        response_json = await response.json(content_type=None)
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
+                if attempt == self.MAX_RETRIES:
+                    raise Exception(f"Failure in '{endpoint_name}' request ({exception})")
+                await asyncio.sleep(self.RETRY_BACKOFF_SECONDS * 2 ** attempt)
+        if self.recorded_responses_file_name is not None:
+            self.recorded_responses_list.append({"method": method, "path": path, "body": body, "response": response_json})
+        return response_json
+
+    async def get_cities(self) -> list[dict]:
+        return await self.request("cities")
+
+    async def get_neighborhoods(self, city: dict) -> list[dict]:
+        return await self.request("neighborhoods", {"ObjectID": city["ObjectID"]})
+
+    # Get all the deals of a neighborhood, page after page, until the last page
+    async def get_deals(self, neighborhood: dict) -> list[dict]:
+        deals_list = []
+        page_num = 1
+        while True:
+            deals_page = await self.request("deals", {
+                "ObjectID": neighborhood["ObjectID"],
+                "CurrentLavel": 3,
+                "PageNo": page_num,
+                "OrderByFilled": "DEALDATETIME",
+                "OrderByDescending": True
+            })
+            deals_list.extend(deals_page["AllResults"])
+            if deals_page["IsLastPage"] or len(deals_page["AllResults"]) == 0:
+                return deals_list
+            page_num += 1
+
+    async def get_environment(self, neighborhood: dict) -> dict:
+        return await self.request("environment", {"ObjectID": neighborhood["ObjectID"]})
+
+    # Turn a deal response into a housing units row (the same texts NadlanScraper.collect_data collects)
+    def deal_to_row(self, city_name: str, neighborhood_name: str, deal: dict) -> dict:
+        row = {key: str(deal.get(field) or "").strip() for key, field in DEAL_FIELDS.items()}
+        row["City"] = city_name
+        row["Neighborhood"] = neighborhood_name
+        address = str(deal.get(DEAL_ADDRESS_FIELD) or "").strip()
+        if len(address.split()) > 1:
+            row["Street"], row["Building_Number"] = address.rsplit(' ', 1)
+        elif len(address.split()) == 1:
+            row["Street"], row["Building_Number"] = address, np.nan
+        else:
+            # If there is no address for the current apartment record
+            # we will insert np.nan instead
+            row["Street"], row["Building_Number"] = np.nan, np.nan
+        return row
+
+    # Turn an environment response into an environment row (the same texts NadlanEnvironmentScraper collects)
+    def environment_to_row(self, city_name: str, neighborhood_name: str, environment: dict) -> dict:
+        row = {key: str(environment.get(field) or "").strip() for key, field in ENVIRONMENT_FIELDS.items()}
+        row["City"] = city_name
+        row["Neighborhood"] = neighborhood_name
+        return row
+
+    # Hand a list of rows over to the given sink (as a data dictionary, in the sink's columns order)
+    def store_rows_in_the_sink(self, sink: NadlanSink, rows_list: list[dict]) -> None:
+        sink.write({key: [row[key] for row in rows_list] for key in sink.columns})
+
+    # Give up on a city (or on one of its neighborhoods), and go on with the rest of the crawl
+    def record_failure(self, city_name: str, neighborhood_name: str | None, exception: Exception) -> None:
+        self.failures_list.append({"City": city_name, "Neighborhood": neighborhood_name, "Error": str(exception)})
+        print(f"Giving up on {city_name if neighborhood_name is None else f'{neighborhood_name}, {city_name}'} ({exception})")
+
+    # Collect both the deals and the environment data of a single neighborhood
+    async def crawl_neighborhood(self, city_name: str, neighborhood: dict) -> None:
+        neighborhood_name = neighborhood["Name"]
+        try:
+            deals_list, environment = await asyncio.gather(self.get_deals(neighborhood),
+                                                           self.get_environment(neighborhood))
+        except Exception as exception:
+            self.record_failure(city_name, neighborhood_name, exception)
+            return
+        self.store_rows_in_the_sink(self.nadlan_sink,
+                                    [self.deal_to_row(city_name, neighborhood_name, deal) for deal in deals_list])
+        self.store_rows_in_the_sink(self.environment_sink,
+                                    [self.environment_to_row(city_name, neighborhood_name, environment)])
+        print(f"collected data of {len(deals_list)} housing units in {neighborhood_name}, {city_name}")
+
+    async def crawl_city(self, city: dict) -> None:
+        try:
+            neighborhoods_list = await self.get_neighborhoods(city)
+        except Exception as exception:
+            self.record_failure(city["Name"], None, exception)
+            return
+        # (every neighborhood handles its own failure, so one failed neighborhood doesn't cancel the others)
+        await asyncio.gather(*[self.crawl_neighborhood(city["Name"], neighborhood) for neighborhood in neighborhoods_list])
+
+    async def crawl(self, city_indices: list[int] | None = None) -> None:
+        connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=30)
+        timeout = aiohttp.ClientTimeout(total=60)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            self.session = session
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+            self.rate_limiter = RateLimiter(self.requests_per_second)
+            cities_list = await self.get_cities()
+            if city_indices is not None:
+                cities_list = [cities_list[idx] for idx in city_indices]
+            await asyncio.gather(*[self.crawl_city(city) for city in cities_list])
+
+    # Crawl the given cities (by their index in the cities list, all of them by default)
+    def main_crawler(self, city_indices: list[int] | None = None) -> None:
+        try:
+            asyncio.run(self.crawl(city_indices))
+        finally:
+            self.nadlan_sink.close()
+            self.environment_sink.close()
+            self.save_recorded_responses()
+        if len(self.failures_list) > 0:
+            print(f"Finished crawling, {len(self.failures_list)} cities or neighborhoods failed "
+                  f"(see 'failures_list'): {self.failures_list}")
+
+    def save_recorded_responses(self) -> None:
+        if self.recorded_responses_file_name is None:
+            return
+        with open(self.recorded_responses_file_name, "w", encoding="utf-8") as recorded_responses_file:
+            json.dump(self.recorded_responses_list, recorded_responses_file, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    crawler = NadlanHttpCrawler(recorded_responses_file_name="RecordedResponses.json")
+    crawler.main_crawler()
@@ -0,0 +1,87 @@
+"""
+__Brief Summary__:
+A local mock of the Pricing page's data endpoints.
+It replays the responses NadlanHttpCrawler recorded (see 'recorded_responses_file_name'),
+so the HTTP crawler can be run and tested offline.
+A request is answered by the recorded response of the request with the same
+method, path and JSON body, and by a 404 if there is no such recorded request.
+"""
+
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class NadlanMockApiServer(object):
+    def __init__(self, recorded_responses: str | list[dict], port: int = 0) -> None:
+        # The recorded responses can be given directly, or as the name of the file they were saved into
+        if isinstance(recorded_responses, str):
+            with open(recorded_responses, "r", encoding="utf-8") as recorded_responses_file:
+                recorded_responses = json.load(recorded_responses_file)
+        self.responses_dict = {self.get_request_key(recorded["method"], recorded["path"], recorded["body"]): recorded["response"]
+                               for recorded in recorded_responses}
+
+        # Where we serve the responses from (port 0 means any free port)
+        self.port = port
+        self.server = None
+        self.server_thread = None
+
+        # How many requests we were asked for (to check the crawler's behavior)
+        self.num_of_requests: int = 0
+
+    # The base url the crawler should use
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    # Requests are matched by their method, path and (canonical) JSON body
+    @staticmethod
+    def get_request_key(method: str, path: str, body: dict | None) -> tuple[str, str, str]:
+        return method, path, json.dumps(body, sort_keys=True)
+
+    # Start serving the recorded responses on a background thread, and return the base url
+    def start(self) -> str:
+        mock_server = self
+
+        class RecordedResponseHandler(BaseHTTPRequestHandler):
+            # Keep-alive connections, like the real website
+            protocol_version = "HTTP/1.1"
+
+            def reply(self, method: str) -> None:
+                mock_server.num_of_requests += 1
+                content_length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(content_length)) if content_length > 0 else None
+                response = mock_server.responses_dict.get(mock_server.get_request_key(method, self.path, body))
+                if response is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                response_bytes = json.dumps(response, ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(response_bytes)))
+                self.end_headers()
+                self.wfile.write(response_bytes)
+
+            def do_GET(self) -> None:
+                self.reply("GET")
+
+            def do_POST(self) -> None:
+                self.reply("POST")
+
+            # Keep the crawling output clean
+            def log_message(self, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", self.port), RecordedResponseHandler)
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+        return self.url
+
+    # Stop serving the responses
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
@@ -0,0 +1,75 @@
+"""
+__Brief Summary__:
+A cached city -> neighborhood -> url index of the Pricing page.
+Reaching a neighborhood by clicking means going back to the previous page
+(and in NadlanEnvironmentScraper also refreshing it), clicking button index 10 again
+and looking up all the 'button.text' elements again, for every single neighborhood.
+
+Instead, a one-time discovery pass (see NadlanScraper.build_navigation_index) clicks
+through all the cities and neighborhoods once, and saves the url each one of them
+leads to, together with its clean name (the name prefixes hacks are applied only there).
+Later crawls load the index from disk and jump straight to each neighborhood's url.
+"""
+
+import os
+import json
+
+# The name of the first neighborhood of Herzliya (its button has no name, see 'get_neighborhood_name')
+# NOTE: Be advised, this is a CONSTANT variable!
+NAMELESS_FIRST_NEIGHBORHOOD_NAME = "מרכז מזרחי"
+
+
+# The name of a neighborhood by the text of its button (shared by all of our scrapers).
+# The first button's text has a prefix because of the way the website is programmed,
+# and the first neighborhood of Herzliya has no name at all after it
+def get_neighborhood_name(button_text: str, idx: int) -> str:
+    if idx != 0:
+        return button_text
+    neighborhood_name = button_text[6::]
+    return NAMELESS_FIRST_NEIGHBORHOOD_NAME if neighborhood_name == '' else neighborhood_name
+
+
+class NadlanNavigationIndex(object):
+    def __init__(self, index_file_name: str = "NavigationIndex.json") -> None:
+        self.index_file_name = index_file_name
+
+        # [{"city_num", "name", "url", "neighborhoods": [{"neighborhood_num", "name", "url"}, ...]}, ...]
+        self.cities_list: list[dict] = []
+        self.load()
+
+    # Load the index from disk (if it was already built)
+    def load(self) -> None:
+        if not os.path.exists(self.index_file_name):
+            return
+        with open(self.index_file_name, "r", encoding="utf-8") as index_file:
+            self.cities_list = json.load(index_file)
+
+    def save(self) -> None:
+        # We write into a temporary file first, so a crash never leaves a broken index behind
+        with open(self.index_file_name + ".tmp", "w", encoding="utf-8") as index_file:
+            json.dump(self.cities_list, index_file, ensure_ascii=False, indent=1)
+        os.replace(self.index_file_name + ".tmp", self.index_file_name)
+
+    def is_empty(self) -> bool:
+        return len(self.cities_list) == 0
+
+    def has_city(self, city_num: int) -> bool:
+        return any(city["city_num"] == city_num for city in self.cities_list)
+
+    # Add a discovered city (its neighborhoods are added by 'add_neighborhood')
+    def add_city(self, city_num: int, city_name: str, city_url: str) -> None:
+        self.cities_list.append({"city_num": city_num, "name": city_name, "url": city_url, "neighborhoods": []})
+
+    def add_neighborhood(self, city_num: int, neighborhood_num: int, neighborhood_name: str, neighborhood_url: str) -> None:
+        city = self.get_city(city_num)
+        city["neighborhoods"].append({"neighborhood_num": neighborhood_num, "name": neighborhood_name, "url": neighborhood_url})
+
+    def get_city(self, city_num: int) -> dict:
+        for city in self.cities_list:
+            if city["city_num"] == city_num:
+                return city
+        raise KeyError(f"City {city_num} is not in the navigation index")
+
+    # The discovered cities, out of the given cities indices (in their given order)
+    def get_cities(self, city_indices: list[int]) -> list[dict]:
+        return [self.get_city(city_num) for city_num in city_indices if self.has_city(city_num)]
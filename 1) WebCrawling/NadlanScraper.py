@@ -15,7 +15,6 @@ everytime the dictionary as reached 1 MB and also once again
 at the end of the code.
 """
 
-import pandas as pd
 import numpy as np
 import sys
 from selenium import webdriver
@@ -24,33 +23,127 @@ from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.wait import WebDriverWait 
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException
 from selenium.common.exceptions import StaleElementReferenceException
+import os
 import time
+from datetime import datetime
+from typing import Callable
+from NadlanSink import NadlanSink, create_sink
+from CrawlJournal import CrawlJournal
+from NadlanWaiter import NadlanWaiter
+from NadlanColumns import HOUSING_UNITS_COLUMNS
+from NadlanNavigationIndex import NadlanNavigationIndex, get_neighborhood_name
+from SaleDateWatermarks import SaleDateWatermarks
+from CrawlMetrics import CrawlMetrics
+
+# The typed values parsing is shared with the data handling stage
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "2) DataHandling"))
+from NadlanNormalizer import normalize_housing_units, parse_sale_date
+
+# Returns the text of all the 'div.tableCol' cells in the page, already grouped into
+# housing units rows (10 cells per row) --> a single WebDriver round trip per neighborhood
+EXTRACT_HOUSING_UNITS_TABLE_SCRIPT = """
+const cells = Array.from(document.querySelectorAll('div.tableCol'), cell => cell.innerText.trim());
+const rows = [];
+for (let i = 0; i + 8 <= cells.length; i += 10) {
+    rows.push(cells.slice(i, i + 10));
+}
+return rows;
+"""
+
+# Returns the sale date (the first cell) of the last housing units row that was loaded (or null)
+LAST_LOADED_SALE_DATE_SCRIPT = """
+const cells = document.querySelectorAll('div.tableCol');
+const i = Math.floor((cells.length - 8) / 10) * 10;
+return i >= 0 ? cells[i].innerText.trim() : null;
+"""
+
+# The methods our crawl metrics time as the phases of the crawl,
+# and the methods that crawl a whole city (see CrawlMetrics.instrument)
+# NOTE: Be advised, these are CONSTANT variables!
+INSTRUMENTED_METHODS = ["build_navigation_index", "enter_city", "display_neighborhood_table", "scrape_city",
+                        "open_neighborhood", "enter_page", "scroll_to_the_bottom_of_the_page", "is_behind_the_watermark",
+                        "scrape_neighborhood_by_url", "scrape_all_housing_units", "extract_housing_units_table",
+                        "return_to_the_neighborhoods_page", "exit_to_the_previous_page", "reload_the_main_page",
+                        "store_the_dict_in_the_sink"]
+INSTRUMENTED_CITY_METHODS = ["scrape_city_by_clicking", "scrape_city_by_navigation_index"]
 
 class NadlanScraper(object):
-    def __init__(self) -> None:
-        # Where we store housing units data, before converting it
-        # into a Pandas DataFrame
+    def __init__(self, city_indices: list[int] | None = None,
+                 crawling_target_url: str = "https://www.nadlan.gov.il/Pricing",
+                 output_file_name: str = "Test.csv",
+                 nadlan_sink: NadlanSink | None = None,
+                 idle_timeout: float = 3.0,
+                 bulk_extraction: bool = True,
+                 navigation_index: NadlanNavigationIndex | None = None,
+                 typed_output: bool = False,
+                 watermarks: SaleDateWatermarks | None = None,
+                 metrics: CrawlMetrics | None = None) -> None:
+        # Where we store the housing units data of the current neighborhood,
+        # before handing it over to our output sink
         self.nadlan_dict = self.create_data_dict_keys()
 
-        # Our main Nadlan data container.
-        self.nadlan_df = pd.DataFrame(data=self.nadlan_dict)
-
         # How many cities are we going to scrape data from.
         # NOTE: Be advised, this is a CONSTANT variable!
         self.NUM_OF_CITIES: int = 80
 
+        # Which cities (by their button index) this scraper is in charge of.
+        # By default we scrape all of them, a parallel worker gets only its own shard
+        self.city_indices = list(range(self.NUM_OF_CITIES)) if city_indices is None else city_indices
+
+        # Where we crawl from (the real website or a local stand-in of it),
+        # and where we save the collected data
+        self.crawling_target_url = crawling_target_url
+        self.output_file_name = output_file_name
+
+        # Our main Nadlan data container --> appends only the new rows to the output file.
+        # With 'typed_output', the Floor, Price, Rooms, Square_Meter and Sale_Date columns
+        # are written as compact typed columns instead of the raw website strings
+        self.nadlan_sink = create_sink(output_file_name, list(self.nadlan_dict.keys()),
+                                       transform=normalize_housing_units if typed_output else None) \
+            if nadlan_sink is None else nadlan_sink
+
+        # Our progress journal --> lets a restarted crawl skip everything that was already written
+        self.crawl_journal = CrawlJournal(output_file_name + ".journal.json")
+        self.crawl_journal.attach(*self.get_output_sinks())
+
+        # How many times we retry a failed city/neighborhood before giving up on the crawl,
+        # and how long we wait before the first retry (doubled after every failure)
+        # NOTE: Be advised, these are CONSTANT variables!
+        self.MAX_RETRIES: int = 3
+        self.RETRY_BACKOFF_SECONDS: float = 10.0
+
         # Where we contain our web crawling driver
         self.nadlan_driver = self.create_nadlan_driver()
 
+        # Our wait layer --> waits only as long as each page actually needs
+        # ('idle_timeout' is how long we wait for new rows before deciding we reached the bottom of the page)
+        self.waiter = NadlanWaiter(self.nadlan_driver, timeout=60, idle_timeout=idle_timeout)
+
+        # Whether we pull the whole housing units table with a single script call (the fast way),
+        # or read the text of every table cell separately (a WebDriver round trip per cell)
+        self.bulk_extraction = bulk_extraction
+
+        # If given, we first discover the url of every neighborhood (once, it is saved to disk),
+        # and then jump straight to each neighborhood instead of clicking our way to it
+        self.navigation_index = navigation_index
+
+        # If given, this is a delta crawl --> we collect only the housing units that were sold
+        # since the latest sale date we already have of each neighborhood (see SaleDateWatermarks)
+        self.watermarks = watermarks
+
+        # If given, we record the time of every phase of the crawl, the WebDriver calls,
+        # the rows per second of every city and the failures (see CrawlMetrics)
+        self.metrics = metrics
+        if self.metrics is not None:
+            self.metrics.instrument(self, self.get_instrumented_methods(), INSTRUMENTED_CITY_METHODS,
+                                    self.nadlan_driver, self.waiter, self.get_output_sinks())
 
     # Create the WebDriver and set it on the scraping target url
     def create_nadlan_driver(self) -> WebDriver:
-        crawling_target_url = "https://www.nadlan.gov.il/Pricing"
         nadlan_driver = webdriver.Chrome()
-        nadlan_driver.get(crawling_target_url)
+        nadlan_driver.get(self.crawling_target_url)
         return nadlan_driver
 
     def wait(self) -> WebDriverWait:
@@ -59,18 +152,15 @@ class NadlanScraper(object):
 
     # Create our Nadlan dictionary --> Set the key names of the dictionary
     def create_data_dict_keys(self) -> dict[str, list]:
-        return {
-            "Sale_Date": [],
-            "City": [],
-            "Neighborhood": [],
-            "Street": [],
-            "Building_Number": [],
-            "Property_Type": [],
-            "Rooms": [],
-            "Floor": [],
-            "Square_Meter": [],
-            "Price": []
-        }
+        return {key: [] for key in HOUSING_UNITS_COLUMNS}
+
+    # All the sinks this scraper writes into (they are committed together by our journal)
+    def get_output_sinks(self) -> list[NadlanSink]:
+        return [self.nadlan_sink]
+
+    # The methods our crawl metrics time as the phases of the crawl
+    def get_instrumented_methods(self) -> list[str]:
+        return INSTRUMENTED_METHODS
 
     # Reset the data from our Nadlan dictionary
     def reset_dict_data(self) -> None:
@@ -81,45 +171,156 @@ class NadlanScraper(object):
     # 2. Neighborhood Scraper --> To gain a scraping accesses to the housing units in each Neighborhood
     # 3. Housing Units Scraper --> Where we collect the data!
     def main_scraper(self) -> None:
+        # The discovery pass (only for the cities that are not in the navigation index yet)
+        if self.navigation_index is not None:
+            self.build_navigation_index()
         # Iterate through each city
-        for city_num in range(self.NUM_OF_CITIES):
-            self.display_neighborhood_table()
-             # Enter the current city page and get its name
-            city_name = self.scrape_city(idx=city_num)
-            # Iterate through each neighborhood in the city
-            for neighborhood_num in range(self.get_number_of_neighborhoods()): # range(self.get_number_of_neighborhoods())
-                # Enter the current neighborhood page
-                neighborhood_name = self.scrape_neighborhood(idx=neighborhood_num)
-                 # If there are no more neighborhood in the city, break out of the loop
+        for city_num in self.city_indices:
+            # Skip the cities we have already finished in a previous run
+            if self.crawl_journal.is_city_finished(city_num): continue
+            if self.navigation_index is not None and self.navigation_index.has_city(city_num):
+                self.scrape_city_by_navigation_index(self.navigation_index.get_city(city_num))
+            else:
+                self.scrape_city_by_clicking(city_num)
+            self.crawl_journal.mark_city_finished(city_num)
+        # Store any remaining data & Write it to the output file
+        self.store_the_dict_in_the_sink()
+        self.reset_dict_data()
+        self.nadlan_sink.close()
+        self.waiter.print_wait_times_summary()
+        if self.metrics is not None:
+            self.metrics.finish()
+
+    # Reach each neighborhood of the city by clicking on its button (and going back to the city's page afterwards)
+    def scrape_city_by_clicking(self, city_num: int) -> None:
+        # Enter the current city page and get its name (and how many neighborhoods it has)
+        city_name, num_of_neighborhoods = self.run_with_retries(
+            lambda: self.enter_city(city_num), recover=self.reload_the_main_page)
+        # Iterate through each neighborhood in the city
+        for neighborhood_num in range(num_of_neighborhoods):
+            # Skip the neighborhoods we have already finished in a previous run
+            if self.crawl_journal.is_neighborhood_finished(city_num, neighborhood_num): continue
+            # Enter the current neighborhood page & Collect data for all the housing units in it
+            neighborhood_name = self.run_with_retries(
+                lambda: self.scrape_neighborhood_housing_units(city_name, neighborhood_num),
+                recover=lambda: self.reload_the_city_page(city_num))
+             # If there are no more neighborhood in the city, break out of the loop
+            if neighborhood_name is None: break
+            # Hand the collected data over to our output sinks (through the journal, so a flush in the middle
+            # never commits the rows of a neighborhood that is not marked as finished, or only some of its rows)
+            self.crawl_journal.store_neighborhood(city_num, neighborhood_num, self.store_the_dict_in_the_sink)
+            self.reset_dict_data()
+            # Go back to the current city's neighborhoods page
+            self.return_to_the_neighborhoods_page(city_num)
+        # Go back to the cities page
+        self.exit_to_the_previous_page()
+
+    # Jump straight to each neighborhood of the city by its url in the navigation index
+    def scrape_city_by_navigation_index(self, city: dict) -> None:
+        for neighborhood in city["neighborhoods"]:
+            # Skip the neighborhoods we have already finished in a previous run
+            if self.crawl_journal.is_neighborhood_finished(city["city_num"], neighborhood["neighborhood_num"]): continue
+            self.run_with_retries(lambda: self.scrape_neighborhood_by_url(city["name"], neighborhood),
+                                  recover=self.reload_the_main_page)
+            # Hand the collected data over to our output sinks (through the journal, see above)
+            self.crawl_journal.store_neighborhood(city["city_num"], neighborhood["neighborhood_num"],
+                                                  self.store_the_dict_in_the_sink)
+            self.reset_dict_data()
+
+    # Load the neighborhood page by its url and collect data for all the housing units in it
+    def scrape_neighborhood_by_url(self, city_name: str, neighborhood: dict) -> str:
+        self.nadlan_driver.get(neighborhood["url"])
+        self.scroll_to_the_bottom_of_the_page(self.get_sale_date_watermark(city_name, neighborhood["name"]))
+        self.scrape_all_housing_units(city_name, neighborhood["name"])
+        return neighborhood["name"]
+
+    # The discovery pass: click through the cities (that are not in the navigation index yet)
+    # and their neighborhoods once, and save the url each one of them leads to
+    def build_navigation_index(self) -> None:
+        for city_num in self.city_indices:
+            if self.navigation_index.has_city(city_num): continue
+            city_name, num_of_neighborhoods = self.run_with_retries(
+                lambda: self.enter_city(city_num), recover=self.reload_the_main_page)
+            self.navigation_index.add_city(city_num, city_name, self.nadlan_driver.current_url)
+            for neighborhood_num in range(num_of_neighborhoods):
+                neighborhood_name = self.run_with_retries(
+                    lambda: self.open_neighborhood(neighborhood_num), recover=lambda: self.reload_the_city_page(city_num))
                 if neighborhood_name is None: break
-                # Collect data for all the housing units in the current neighborhood
-                self.scrape_all_housing_units(city_name, neighborhood_name)
-                # Store the collected data to a CSV file
-                self.store_the_dict_in_the_df()
-                self.nadlan_df.to_csv("Test2.csv")
+                self.navigation_index.add_neighborhood(city_num, neighborhood_num, neighborhood_name,
+                                                       self.nadlan_driver.current_url)
+                self.return_to_the_neighborhoods_page(city_num)
+            self.exit_to_the_previous_page()
+            # We save the index after every city, so a crash doesn't lose the whole discovery pass
+            self.navigation_index.save()
+
+    # Run the given scraping step, and if it fails, recover to a known page and try it again
+    # (waiting twice as long after every failure). If it keeps failing, we end the crawl
+    # (everything that was already committed will be skipped once the crawl is restarted)
+    def run_with_retries(self, scraping_step: Callable, recover: Callable[[], None]):
+        for attempt in range(self.MAX_RETRIES + 1):
+            try:
+                return scraping_step()
+            except Exception as exception:
+                # Throw away whatever was partially collected in the failed attempt
                 self.reset_dict_data()
-                # Go back to the current city's neighborhoods page
-                self.exit_to_the_previous_page()
-                self.display_neighborhood_table()
-            # Go back to the cities page
+                if attempt == self.MAX_RETRIES:
+                    print(f"Giving up after {attempt + 1} attempts: {exception}")
+                    if self.metrics is not None:
+                        self.metrics.record_failure("give_up", exception)
+                    self.close_nadlan_driver()
+                backoff_seconds = self.RETRY_BACKOFF_SECONDS * 2 ** attempt
+                print(f"Failure ({exception}), retrying in {backoff_seconds} seconds")
+                if self.metrics is not None:
+                    self.metrics.record_failure("retry", exception, backoff_seconds)
+                time.sleep(backoff_seconds)
+                try:
+                    recover()
+                except Exception as recover_exception:
+                    print(f"Failure while recovering ({recover_exception})")
+                    if self.metrics is not None:
+                        self.metrics.record_failure("recover", recover_exception)
+
+    # Enter the given city page, and return its name and its number of neighborhoods
+    def enter_city(self, city_num: int) -> tuple[str, int]:
+        self.display_neighborhood_table()
+        city_name = self.scrape_city(idx=city_num)
+        return city_name, self.get_number_of_neighborhoods()
+
+    # Enter the given neighborhood page and collect data for all its housing units.
+    # Returns the neighborhood's name (or None if there are no more neighborhoods in the city)
+    def scrape_neighborhood_housing_units(self, city_name: str, neighborhood_num: int) -> None | str:
+        neighborhood_name = self.scrape_neighborhood(idx=neighborhood_num, city_name=city_name)
+        if neighborhood_name is not None:
+            self.scrape_all_housing_units(city_name, neighborhood_name)
+        return neighborhood_name
+
+    # Go back to the city's neighborhoods page (or reload it, if going back didn't work)
+    def return_to_the_neighborhoods_page(self, city_num: int) -> None:
+        try:
             self.exit_to_the_previous_page()
-        # Store any remaining data & Write the final data to a CSV file
-        self.store_the_dict_in_the_df()
-        self.nadlan_df.to_csv("Test.csv")
-            
+            self.display_neighborhood_table()
+        except Exception:
+            self.reload_the_city_page(city_num)
+
+    # Start over from the cities page
+    def reload_the_main_page(self) -> None:
+        self.nadlan_driver.get(self.crawling_target_url)
+
+    # Start over from the cities page, and enter the given city
+    def reload_the_city_page(self, city_num: int) -> None:
+        self.reload_the_main_page()
+        self.enter_city(city_num)
+
     # This method navigates to the specified city after clicking on the corresponding button.
     # After getting the button element for the city's neighborhoods page, it returns the city's name
     def scrape_city(self, idx: int) -> str:
         # Find all the city buttons presented in the current page
         # (we do it because everytime a new page is loaded, the previous elements become stale)
         try:
-            time.sleep(5)
             # button.text -> means that we are searching for elements with a tag name of button who stands in the 'text' css class
-            cities_buttons_list = self.wait().until(EC.presence_of_all_elements_located((By.CSS_SELECTOR,'button.text')))
+            cities_buttons_list = self.waiter.wait_for_elements('button.text', label="scrape_city", min_count=idx + 1)
         except:
-            cities_buttons_list = [] # ignore
-            print("Failure in 'scrape_city' method!")
-            self.close_nadlan_driver()
+            raise Exception("Failure in 'scrape_city' method!")
         city_name = cities_buttons_list[idx].text[8::]
         self.enter_page(cities_buttons_list[idx])
         return city_name
@@ -128,89 +329,101 @@ class NadlanScraper(object):
     # If the button is empty (indicating there are no more neighborhoods), it returns None.
     # Otherwise, it scrolls to the bottom of the page and returns a list of rows that contains the data
     # of the housing units on the neighborhood.
-    def scrape_neighborhood(self, idx: int) -> None | str:
+    # (in a delta crawl, the city's name is needed to find the neighborhood's watermark)
+    def scrape_neighborhood(self, idx: int, city_name: str | None = None) -> None | str:
+        neighborhood_name = self.open_neighborhood(idx)
+        if neighborhood_name is None:
+            return None
+        # Scroll to the bottom of the page so that all the data can get loaded onto the page
+        self.scroll_to_the_bottom_of_the_page(self.get_sale_date_watermark(city_name, neighborhood_name))
+        # Return a list of rows that contains the data of the housing units on the street
+        return neighborhood_name
+
+    # This method clicks on the specified neighborhood's button and returns the neighborhood's name
+    # (or None, if the button is empty)
+    def open_neighborhood(self, idx: int) -> None | str:
         try:
-            time.sleep(5)
             # button.text -> means that we are searching for elements with a tag name of button who stands in the 'text' css class
-            neighborhoods_buttons_list = self.wait().until(EC.presence_of_all_elements_located((By.CSS_SELECTOR,'button.text')))
+            neighborhoods_buttons_list = self.waiter.wait_for_elements('button.text', label="scrape_neighborhood", min_count=idx + 1)
         except:
-            neighborhoods_buttons_list = [] # ignore
-            print("Failure in 'scrape_neighborhood' method!")
-            self.close_nadlan_driver()
-        neighborhood_name = neighborhoods_buttons_list[idx].text
-        if idx == 0:
-            # This condition is necessary for extracting the first neighborhood name because of the way the website is programmed
-            neighborhood_name = neighborhood_name[6::]
+            raise Exception("Failure in 'scrape_neighborhood' method!")
+        neighborhood_name = get_neighborhood_name(neighborhoods_buttons_list[idx].text, idx)
         # If there are no more neighborhoods, return None
         if self.is_button_empty(neighborhood_name):
             return None
         # Go to the neighborhood page and wait for it to reload
         self.enter_page(neighborhoods_buttons_list[idx])
-        # Scroll to the bottom of the page so that all the data can get loaded onto the page
-        self.scroll_to_the_bottom_of_the_page()
-        # Return a list of rows that contains the data of the housing units on the street
         return neighborhood_name
 
     # This method iterate through each housing unit in the current neighborhood
     # and gain acessess to its data in-order to store it in our dictionary
     def scrape_all_housing_units(self, city_name: str, neighborhood_name: str) -> None:
-        data_list = self.nadlan_driver.find_elements(By.CSS_SELECTOR, "div.tableCol")
-        print("current amount of housing units (more or less) = ", len(data_list)//10)
-        count_data_collected = 0
-        for i in range(0, len(data_list), 10):
+        housing_units_rows = self.extract_housing_units_table()
+        if self.watermarks is not None:
+            # A delta crawl --> only the housing units that were sold since the neighborhood's watermark
+            housing_units_rows = self.watermarks.filter_new_rows(city_name, neighborhood_name, housing_units_rows)
+        for housing_unit_row in housing_units_rows:
             # Collect the data from the current housing unit
-            self.collect_data(data_list, i, city_name, neighborhood_name)
-            print("collected data ", count_data_collected)
-            count_data_collected += 1
+            self.collect_data(housing_unit_row, city_name, neighborhood_name)
+        print(f"collected data of {len(housing_units_rows)} housing units in {neighborhood_name}, {city_name}")
+
+    # Get the text of all the housing units table cells, grouped into rows (10 cells per housing unit)
+    def extract_housing_units_table(self) -> list[list[str]]:
+        if self.bulk_extraction:
+            return self.nadlan_driver.execute_script(EXTRACT_HOUSING_UNITS_TABLE_SCRIPT)
+        cells_text_list = [cell.text for cell in self.nadlan_driver.find_elements(By.CSS_SELECTOR, "div.tableCol")]
+        return [cells_text_list[i:i + 10] for i in range(0, len(cells_text_list) - 7, 10)]
     
     # This method scroll to the bottom of the
     # page that the web driver is set on in-order
-    # to load all the page's content
-    def scroll_to_the_bottom_of_the_page(self) -> None:
-        # Get the initial height of the page, and make first scroll
-        stuck_counter = 0
-        previous_height = self.nadlan_driver.execute_script('return document.body.scrollHeight')
-        self.nadlan_driver.execute_script('window.scrollTo(0,document.body.scrollHeight);')
-        time.sleep(2)
-        new_height = self.nadlan_driver.execute_script('return document.body.scrollHeight')
-        if previous_height == new_height: stuck_counter += 1
-        # Keep scrolling until the page stops changing height
-        # (meaning that we have reached the bottom of the page)
-        while stuck_counter < 6:
-            # Update the previous height for the next scroll
-            previous_height = new_height
-            self.nadlan_driver.execute_script('window.scrollTo(0,document.body.scrollHeight);')
-            time.sleep(2)
-            new_height = self.nadlan_driver.execute_script('return document.body.scrollHeight')
-            if previous_height == new_height: stuck_counter += 1
+    # to load all the page's content.
+    # We keep scrolling for as long as new housing units rows keep on loading
+    # (once none show up for 'idle_timeout' seconds, we have reached the bottom of the page).
+    # If a watermark is given, we stop as soon as the loaded rows fall behind it
+    # (the rows are listed from the newest sale to the oldest one)
+    def scroll_to_the_bottom_of_the_page(self, watermark: datetime | None = None) -> None:
+        stop_condition = None if watermark is None else lambda: self.is_behind_the_watermark(watermark)
+        self.waiter.scroll_until_all_rows_loaded("div.tableCol", label="scroll_to_the_bottom_of_the_page",
+                                                 stop_condition=stop_condition)
+
+    # Whether the last loaded housing unit was sold before the given watermark
+    def is_behind_the_watermark(self, watermark: datetime) -> bool:
+        last_sale_date = parse_sale_date(self.nadlan_driver.execute_script(LAST_LOADED_SALE_DATE_SCRIPT))
+        # (a sale date we can't parse is NaT, which is never behind the watermark)
+        return last_sale_date < watermark
+
+    # The latest sale date we already have of the neighborhood (None if this is not a delta crawl)
+    def get_sale_date_watermark(self, city_name: str | None, neighborhood_name: str) -> datetime | None:
+        if self.watermarks is None or city_name is None:
+            return None
+        return self.watermarks.get(city_name, neighborhood_name)
 
     # This is where we collect the data of the specified housing unit.
     # The complexity of the Nadlan web page and our  lack of knowledge of
     # the HTML language forced us to collect the data manually
 
-    def collect_data(self, housing_unit_data: list[WebElement], idx: int, city_name: str, neighborhood_name: str) -> None:
+    def collect_data(self, housing_unit_data: list[str], city_name: str, neighborhood_name: str) -> None:
         self.nadlan_dict["City"].append(city_name)
         self.nadlan_dict["Neighborhood"].append(neighborhood_name)
-        self.nadlan_dict["Sale_Date"].append(housing_unit_data[idx].text)
-        if len(housing_unit_data[idx+1].text.split()) > 0:
-            self.nadlan_dict["Street"].append((housing_unit_data[idx+1].text.strip()).rsplit(' ', 1)[0])
-            self.nadlan_dict['Building_Number'].append((housing_unit_data[idx+1].text.strip()).rsplit(' ', 1)[1])
+        self.nadlan_dict["Sale_Date"].append(housing_unit_data[0])
+        if len(housing_unit_data[1].split()) > 0:
+            self.nadlan_dict["Street"].append((housing_unit_data[1].strip()).rsplit(' ', 1)[0])
+            self.nadlan_dict['Building_Number'].append((housing_unit_data[1].strip()).rsplit(' ', 1)[1])
         else:
             # If there is no address for the current apartment record
             # we will insert np.nan instead
             self.nadlan_dict['Street'].append(np.nan)
             self.nadlan_dict['Building_Number'].append(np.nan)
-        self.nadlan_dict["Property_Type"].append(housing_unit_data[idx+3].text)
-        self.nadlan_dict["Rooms"].append(housing_unit_data[idx+4].text)
-        self.nadlan_dict["Floor"].append(housing_unit_data[idx+5].text)
-        self.nadlan_dict["Square_Meter"].append(housing_unit_data[idx+6].text)
-        self.nadlan_dict["Price"].append(housing_unit_data[idx+7].text)
+        self.nadlan_dict["Property_Type"].append(housing_unit_data[3])
+        self.nadlan_dict["Rooms"].append(housing_unit_data[4])
+        self.nadlan_dict["Floor"].append(housing_unit_data[5])
+        self.nadlan_dict["Square_Meter"].append(housing_unit_data[6])
+        self.nadlan_dict["Price"].append(housing_unit_data[7])
 
     # For the page to contain table data of neighborhoods and not streets
     def display_neighborhood_table(self) -> None:
         try:
-            time.sleep(5)
-            neighborhoods_button = self.wait().until(EC.presence_of_all_elements_located((By.TAG_NAME,"button")))[10]
+            neighborhoods_button = self.waiter.wait_for_elements("button", label="display_neighborhood_table", min_count=11)[10]
             neighborhoods_button.click()
         except:
             print("Failure in 'display_neighborhood_table' method!")
@@ -218,12 +431,10 @@ class NadlanScraper(object):
 
     def get_number_of_neighborhoods(self) -> int:
         try:
-            time.sleep(5)
-            neighborhoods_buttons_list = self.wait().until(EC.presence_of_all_elements_located((By.CSS_SELECTOR,"button.text")))
+            neighborhoods_buttons_list = self.waiter.wait_for_elements("button.text", label="get_number_of_neighborhoods")
         except:
-            print("Failure in 'get_number_of_neighborhoods' method!")
-        finally:
-            return len(neighborhoods_buttons_list)
+            raise Exception("Failure in 'get_number_of_neighborhoods' method!")
+        return len(neighborhoods_buttons_list)
 
 
     # Check if the text in a given button element is empty
@@ -234,17 +445,21 @@ class NadlanScraper(object):
     # Click on a given button element and wait for it to reload
     def enter_page(self, button: WebElement) -> None:
         button.click()
+        self.waiter.wait_for_page_change(button, label="enter_page")
 
     # Go back to the previous page and wait for it to reload
     def exit_to_the_previous_page(self) -> None:
         self.nadlan_driver.back()
 
-    # Store the contents of the nadlan_dict dictionary in the nadlan_df dataframe
-    def store_the_dict_in_the_df(self) -> None:
-        self.nadlan_df = self.nadlan_df.append(pd.DataFrame.from_dict(self.nadlan_dict))
+    # Store the contents of the nadlan_dict dictionary in our output sink
+    # (which appends them to the output file once its buffer is full)
+    def store_the_dict_in_the_sink(self) -> None:
+        self.nadlan_sink.write(self.nadlan_dict)
 
     # Where we close the web driver and end the crawling
     def close_nadlan_driver(self) -> None:
+        # Don't lose the rows that are still waiting in the sink's buffer
+        self.nadlan_sink.close()
         self.nadlan_driver.close()
         print("Finished Crawling!")
-        exit(1)
\ No newline at end of file
+        exit(1)
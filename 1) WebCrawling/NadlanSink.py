@@ -0,0 +1,155 @@
+"""
+__Brief Summary__:
+The output sinks of our scrapers.
+Instead of keeping all the collected data in one DataFrame (and rewriting the
+whole CSV file after every neighborhood), a sink buffers only the rows that
+were collected since its last flush, and appends them to the end of the output file.
+The buffer is flushed once it reaches a given amount of rows, or once a given
+amount of time has passed since the last flush (whichever comes first),
+so the memory usage stays flat during the whole crawl.
+
+There are 2 types of sinks:
+
+    1.  CsvSink --> Appends the new rows to a CSV file (the header is written only once).
+
+    2.  ParquetSink --> Appends the new rows as a new part file of a Parquet dataset directory
+        (requires the pyarrow library). An open Parquet file is unreadable until its
+        footer is written, so every flush writes a complete (and small) Parquet file instead.
+
+Every sink can report its current position in the output (and truncate the output back
+to a given position), which is what lets the CrawlJournal resume a crashed crawl
+without duplicated or half written rows.
+"""
+
+import os
+import time
+from typing import Callable
+import pandas as pd
+
+
+class NadlanSink(object):
+    def __init__(self, output_file_name: str, columns: list[str],
+                 flush_every_rows: int = 5000, flush_every_seconds: float = 60.0,
+                 transform: Callable[[pd.DataFrame], pd.DataFrame] | None = None) -> None:
+        # Where we write the data into, and the order of its columns
+        self.output_file_name = output_file_name
+        self.columns = columns
+
+        # An optional function that is applied to the rows before they are written
+        # (for example, NadlanNormalizer.normalize_housing_units for typed columns)
+        self.transform = transform
+
+        # When to flush the buffer (by its size or by the time since the last flush)
+        self.flush_every_rows = flush_every_rows
+        self.flush_every_seconds = flush_every_seconds
+
+        # The rows that were not written yet
+        self.buffer_dict = self.create_buffer_dict()
+        self.num_of_buffered_rows: int = 0
+        self.last_flush_time = time.monotonic()
+
+        # How many rows were written by this sink so far
+        self.num_of_written_rows: int = 0
+
+        # Functions to call right after every flush (for example, committing the crawl journal)
+        self.flush_listeners: list[Callable[[], None]] = []
+
+    def create_buffer_dict(self) -> dict[str, list]:
+        return {key: [] for key in self.columns}
+
+    # Add the rows of a scraper's data dictionary to the buffer,
+    # and flush the buffer if it is big enough (or old enough)
+    def write(self, data_dict: dict[str, list]) -> None:
+        for key in self.columns:
+            self.buffer_dict[key].extend(data_dict[key])
+        self.num_of_buffered_rows += len(data_dict[self.columns[0]])
+        if self.should_flush():
+            self.flush()
+
+    def should_flush(self) -> bool:
+        return self.num_of_buffered_rows >= self.flush_every_rows \
+            or time.monotonic() - self.last_flush_time >= self.flush_every_seconds
+
+    # Write all the buffered rows to the output file, and empty the buffer
+    def flush(self) -> None:
+        if self.num_of_buffered_rows > 0:
+            rows_df = pd.DataFrame(data=self.buffer_dict, columns=self.columns)
+            if self.transform is not None:
+                rows_df = self.transform(rows_df)
+            self.append_rows(rows_df)
+            self.num_of_written_rows += self.num_of_buffered_rows
+        self.buffer_dict = self.create_buffer_dict()
+        self.num_of_buffered_rows = 0
+        self.last_flush_time = time.monotonic()
+        for flush_listener in self.flush_listeners:
+            flush_listener()
+
+    def add_flush_listener(self, flush_listener: Callable[[], None]) -> None:
+        self.flush_listeners.append(flush_listener)
+
+    # Append the given rows to the end of the output file (implemented by each sink type)
+    def append_rows(self, rows_df: pd.DataFrame) -> None:
+        raise NotImplementedError
+
+    # How far the output was written so far (implemented by each sink type)
+    def get_position(self) -> int:
+        raise NotImplementedError
+
+    # Throw away everything that was written after the given position (implemented by each sink type)
+    def truncate_to(self, position: int) -> None:
+        raise NotImplementedError
+
+    # Flush whatever is left in the buffer (must be called at the end of the crawl)
+    def close(self) -> None:
+        self.flush()
+
+
+class CsvSink(NadlanSink):
+    def append_rows(self, rows_df: pd.DataFrame) -> None:
+        # We write the header only if we are the first ones to write into the file
+        write_header = not os.path.exists(self.output_file_name) or os.path.getsize(self.output_file_name) == 0
+        rows_df.to_csv(self.output_file_name, mode="a", header=write_header, index=False)
+
+    # The position of a CSV file is its size in bytes
+    def get_position(self) -> int:
+        return os.path.getsize(self.output_file_name) if os.path.exists(self.output_file_name) else 0
+
+    def truncate_to(self, position: int) -> None:
+        if os.path.exists(self.output_file_name):
+            with open(self.output_file_name, "r+b") as output_file:
+                output_file.truncate(position)
+
+
+class ParquetSink(NadlanSink):
+    # The name of the i-th part file inside the output directory
+    def get_part_file_name(self, part_num: int) -> str:
+        return os.path.join(self.output_file_name, f"part-{part_num:05d}.parquet")
+
+    def append_rows(self, rows_df: pd.DataFrame) -> None:
+        os.makedirs(self.output_file_name, exist_ok=True)
+        part_file_name = self.get_part_file_name(self.get_position())
+        # We write into a temporary file first, so a crash never leaves a broken part file behind
+        rows_df.to_parquet(part_file_name + ".tmp", index=False)
+        os.replace(part_file_name + ".tmp", part_file_name)
+
+    # The position of a Parquet dataset is the number of its part files
+    def get_position(self) -> int:
+        if not os.path.isdir(self.output_file_name):
+            return 0
+        return len([file_name for file_name in os.listdir(self.output_file_name) if file_name.endswith(".parquet")])
+
+    def truncate_to(self, position: int) -> None:
+        if not os.path.isdir(self.output_file_name):
+            return
+        for file_name in os.listdir(self.output_file_name):
+            if file_name.endswith(".tmp") or (file_name.endswith(".parquet") and int(file_name[5:10]) >= position):
+                os.remove(os.path.join(self.output_file_name, file_name))
+
+
+# Create the right sink for the given output file (by its extension)
+def create_sink(output_file_name: str, columns: list[str],
+                flush_every_rows: int = 5000, flush_every_seconds: float = 60.0,
+                transform: Callable[[pd.DataFrame], pd.DataFrame] | None = None) -> NadlanSink:
+    if output_file_name.endswith(".parquet"):
+        return ParquetSink(output_file_name, columns, flush_every_rows, flush_every_seconds, transform)
+    return CsvSink(output_file_name, columns, flush_every_rows, flush_every_seconds, transform)
@@ -0,0 +1,123 @@
+"""
+__Brief Summary__:
+The wait layer of our scrapers.
+Instead of paying a fixed 'time.sleep' before every step, the class waits only as long
+as the page actually needs:
+
+    1.  Elements --> we poll (every 0.1 seconds) until the elements we need are present,
+        and then until the page's DOM stops changing for a short "settle" period.
+        The DOM changes are watched by a MutationObserver we inject into the page.
+
+    2.  Infinite scroll --> we scroll to the bottom of the page and wait for the number
+        of table rows to grow. Once no new rows show up for 'idle_timeout' seconds,
+        we know that we have reached the bottom of the page.
+
+The class also records how much time each step actually needed,
+so we can see which pages are the slow ones.
+"""
+
+import time
+from typing import Callable
+from selenium.webdriver.chrome.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.wait import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+# Installs (once per document) a MutationObserver that keeps the time of the last DOM change
+INSTALL_MUTATION_OBSERVER_SCRIPT = """
+if (window.__nadlanLastMutation === undefined) {
+    window.__nadlanLastMutation = Date.now();
+    new MutationObserver(() => { window.__nadlanLastMutation = Date.now(); })
+        .observe(document, {childList: true, subtree: true, characterData: true});
+}
+return Date.now() - window.__nadlanLastMutation;
+"""
+
+COUNT_ELEMENTS_SCRIPT = "return document.querySelectorAll(arguments[0]).length;"
+
+
+class NadlanWaiter(object):
+    def __init__(self, driver: WebDriver, timeout: float = 60.0, poll_frequency: float = 0.1,
+                 idle_timeout: float = 3.0, settle_time: float = 0.3) -> None:
+        self.driver = driver
+
+        # How long we wait for elements before we fail, and how often we check for them
+        self.timeout = timeout
+        self.poll_frequency = poll_frequency
+
+        # How long we wait for new rows before deciding that we have reached the bottom of the page
+        self.idle_timeout = idle_timeout
+
+        # For how long the DOM must stay unchanged, for us to consider the page as loaded
+        self.settle_time = settle_time
+
+        # How much time each step actually needed: {step label: [seconds, seconds, ...]}
+        self.wait_times_dict: dict[str, list[float]] = {}
+
+    def record_wait_time(self, label: str, start_time: float) -> None:
+        self.wait_times_dict.setdefault(label, []).append(time.perf_counter() - start_time)
+
+    # Wait until the page's DOM hasn't changed for 'settle_time' seconds (or until 'idle_timeout' passes)
+    def wait_for_dom_to_settle(self) -> None:
+        try:
+            WebDriverWait(self.driver, timeout=self.idle_timeout, poll_frequency=self.poll_frequency).until(
+                lambda driver: driver.execute_script(INSTALL_MUTATION_OBSERVER_SCRIPT) >= self.settle_time * 1000)
+        except TimeoutException:
+            # The page keeps changing (animations, timers etc'), we don't wait any longer
+            pass
+
+    # Return all the elements matching the css selector, as soon as at least 'min_count' of them are present
+    # and the page has settled. Raises a TimeoutException if they didn't show up in time
+    def wait_for_elements(self, css_selector: str, label: str, min_count: int = 1) -> list[WebElement]:
+        start_time = time.perf_counter()
+        WebDriverWait(self.driver, timeout=self.timeout, poll_frequency=self.poll_frequency).until(
+            lambda driver: driver.execute_script(COUNT_ELEMENTS_SCRIPT, css_selector) >= min_count)
+        self.wait_for_dom_to_settle()
+        elements_list = self.wait_for_present_elements(css_selector)
+        self.record_wait_time(label, start_time)
+        return elements_list
+
+    def wait_for_present_elements(self, css_selector: str) -> list[WebElement]:
+        return WebDriverWait(self.driver, timeout=self.timeout, poll_frequency=self.poll_frequency).until(
+            EC.presence_of_all_elements_located((By.CSS_SELECTOR, css_selector)))
+
+    # Wait for the given element to be removed from the page (we clicked on it, and a new page is loading).
+    # Some pages reuse their elements, so if it wasn't removed after 'idle_timeout' seconds we move on
+    def wait_for_page_change(self, element: WebElement, label: str) -> None:
+        start_time = time.perf_counter()
+        try:
+            WebDriverWait(self.driver, timeout=self.idle_timeout, poll_frequency=self.poll_frequency).until(
+                EC.staleness_of(element))
+        except TimeoutException:
+            pass
+        self.record_wait_time(label, start_time)
+
+    # Keep scrolling to the bottom of the page for as long as new rows keep on loading
+    # (or until the given stop condition is met). Returns the final number of rows
+    def scroll_until_all_rows_loaded(self, row_css_selector: str, label: str,
+                                     stop_condition: Callable[[], bool] | None = None) -> int:
+        start_time = time.perf_counter()
+        num_of_rows = self.driver.execute_script(COUNT_ELEMENTS_SCRIPT, row_css_selector)
+        while True:
+            # The caller may already have all the rows it needs (see NadlanScraper's delta crawl)
+            if stop_condition is not None and stop_condition():
+                break
+            self.driver.execute_script('window.scrollTo(0,document.body.scrollHeight);')
+            try:
+                WebDriverWait(self.driver, timeout=self.idle_timeout, poll_frequency=self.poll_frequency).until(
+                    lambda driver: driver.execute_script(COUNT_ELEMENTS_SCRIPT, row_css_selector) > num_of_rows)
+            except TimeoutException:
+                # No new rows for 'idle_timeout' seconds --> we have reached the bottom of the page
+                break
+            num_of_rows = self.driver.execute_script(COUNT_ELEMENTS_SCRIPT, row_css_selector)
+        self.record_wait_time(label, start_time)
+        return num_of_rows
+
+    # Print how much time each step needed (in total, on average and at most)
+    def print_wait_times_summary(self) -> None:
+        print("Wait times summary:")
+        for label, wait_times in self.wait_times_dict.items():
+            print(f"\t{label}: {len(wait_times)} waits, total {sum(wait_times):.1f}s, "
+                  f"average {sum(wait_times) / len(wait_times):.2f}s, max {max(wait_times):.2f}s")
@@ -0,0 +1,165 @@
+"""
+__Brief Summary__:
+The class runs one of our scrapers (NadlanScraper or NadlanEnvironmentScraper)
+in parallel. It splits the cities indices into N shards, starts a worker process
+per shard (each one with its own Chrome WebDriver), and once all the workers
+are done it merges their output files (CSV or Parquet) into one deduplicated dataset.
+
+Every worker writes to its own file, so a worker that crashed (our scrapers
+exit the process on failure) doesn't take the data of the other workers with it.
+Once all the workers finished and their files were merged, the workers files (and their
+crawl journals) are deleted, so the next crawl into the same output file starts from scratch.
+If a worker crashed, they are kept, so rerunning the crawl resumes it.
+"""
+
+import os
+import time
+import shutil
+import multiprocessing
+import pandas as pd
+from NadlanScraper import NadlanScraper
+from NadlanEnvironmentScraper import NadlanEnvironmentScraper
+
+
+# The function every worker process runs: scrape the given cities with its own driver.
+# NOTE: It must be a module level function so it can be sent to the worker process
+def crawl_city_shard(scraper_class: type, city_indices: list[int], crawling_target_url: str, output_file_name: str) -> None:
+    scraper = scraper_class(city_indices=city_indices,
+                            crawling_target_url=crawling_target_url,
+                            output_file_name=output_file_name)
+    # NadlanScraper calls it 'main_scraper' while NadlanEnvironmentScraper calls it 'main_scrapper'
+    if hasattr(scraper, "main_scraper"):
+        scraper.main_scraper()
+    else:
+        scraper.main_scrapper()
+    # Close the driver without exiting (NadlanScraper.close_nadlan_driver calls exit)
+    if hasattr(scraper, "nadlan_driver"):
+        scraper.nadlan_driver.quit()
+    else:
+        scraper.environment_driver.quit()
+
+
+class ParallelCrawler(object):
+    def __init__(self, scraper_class: type = NadlanScraper, num_of_workers: int = 4,
+                 num_of_cities: int = 80,
+                 crawling_target_url: str = "https://www.nadlan.gov.il/Pricing",
+                 output_file_name: str = "Test.csv") -> None:
+        # Which scraper we run (NadlanScraper / NadlanEnvironmentScraper)
+        self.scraper_class = scraper_class
+
+        # How many worker processes (and Chrome instances) run at the same time
+        self.num_of_workers = num_of_workers
+
+        # How many cities there are in the cities page
+        self.num_of_cities = num_of_cities
+
+        self.crawling_target_url = crawling_target_url
+        self.output_file_name = output_file_name
+
+    # Split the cities indices between the workers.
+    # We deal them like cards (0, N, 2N, ...) and not in blocks, so the
+    # big cities at the top of the list don't all land on the same worker
+    def split_city_indices(self) -> list[list[int]]:
+        shards = [list(range(worker_num, self.num_of_cities, self.num_of_workers))
+                  for worker_num in range(self.num_of_workers)]
+        return [shard for shard in shards if len(shard) > 0]
+
+    # The file a given worker writes its data into
+    def get_worker_file_name(self, worker_num: int) -> str:
+        name, extension = os.path.splitext(self.output_file_name)
+        return f"{name}_worker{worker_num}{extension}"
+
+    # Start a worker process per shard, wait for all of them and merge their results.
+    # Returns the merged data (which is also written into 'output_file_name')
+    def main_crawler(self) -> pd.DataFrame:
+        start_time = time.perf_counter()
+        workers = []
+        for worker_num, city_indices in enumerate(self.split_city_indices()):
+            worker = multiprocessing.Process(
+                target=crawl_city_shard,
+                args=(self.scraper_class, city_indices, self.crawling_target_url, self.get_worker_file_name(worker_num))
+            )
+            worker.start()
+            workers.append(worker)
+
+        are_all_workers_finished = True
+        for worker_num, worker in enumerate(workers):
+            worker.join()
+            if worker.exitcode != 0:
+                are_all_workers_finished = False
+                print(f"Worker {worker_num} ended with exit code {worker.exitcode}, merging whatever it collected")
+
+        merged_df = self.merge_worker_files(len(workers))
+        if are_all_workers_finished:
+            self.remove_worker_files(len(workers))
+        else:
+            print("Kept the workers files (and their journals), rerun the crawl to resume the unfinished workers")
+        print(f"Finished crawling with {len(workers)} workers in {time.perf_counter() - start_time:.1f} seconds")
+        return merged_df
+
+    # Read the output files of all the workers, drop the duplicated rows and write one dataset
+    def merge_worker_files(self, num_of_workers: int) -> pd.DataFrame:
+        workers_df_list = []
+        for worker_num in range(num_of_workers):
+            worker_file_name = self.get_worker_file_name(worker_num)
+            if not os.path.exists(worker_file_name):
+                continue
+            if worker_file_name.endswith(".parquet"):
+                worker_df = pd.read_parquet(worker_file_name)
+            else:
+                worker_df = pd.read_csv(worker_file_name)
+            workers_df_list.append(worker_df)
+
+        if len(workers_df_list) == 0:
+            print("None of the workers collected any data!")
+            return pd.DataFrame()
+        merged_df = pd.concat(workers_df_list, ignore_index=True)
+        merged_df.drop_duplicates(inplace=True, ignore_index=True)
+        if self.output_file_name.endswith(".parquet"):
+            merged_df.to_parquet(self.output_file_name, index=False)
+        else:
+            merged_df.to_csv(self.output_file_name, index=False)
+        return merged_df
+
+    # Delete the output files of all the workers, together with their crawl journals
+    # (otherwise the next crawl into the same output file resumes their journals and skips everything)
+    def remove_worker_files(self, num_of_workers: int) -> None:
+        for worker_num in range(num_of_workers):
+            worker_file_name = self.get_worker_file_name(worker_num)
+            for file_name in [worker_file_name, worker_file_name + ".journal.json"]:
+                # (a Parquet output is a directory of part files)
+                if os.path.isdir(file_name):
+                    shutil.rmtree(file_name)
+                elif os.path.exists(file_name):
+                    os.remove(file_name)
+
+
+# Measure how the crawl scales from 1 to N workers against a local stand-in of the Pricing page
+def measure_scaling(scraper_class: type = NadlanScraper, max_num_of_workers: int = 4) -> dict[int, float]:
+    from NadlanFixtureSite import NadlanFixtureSite
+    fixture_site = NadlanFixtureSite(num_of_cities=max_num_of_workers * 2)
+    crawling_target_url = fixture_site.start()
+    elapsed_time_dict = {}
+    try:
+        for num_of_workers in range(1, max_num_of_workers + 1):
+            crawler = ParallelCrawler(scraper_class=scraper_class,
+                                      num_of_workers=num_of_workers,
+                                      num_of_cities=fixture_site.num_of_cities,
+                                      crawling_target_url=crawling_target_url,
+                                      output_file_name=f"Scaling_{num_of_workers}.csv")
+            # Every run starts from clean files (the leftovers of a crashed run would be resumed, and not really timed)
+            crawler.remove_worker_files(num_of_workers)
+            start_time = time.perf_counter()
+            crawler.main_crawler()
+            elapsed_time_dict[num_of_workers] = time.perf_counter() - start_time
+    finally:
+        fixture_site.stop()
+    for num_of_workers, elapsed_time in elapsed_time_dict.items():
+        print(f"{num_of_workers} workers: {elapsed_time:.1f} seconds "
+              f"(x{elapsed_time_dict[1] / elapsed_time:.2f} speedup)")
+    return elapsed_time_dict
+
+
+if __name__ == '__main__':
+    measure_scaling(NadlanScraper)
+    measure_scaling(NadlanEnvironmentScraper)
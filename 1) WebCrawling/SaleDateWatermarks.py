@@ -0,0 +1,110 @@
+"""
+__Brief Summary__:
+Per-neighborhood sale date watermarks, for a delta (refresh) crawl.
+A routine refresh used to re-crawl all the cities, and scroll every neighborhood
+to its very bottom, even though only the most recent transactions have changed.
+
+The watermark of a (City, Neighborhood) is the latest Sale_Date we already have of it.
+The Pricing page lists the housing units from the newest sale to the oldest one, so in
+a delta crawl (see NadlanScraper's 'watermarks') we stop scrolling a neighborhood as soon
+as the loaded rows fall behind its watermark, and keep only the rows of its watermark
+date and newer. Afterwards, 'merge_delta_into_dataset' appends only the rows that are
+really new to the existing dataset, and moves the watermarks forward.
+
+NOTE: The rows of the watermark date itself are crawled again (a day's transactions
+may have been published in parts), the merge drops the ones we already have.
+"""
+
+import os
+import sys
+import json
+from datetime import datetime
+import pandas as pd
+
+# The Sale_Date parsing (of both our formats) is shared with the data handling stage
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "2) DataHandling"))
+from NadlanNormalizer import parse_sale_date
+
+
+class SaleDateWatermarks(object):
+    def __init__(self, watermarks_file_name: str = "SaleDateWatermarks.json") -> None:
+        self.watermarks_file_name = watermarks_file_name
+
+        # {city name: {neighborhood name: latest sale date ("YYYY-MM-DD")}}
+        self.watermarks_dict: dict[str, dict[str, str]] = {}
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.watermarks_file_name):
+            return
+        with open(self.watermarks_file_name, "r", encoding="utf-8") as watermarks_file:
+            self.watermarks_dict = json.load(watermarks_file)
+
+    def save(self) -> None:
+        # We write into a temporary file first, so a crash never leaves broken watermarks behind
+        with open(self.watermarks_file_name + ".tmp", "w", encoding="utf-8") as watermarks_file:
+            json.dump(self.watermarks_dict, watermarks_file, ensure_ascii=False, indent=1)
+        os.replace(self.watermarks_file_name + ".tmp", self.watermarks_file_name)
+
+    # The latest sale date we already have of the neighborhood (None if we have nothing of it)
+    def get(self, city_name: str, neighborhood_name: str) -> datetime | None:
+        watermark = self.watermarks_dict.get(city_name, {}).get(neighborhood_name)
+        return None if watermark is None else datetime.strptime(watermark, '%Y-%m-%d')
+
+    # Move the neighborhood's watermark forward (never backwards)
+    def update(self, city_name: str, neighborhood_name: str, sale_date: datetime) -> None:
+        watermark = self.get(city_name, neighborhood_name)
+        if watermark is None or sale_date > watermark:
+            self.watermarks_dict.setdefault(city_name, {})[neighborhood_name] = sale_date.strftime('%Y-%m-%d')
+
+    # Move the watermarks forward by the latest sale date of every (City, Neighborhood) of the given rows
+    def update_from_rows(self, housing_units_df: pd.DataFrame) -> None:
+        sale_dates = housing_units_df["Sale_Date"].map(parse_sale_date)
+        latest_df = housing_units_df.assign(Sale_Date=sale_dates).dropna(subset=["Sale_Date"]) \
+            .groupby(["City", "Neighborhood"])["Sale_Date"].max()
+        for (city_name, neighborhood_name), sale_date in latest_df.items():
+            self.update(city_name, neighborhood_name, sale_date)
+
+    # Build the watermarks from an existing (full crawl) dataset file
+    def build_from_dataset(self, dataset_file_name: str) -> None:
+        self.update_from_rows(pd.read_csv(dataset_file_name, usecols=["City", "Neighborhood", "Sale_Date"], dtype=str))
+        self.save()
+
+    # Keep only the rows of the watermark date and newer
+    # (all the rows, if we have nothing of the neighborhood yet)
+    def filter_new_rows(self, city_name: str, neighborhood_name: str,
+                        housing_units_rows: list[list[str]]) -> list[list[str]]:
+        watermark = self.get(city_name, neighborhood_name)
+        if watermark is None:
+            return housing_units_rows
+        return [row for row in housing_units_rows
+                if pd.isna(parse_sale_date(row[0])) or parse_sale_date(row[0]) >= watermark]
+
+    # Append the rows of the delta crawl output that are not in the dataset yet (the rows of the
+    # watermark dates may be there already) to the dataset file, and move the watermarks forward.
+    # The rows are appended in the columns order of the dataset file's header. Returns the number of new rows
+    def merge_delta_into_dataset(self, delta_file_name: str, dataset_file_name: str) -> int:
+        delta_df = pd.read_csv(delta_file_name, dtype=str, keep_default_na=False).drop_duplicates()
+        dataset_df = pd.read_csv(dataset_file_name, dtype=str, keep_default_na=False)
+        dataset_columns = list(dataset_df.columns)
+        num_of_dataset_rows = len(dataset_df)
+        missing_columns = [column for column in delta_df.columns if column not in dataset_columns]
+        if len(missing_columns) > 0:
+            raise ValueError(f"Can't merge {delta_file_name} into {dataset_file_name}, "
+                             f"the dataset has no {missing_columns} columns")
+        # Only the dataset's rows of the refreshed neighborhoods can be duplicates of the delta rows
+        dataset_df = dataset_df.merge(delta_df[["City", "Neighborhood"]].drop_duplicates(), on=["City", "Neighborhood"])
+        existing_hashes = set(pd.util.hash_pandas_object(dataset_df[delta_df.columns], index=False))
+        new_rows_mask = ~pd.util.hash_pandas_object(delta_df, index=False).isin(existing_hashes)
+        new_rows_df = delta_df.loc[new_rows_mask.values]
+        rows_to_append_df = new_rows_df.reindex(columns=dataset_columns, fill_value="")
+        for column in dataset_columns:
+            # (a dataset that was saved together with its index (like our first full crawls) has an unnamed
+            # first column, the new rows continue its numbering)
+            if column.startswith("Unnamed:"):
+                rows_to_append_df[column] = range(num_of_dataset_rows, num_of_dataset_rows + len(rows_to_append_df))
+        rows_to_append_df.to_csv(dataset_file_name, mode="a", header=False, index=False)
+        self.update_from_rows(new_rows_df)
+        self.save()
+        print(f"merged {len(new_rows_df)} new housing units (out of {len(delta_df)} crawled) into {dataset_file_name}")
+        return len(new_rows_df)
@@ -1,11 +1,50 @@
+import os
+import sys
 from NadlanScraper import NadlanScraper
+from ParallelCrawler import ParallelCrawler
+from SaleDateWatermarks import SaleDateWatermarks
+from CrawlMetrics import CrawlMetrics
 
 def main():
-    scraper = NadlanScraper()
+    scraper = NadlanScraper(metrics=CrawlMetrics())
     scraper.main_scraper()
     scraper.close_nadlan_driver()
 
+# Same as 'main', but the cities are split between several workers (each with its own driver)
+def main_parallel(num_of_workers: int):
+    crawler = ParallelCrawler(scraper_class=NadlanScraper, num_of_workers=num_of_workers)
+    crawler.main_crawler()
 
-if __name__ == '__main__':
-    main()
+# A refresh of an existing dataset --> collect only the housing units that were sold since the last crawl,
+# and merge them into the dataset file
+def main_delta(dataset_file_name: str = "AllCities.csv", delta_file_name: str = "Delta.csv",
+               scraper_class: type = NadlanScraper):
+    watermarks = SaleDateWatermarks()
+    # The first refresh takes its watermarks from the dataset itself
+    if not os.path.exists(watermarks.watermarks_file_name):
+        watermarks.build_from_dataset(dataset_file_name)
+    scraper = scraper_class(output_file_name=delta_file_name, watermarks=watermarks, metrics=CrawlMetrics())
+    scraper.main_scraper()
+    # 'main_scraper' already closed the sink (and committed the journal), so we quit only the driver here.
+    # NOTE: Closing the sink once more would commit the journal again, after we removed it below
+    scraper.nadlan_driver.quit()
+    # (the sink creates the delta output only once it has rows to write)
+    if os.path.exists(delta_file_name):
+        watermarks.merge_delta_into_dataset(delta_file_name, dataset_file_name)
+        os.remove(delta_file_name)
+    else:
+        print("No new housing units were sold since the last refresh")
+    # The delta output (and its journal) were merged, so the next refresh starts from scratch
+    if os.path.exists(delta_file_name + ".journal.json"):
+        os.remove(delta_file_name + ".journal.json")
+    print("Finished Crawling!")
 
+
+if __name__ == '__main__':
+    # Usage: python main.py [number of workers | delta]
+    if len(sys.argv) > 1 and sys.argv[1] == "delta":
+        main_delta()
+    elif len(sys.argv) > 1:
+        main_parallel(int(sys.argv[1]))
+    else:
+        main()
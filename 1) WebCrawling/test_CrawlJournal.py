@@ -0,0 +1,106 @@
+"""
+__Brief Summary__:
+Crash and resume tests of our crawl journal.
+A crawl is simulated by writing a single row per neighborhood into a CsvSink that flushes
+every 2 rows (and commits the journal), and "crashes" by stopping without closing its sink.
+A resumed crawl must end up with the rows of every neighborhood exactly once
+(in a combined crawl, both its housing units rows and its environment row).
+"""
+
+import os
+import tempfile
+import unittest
+import pandas as pd
+from CrawlJournal import CrawlJournal
+from NadlanSink import CsvSink
+
+# NOTE: Be advised, this is a CONSTANT variable!
+COLUMNS = ["City", "Neighborhood", "Price"]
+
+
+# Crawl the given neighborhoods (of city 0) like our scrapers do, and stop right after 'crash_after' (if given)
+def simulate_crawl(output_file_name: str, num_of_neighborhoods: int, crash_after: int | None = None) -> None:
+    sink = CsvSink(output_file_name, COLUMNS, flush_every_rows=2)
+    crawl_journal = CrawlJournal(output_file_name + ".journal.json")
+    crawl_journal.attach(sink)
+    for neighborhood_num in range(num_of_neighborhoods):
+        if crawl_journal.is_neighborhood_finished(0, neighborhood_num): continue
+        crawl_journal.mark_neighborhood_finished(0, neighborhood_num)
+        sink.write({"City": ["city"], "Neighborhood": [f"neighborhood {neighborhood_num}"], "Price": [neighborhood_num]})
+        if neighborhood_num == crash_after:
+            return
+    crawl_journal.mark_city_finished(0)
+    sink.close()
+
+
+# Like 'simulate_crawl', with a second (environment) sink, like NadlanCombinedScraper.
+# With 'crash_between_the_sinks', the crash comes after the housing units row and before the environment row
+def simulate_combined_crawl(output_file_name: str, environment_output_file_name: str, num_of_neighborhoods: int,
+                            crash_after: int | None = None, crash_between_the_sinks: bool = False) -> None:
+    housing_units_sink = CsvSink(output_file_name, COLUMNS, flush_every_rows=2)
+    environment_sink = CsvSink(environment_output_file_name, COLUMNS, flush_every_rows=10**9)
+    crawl_journal = CrawlJournal(output_file_name + ".journal.json")
+    crawl_journal.attach(housing_units_sink, environment_sink)
+    for neighborhood_num in range(num_of_neighborhoods):
+        if crawl_journal.is_neighborhood_finished(0, neighborhood_num): continue
+        rows_dict = {"City": ["city"], "Neighborhood": [f"neighborhood {neighborhood_num}"], "Price": [neighborhood_num]}
+
+        def store_rows() -> None:
+            housing_units_sink.write(rows_dict)
+            if neighborhood_num == crash_after and crash_between_the_sinks:
+                raise KeyboardInterrupt
+            environment_sink.write(rows_dict)
+        try:
+            crawl_journal.store_neighborhood(0, neighborhood_num, store_rows)
+        except KeyboardInterrupt:
+            return
+        if neighborhood_num == crash_after:
+            return
+    crawl_journal.mark_city_finished(0)
+    housing_units_sink.close()
+    environment_sink.close()
+
+
+class CrawlJournalTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.output_file_name = os.path.join(self.temporary_directory.name, "Test.csv")
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+
+    def assert_every_neighborhood_once(self, num_of_neighborhoods: int, file_name: str | None = None) -> None:
+        output_df = pd.read_csv(self.output_file_name if file_name is None else file_name)
+        self.assertEqual(sorted(output_df["Price"].tolist()), list(range(num_of_neighborhoods)))
+
+    # The crash comes right after a write that flushed (and committed) the sink
+    def test_resume_after_a_crash_right_after_a_flush(self) -> None:
+        simulate_crawl(self.output_file_name, 5, crash_after=1)
+        simulate_crawl(self.output_file_name, 5)
+        self.assert_every_neighborhood_once(5)
+
+    # The crash loses the rows that were still waiting in the sink's buffer
+    def test_resume_after_a_crash_with_buffered_rows(self) -> None:
+        simulate_crawl(self.output_file_name, 5, crash_after=2)
+        simulate_crawl(self.output_file_name, 5)
+        self.assert_every_neighborhood_once(5)
+
+    def test_resume_a_combined_crawl_after_a_crash_right_after_a_flush(self) -> None:
+        environment_output_file_name = os.path.join(self.temporary_directory.name, "Test_Environment.csv")
+        simulate_combined_crawl(self.output_file_name, environment_output_file_name, 5, crash_after=1)
+        simulate_combined_crawl(self.output_file_name, environment_output_file_name, 5)
+        self.assert_every_neighborhood_once(5)
+        self.assert_every_neighborhood_once(5, environment_output_file_name)
+
+    # The housing units sink flushed (and asked for a commit) before the environment row was written
+    def test_resume_a_combined_crawl_after_a_crash_between_the_sinks(self) -> None:
+        environment_output_file_name = os.path.join(self.temporary_directory.name, "Test_Environment.csv")
+        simulate_combined_crawl(self.output_file_name, environment_output_file_name, 5, crash_after=1,
+                                crash_between_the_sinks=True)
+        simulate_combined_crawl(self.output_file_name, environment_output_file_name, 5)
+        self.assert_every_neighborhood_once(5)
+        self.assert_every_neighborhood_once(5, environment_output_file_name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+__Brief Summary__:
+Tests of our delta (refresh) crawl.
+The website is replaced by a scraper that "sells" a new housing unit in every city on every refresh,
+and writes it through the same sink and crawl journal our NadlanScraper uses.
+Every refresh must crawl all the cities again and merge their new housing units into the dataset.
+"""
+
+import os
+import tempfile
+import unittest
+import pandas as pd
+from CrawlJournal import CrawlJournal
+from NadlanSink import CsvSink
+from NadlanColumns import HOUSING_UNITS_COLUMNS
+from main import main_delta
+
+# NOTE: Be advised, these are CONSTANT variables!
+CITIES = ["city 0", "city 1"]
+DATASET_FILE_NAME = "AllCities.csv"
+DELTA_FILE_NAME = "Delta.csv"
+
+
+class FakeDriver(object):
+    def quit(self) -> None:
+        pass
+
+
+# Crawls like NadlanScraper does (through its sink and its journal), the sale date of the new housing units
+# is the class' 'sale_date'
+class FakeDeltaScraper(object):
+    sale_date = "01.01.2024"
+
+    def __init__(self, output_file_name: str, watermarks, metrics) -> None:
+        self.nadlan_sink = CsvSink(output_file_name, HOUSING_UNITS_COLUMNS)
+        self.crawl_journal = CrawlJournal(output_file_name + ".journal.json")
+        self.crawl_journal.attach(self.nadlan_sink)
+        self.nadlan_driver = FakeDriver()
+
+    def main_scraper(self) -> None:
+        for city_num, city_name in enumerate(CITIES):
+            if self.crawl_journal.is_city_finished(city_num): continue
+            self.crawl_journal.store_neighborhood(city_num, 0, lambda: self.nadlan_sink.write(
+                {column: [city_name if column == "City" else self.sale_date if column == "Sale_Date" else "1"]
+                 for column in HOUSING_UNITS_COLUMNS}))
+            self.crawl_journal.mark_city_finished(city_num)
+        self.nadlan_sink.close()
+
+
+class MainDeltaTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # (the watermarks and the crawl log are written into the working directory)
+        self.original_directory = os.getcwd()
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        os.chdir(self.temporary_directory.name)
+        pd.DataFrame({column: [city_name if column == "City" else "01.01.2024" if column == "Sale_Date" else "1"
+                               for city_name in CITIES] for column in HOUSING_UNITS_COLUMNS}) \
+            .to_csv(DATASET_FILE_NAME, index=False)
+
+    def tearDown(self) -> None:
+        os.chdir(self.original_directory)
+        self.temporary_directory.cleanup()
+
+    def refresh(self, sale_date: str) -> None:
+        FakeDeltaScraper.sale_date = sale_date
+        main_delta(DATASET_FILE_NAME, DELTA_FILE_NAME, scraper_class=FakeDeltaScraper)
+
+    # The second refresh must not pick up a journal of the first one (and skip all the cities)
+    def test_two_refreshes_in_a_row(self) -> None:
+        self.refresh("02.01.2024")
+        self.refresh("03.01.2024")
+        dataset_df = pd.read_csv(DATASET_FILE_NAME, dtype=str)
+        self.assertEqual(sorted(dataset_df["Sale_Date"].tolist()), sorted(["01.01.2024", "02.01.2024", "03.01.2024"] * 2))
+        self.assertFalse(os.path.exists(DELTA_FILE_NAME))
+        self.assertFalse(os.path.exists(DELTA_FILE_NAME + ".journal.json"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+__Brief Summary__:
+The environment data cleaning of "The Data Handling.ipynb" (step 4), as a reusable stage.
+The notebook strips the units off every cell with a nested Python loop ('df_Env.loc[i, col]'),
+and fills every missing value by recomputing the median (or the mean) of its whole city,
+which takes (rows x columns) full scans of the table.
+Here the same rules are applied with column-wise operations only:
+
+    1.  Neighborhoods that are industrial zones ("אזור תעשיה") are dropped.
+
+    2.  The units are stripped off the values ("4 בתי ספר" -> 4, "18,272 מ\"ר" -> 18272),
+        with one vectorized string operation per column.
+
+    3.  Zero values are treated as missing values.
+
+    4.  The missing values are filled with their city's median (or mean),
+        which is computed once for every city, with a single grouped transform per column.
+
+NOTE: The notebook's loop fills the missing values one after the other, so later values
+of the same city are computed over the already filled ones. Adding values that are equal
+to the median (or the mean) doesn't change it, so both ways give exactly the same output.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# The columns that come before the environment values (the notebook's 'df_Env.columns[2::]')
+# NOTE: Be advised, this is a CONSTANT variable!
+ENVIRONMENT_KEY_COLUMNS = ["City", "Neighborhood"]
+
+# The only environment column that has no units to strip
+# NOTE: Be advised, this is a CONSTANT variable!
+NO_UNITS_COLUMNS = ["Parks_And_Gardens"]
+
+# The fill methods, and the output file each one of them is saved into
+# (the AverageFill file name is the one "The Machine Learning.ipynb" reads)
+# NOTE: Be advised, this is a CONSTANT variable!
+FILL_OUTPUT_FILE_NAMES = {
+    "median": "AllCitiesEnvironment (MedianFill).csv",
+    "mean": "AllCitiesEnvorinment (AverageFill).csv"
+}
+
+
+# The environment values columns, out of the given environment DataFrame
+def get_environment_value_columns(environment_df: pd.DataFrame) -> list[str]:
+    return [column for column in environment_df.columns if column not in ENVIRONMENT_KEY_COLUMNS]
+
+
+# Drop the industrial zones, strip the units off the values, and turn them into numbers
+# (zero values become NaN values)
+def clean_environment(environment_df: pd.DataFrame) -> pd.DataFrame:
+    industrial_zones_mask = environment_df["Neighborhood"].astype(str).str.startswith("אזור תעשיה")
+    environment_df = environment_df.loc[~industrial_zones_mask].reset_index(drop=True)
+
+    cleaned_columns_dict = {}
+    for column in get_environment_value_columns(environment_df):
+        values = environment_df[column]
+        if column not in NO_UNITS_COLUMNS:
+            # "18,272 מ\"ר" -> "18,272" (the number is always the first word of the value)
+            values = values.astype(str).str.split(' ', n=1).str[0]
+        if column == "Green_Areas_SQM":
+            values = values.astype(str).str.replace(',', '', regex=False)
+        cleaned_columns_dict[column] = pd.to_numeric(values, errors='coerce').replace(0, np.nan)
+
+    return pd.concat([environment_df[ENVIRONMENT_KEY_COLUMNS], pd.DataFrame(cleaned_columns_dict)], axis=1)
+
+
+# Fill the missing values with their city's median or mean ('how' is "median" or "mean"),
+# and turn the values into int32 columns
+def fill_missing_by_city(environment_df: pd.DataFrame, how: str = "median") -> pd.DataFrame:
+    if how not in FILL_OUTPUT_FILE_NAMES:
+        raise ValueError(f"Unknown fill method '{how}', expected one of {list(FILL_OUTPUT_FILE_NAMES)}")
+    value_columns = get_environment_value_columns(environment_df)
+    city_fill_values = environment_df.groupby("City", sort=False)[value_columns].transform(how)
+    filled_df = environment_df.copy()
+    filled_df[value_columns] = filled_df[value_columns].fillna(city_fill_values).astype('int32')
+    return filled_df
+
+
+# Clean the raw environment CSV file, and save both its MedianFill and AverageFill versions
+# into the given directory. Returns the filled DataFrames by their fill method
+def process_environment_file(raw_file_name: str, output_directory: str = "Processed Data") -> dict[str, pd.DataFrame]:
+    cleaned_df = clean_environment(pd.read_csv(raw_file_name))
+    filled_dfs_dict = {}
+    for how, output_file_name in FILL_OUTPUT_FILE_NAMES.items():
+        filled_dfs_dict[how] = fill_missing_by_city(cleaned_df, how)
+        filled_dfs_dict[how].to_csv(os.path.join(output_directory, output_file_name), index=False)
+    return filled_dfs_dict
+
+
+if __name__ == '__main__':
+    process_environment_file(os.path.join("Raw Data", "AllCitiesEnvironment.csv"))
@@ -0,0 +1,235 @@
+"""
+__Brief Summary__:
+The housing units cleaning of "The Data Handling.ipynb" (steps 1 - 3), as a streaming pipeline.
+The notebook loads the whole raw "AllCities.csv" into memory, and every one of its steps
+(replace, drop, concat, astype...) makes another full copy of it, so the peak memory
+grows with the size of the country's transactions dump.
+
+Here every cleaning step is a stage (a function that takes a chunk of rows and returns its
+cleaned rows), and the raw file is read, cleaned and written in fixed-size chunks,
+so the peak memory depends on the chunk size, plus 8 bytes per unique row (the hashes
+DropDuplicatesStage remembers). The stages, in the notebook's order:
+
+    1.  replace_blanks_with_nan --> The website's blank values (' ') become NaN values.
+
+    2.  DropDuplicatesStage --> Duplicated rows are dropped (the first one is kept),
+        also across different chunks (by the hashes of the rows we already saw).
+
+    3.  drop_industrial_zones --> Neighborhoods that are industrial zones ("אזור תעשיה") are dropped.
+
+    4.  fill_missing_addresses --> Missing streets become "Unknown" and missing building numbers become -1.
+
+    5.  normalize_property_types --> Only the residential property types are kept, they are merged into
+        5 property types, and are replaced by their categorical codes.
+
+    6.  drop_zero_rooms --> Housing units with 0 rooms are dropped.
+
+    7.  parse_floors --> The Hebrew floors become numbers (see NadlanNormalizer.parse_floor),
+        housing units with unknown floors are dropped.
+
+    8.  drop_missing_square_meters --> Housing units without a size are dropped.
+
+    9.  parse_prices_and_types --> The prices lose their commas, and every column gets its final dtype.
+
+    10. drop_square_meter_outliers --> Housing units under 30 or over 300 square meters are dropped.
+
+    11. drop_price_outliers --> Small (under 60 square meters, under 4 rooms) housing units
+        that cost over 2.5M are dropped.
+
+Every stage only looks at the rows of its own chunk (except for the duplicates, whose state is kept
+by their stage), so cleaning the file in chunks gives exactly the same rows as cleaning it all at once.
+
+NOTE: Unlike the notebook, the rows keep their original order (the notebook's floor handling
+re-orders them), and the property types codes are fixed (see PROPERTY_TYPE_CATEGORIES)
+instead of depending on which property types appear in the data.
+"""
+
+import os
+from typing import Callable
+import numpy as np
+import pandas as pd
+from NadlanNormalizer import parse_column, parse_floor, parse_number, parse_sale_date
+
+# The property types we keep (see step 2.3 of "The Data Handling.ipynb")
+# NOTE: Be advised, this is a CONSTANT variable!
+PROPERTY_TYPES_TO_KEEP = [
+    "דירה בבית קומות",
+    "בית פרטי",
+    "קוטג' דו משפחתי",
+    "קוטג' חד משפחתי",
+    "קוטג' טורי",
+    "בית בודד",
+    "דירת גן",
+    "דירת גג",
+    "דירת גג (פנטהאוז)",
+    "דופלקס",
+    "מיני פנטהאוז",
+    "חד משפחתי (וילה)"
+]
+
+# The property types we merge into one another
+# NOTE: Be advised, this is a CONSTANT variable!
+PROPERTY_TYPES_TO_REPLACE = {
+    'דירת גג (פנטהאוז)': "דירת גג",
+    "מיני פנטהאוז": "דירת גג",
+    "קוטג' חד משפחתי": "קוטג'",
+    "קוטג' דו משפחתי": "קוטג'",
+    "קוטג' טורי": "קוטג'",
+    "בית בודד": "בית פרטי",
+    "חד משפחתי (וילה)": "בית פרטי",
+    "דופלקס": "דירת גג",
+    "דירה בבית קומות": "דירה בבניין"
+}
+
+# The final property types, sorted (their index is their categorical code, like in "The Data Handling.ipynb").
+# The dataset store and the prediction service import this list, so the codes mean the same everywhere
+# NOTE: Be advised, this is a CONSTANT variable!
+PROPERTY_TYPE_CATEGORIES = sorted(set(PROPERTY_TYPES_TO_REPLACE.values()) | {"דירת גן"})
+
+# The final dtypes of the cleaned housing units columns
+# NOTE: Be advised, this is a CONSTANT variable!
+CLEANED_DTYPES = {
+    "Building_Number": "int32",
+    "Property_Type": "int8",
+    "Rooms": "float32",
+    "Floor": "int32",
+    "Square_Meter": "float32",
+    "Price": "int32"
+}
+
+
+def replace_blanks_with_nan(chunk_df: pd.DataFrame) -> pd.DataFrame:
+    return chunk_df.replace(' ', np.nan)
+
+
+# Drops the duplicated rows, the rows hashes of the previous chunks are remembered
+# so a duplicate is dropped even when its first occurrence was in an earlier chunk.
+# The hashes are kept in a sorted uint64 array (8 bytes per unique row, instead of
+# the ~70 bytes of a Python int in a set), which every chunk's new hashes are merged into
+class DropDuplicatesStage(object):
+    def __init__(self) -> None:
+        self.seen_hashes = np.empty(0, dtype=np.uint64)
+
+    # Forget the rows we saw (before cleaning another file)
+    def reset(self) -> None:
+        self.seen_hashes = np.empty(0, dtype=np.uint64)
+
+    # Which of the given hashes were already seen in the previous chunks
+    def is_seen(self, rows_hashes: np.ndarray) -> np.ndarray:
+        positions = np.searchsorted(self.seen_hashes, rows_hashes)
+        return self.seen_hashes[np.minimum(positions, len(self.seen_hashes) - 1)] == rows_hashes \
+            if len(self.seen_hashes) > 0 else np.zeros(len(rows_hashes), dtype=bool)
+
+    def __call__(self, chunk_df: pd.DataFrame) -> pd.DataFrame:
+        rows_hashes = pd.util.hash_pandas_object(chunk_df, index=False)
+        first_occurrence_mask = ~rows_hashes.duplicated().to_numpy() & ~self.is_seen(rows_hashes.to_numpy())
+        # (both arrays are sorted, so the stable sort only merges them)
+        self.seen_hashes = np.sort(np.concatenate([self.seen_hashes, np.sort(rows_hashes.to_numpy()[first_occurrence_mask])]),
+                                   kind="stable")
+        return chunk_df.loc[first_occurrence_mask]
+
+
+def drop_industrial_zones(chunk_df: pd.DataFrame) -> pd.DataFrame:
+    return chunk_df.loc[chunk_df["Neighborhood"].str.contains("אזור תעשיה") != True]
+
+
+def fill_missing_addresses(chunk_df: pd.DataFrame) -> pd.DataFrame:
+    return chunk_df.fillna({"Street": "Unknown", "Building_Number": -1})
+
+
+def normalize_property_types(chunk_df: pd.DataFrame) -> pd.DataFrame:
+    chunk_df = chunk_df.loc[chunk_df["Property_Type"].isin(PROPERTY_TYPES_TO_KEEP)].copy()
+    property_types = chunk_df["Property_Type"].replace(PROPERTY_TYPES_TO_REPLACE)
+    chunk_df["Property_Type"] = pd.Categorical(property_types, categories=PROPERTY_TYPE_CATEGORIES).codes
+    return chunk_df
+
+
+def drop_zero_rooms(chunk_df: pd.DataFrame) -> pd.DataFrame:
+    chunk_df = chunk_df.copy()
+    chunk_df["Rooms"] = pd.to_numeric(parse_column(chunk_df["Rooms"], parse_number), errors="coerce")
+    return chunk_df.loc[chunk_df["Rooms"] != 0]
+
+
+def parse_floors(chunk_df: pd.DataFrame) -> pd.DataFrame:
+    chunk_df = chunk_df.copy()
+    chunk_df["Floor"] = pd.to_numeric(parse_column(chunk_df["Floor"], parse_floor), errors="coerce")
+    return chunk_df.dropna(subset=["Floor"])
+
+
+def drop_missing_square_meters(chunk_df: pd.DataFrame) -> pd.DataFrame:
+    return chunk_df.dropna(subset=["Square_Meter"])
+
+
+# (housing units with a price or a size that can't be parsed are dropped)
+def parse_prices_and_types(chunk_df: pd.DataFrame) -> pd.DataFrame:
+    chunk_df = chunk_df.copy()
+    for column in ["Building_Number", "Square_Meter", "Price"]:
+        chunk_df[column] = pd.to_numeric(parse_column(chunk_df[column], parse_number), errors="coerce")
+    chunk_df["Building_Number"] = chunk_df["Building_Number"].fillna(-1)
+    chunk_df = chunk_df.dropna(subset=["Square_Meter", "Price"])
+    chunk_df = chunk_df.astype(CLEANED_DTYPES)
+    chunk_df["Sale_Date"] = pd.to_datetime(parse_column(chunk_df["Sale_Date"], parse_sale_date))
+    return chunk_df
+
+
+def drop_square_meter_outliers(chunk_df: pd.DataFrame) -> pd.DataFrame:
+    return chunk_df.loc[~((chunk_df["Square_Meter"] > 300) | (chunk_df["Square_Meter"] < 30))]
+
+
+def drop_price_outliers(chunk_df: pd.DataFrame) -> pd.DataFrame:
+    return chunk_df.loc[~((chunk_df["Square_Meter"] < 60) & (chunk_df["Rooms"] < 4) & (chunk_df["Price"] > 2_500_000))]
+
+
+class NadlanCleaningPipeline(object):
+    def __init__(self, stages: list[Callable[[pd.DataFrame], pd.DataFrame]] | None = None,
+                 chunk_size: int = 100_000) -> None:
+        # The cleaning stages, in the order they are applied
+        if stages is None:
+            stages = [replace_blanks_with_nan, DropDuplicatesStage(), drop_industrial_zones, fill_missing_addresses,
+                      normalize_property_types, drop_zero_rooms, parse_floors, drop_missing_square_meters,
+                      parse_prices_and_types, drop_square_meter_outliers, drop_price_outliers]
+        self.stages = stages
+
+        # How many raw rows are read (and cleaned) at once
+        self.chunk_size = chunk_size
+
+    # Forget the state of the stateful stages (the duplicates hashes), before a new run
+    def reset(self) -> None:
+        for stage in self.stages:
+            if hasattr(stage, "reset"):
+                stage.reset()
+
+    def clean_chunk(self, chunk_df: pd.DataFrame) -> pd.DataFrame:
+        for stage in self.stages:
+            chunk_df = stage(chunk_df)
+        return chunk_df
+
+    # The in-memory path --> clean the whole given DataFrame at once
+    # (a DataFrame that was loaded by 'read_raw_file', so it has the same dtypes as the chunks)
+    def clean(self, raw_df: pd.DataFrame) -> pd.DataFrame:
+        self.reset()
+        return self.clean_chunk(raw_df).reset_index(drop=True)
+
+    # The raw file is read with all of its values as strings, so every chunk gets the same dtypes
+    @staticmethod
+    def read_raw_file(raw_file_name: str, chunk_size: int | None = None):
+        return pd.read_csv(raw_file_name, dtype=str, chunksize=chunk_size)
+
+    # The streaming path --> clean the raw file chunk after chunk, appending every cleaned chunk
+    # to the output file. Returns the number of cleaned rows
+    def clean_file(self, raw_file_name: str, output_file_name: str) -> int:
+        self.reset()
+        if os.path.exists(output_file_name):
+            os.remove(output_file_name)
+        num_of_rows = 0
+        for chunk_df in self.read_raw_file(raw_file_name, self.chunk_size):
+            cleaned_df = self.clean_chunk(chunk_df)
+            cleaned_df.to_csv(output_file_name, mode="a", header=not os.path.exists(output_file_name), index=False)
+            num_of_rows += len(cleaned_df)
+        return num_of_rows
+
+
+if __name__ == '__main__':
+    pipeline = NadlanCleaningPipeline()
+    cleaned_rows = pipeline.clean_file(os.path.join("Raw Data", "AllCities.csv"), os.path.join("Processed Data", "AllCities.csv"))
+    print(f"cleaned {cleaned_rows} housing units")
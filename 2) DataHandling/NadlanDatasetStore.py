@@ -0,0 +1,152 @@
+"""
+__Brief Summary__:
+A columnar dataset store for our processed tables (requires the pyarrow library).
+Every stage of the pipeline used to write a full CSV file, and the next stage re-read it,
+which means parsing all the Hebrew text again and guessing the dtypes again every time.
+
+The store keeps each table as a Parquet dataset directory, partitioned by City
+(one "City=<name>" sub directory per city):
+
+    1.  Every table has a fixed schema, with int32 / float32 numeric columns.
+
+    2.  The Neighborhood, Street and Property_Type text columns are dictionary encoded,
+        so every distinct name is stored (and loaded) only once.
+
+    3.  Loading reads only the requested columns, and only the requested cities partitions,
+        so a single city (or a few features) analysis doesn't load the whole country.
+
+    4.  Saving a table replaces only the partitions of the cities it holds,
+        so a single city can be re-processed without rewriting the other ones.
+
+The store's tables are:
+
+    housing_units --> The processed housing units (like "Processed Data\\AllCities.csv").
+
+    environment --> The processed environment data (like "Processed Data\\AllCitiesEnvironment (MedianFill).csv").
+"""
+
+import os
+from urllib.parse import unquote
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from NadlanCleaningPipeline import PROPERTY_TYPE_CATEGORIES
+
+# The type of the dictionary encoded text columns
+# NOTE: Be advised, this is a CONSTANT variable!
+DICTIONARY_STRING = pa.dictionary(pa.int32(), pa.string())
+
+# The fixed schema of every table (without its City partitioning column)
+# NOTE: Be advised, this is a CONSTANT variable!
+TABLE_SCHEMAS = {
+    "housing_units": pa.schema([
+        ("Neighborhood", DICTIONARY_STRING),
+        ("Street", DICTIONARY_STRING),
+        ("Building_Number", pa.int32()),
+        ("Property_Type", DICTIONARY_STRING),
+        ("Rooms", pa.float32()),
+        ("Floor", pa.int32()),
+        ("Square_Meter", pa.float32()),
+        ("Price", pa.int32()),
+        ("Sale_Date", pa.timestamp("ms"))
+    ]),
+    "environment": pa.schema([
+        ("Neighborhood", DICTIONARY_STRING),
+        ("Schools", pa.int32()),
+        ("Kindergartens_And_Dormitories", pa.int32()),
+        ("Non_Formal_Educational_Institutions", pa.int32()),
+        ("Education_Average_Distance", pa.int32()),
+        ("Green_Areas_SQM", pa.int32()),
+        ("Parks_And_Gardens", pa.int32()),
+        ("Green_Areas_Average_Distance", pa.int32()),
+        ("Parks_And_Gardens_Average_Distance", pa.int32()),
+        ("Public_Institutions", pa.int32()),
+        ("Community_Institutions", pa.int32()),
+        ("Religious_Institutions", pa.int32()),
+        ("Public_Building_Average_Distance", pa.int32())
+    ])
+}
+
+# The tables are partitioned by their cities
+# NOTE: Be advised, this is a CONSTANT variable!
+CITY_PARTITIONING = ds.partitioning(pa.schema([("City", pa.string())]), flavor="hive")
+
+
+class NadlanDatasetStore(object):
+    def __init__(self, root_directory: str = "Dataset Store") -> None:
+        # Every table is saved into its own sub directory
+        self.root_directory = root_directory
+
+    def get_table_directory(self, table_name: str) -> str:
+        if table_name not in TABLE_SCHEMAS:
+            raise KeyError(f"Unknown table '{table_name}', expected one of {list(TABLE_SCHEMAS)}")
+        return os.path.join(self.root_directory, table_name)
+
+    # Turn the given DataFrame into a pyarrow table with the table's fixed schema
+    def to_arrow_table(self, table_name: str, df: pd.DataFrame) -> pa.Table:
+        schema = TABLE_SCHEMAS[table_name]
+        columns_dict = {"City": pa.array(df["City"].astype("string"), type=pa.string())}
+        for field in schema:
+            values = df[field.name]
+            if field.type == DICTIONARY_STRING:
+                # The processed housing units hold the property types as their categorical codes
+                if field.name == "Property_Type" and pd.api.types.is_integer_dtype(values):
+                    values = pd.Categorical.from_codes(values, categories=PROPERTY_TYPE_CATEGORIES)
+                columns_dict[field.name] = pa.array(values.astype("string"), type=pa.string()).dictionary_encode() \
+                    .cast(DICTIONARY_STRING)
+            elif pa.types.is_timestamp(field.type):
+                columns_dict[field.name] = pa.array(pd.to_datetime(values), type=field.type)
+            elif pa.types.is_integer(field.type):
+                # (Building_Number may hold values like "12א", which become -1 like the missing ones)
+                integer_values = pd.to_numeric(values, errors="coerce")
+                if field.name == "Building_Number":
+                    integer_values = integer_values.fillna(-1)
+                columns_dict[field.name] = pa.array(integer_values.astype("Int64"), type=field.type)
+            else:
+                columns_dict[field.name] = pa.array(pd.to_numeric(values, errors="coerce").astype("float32"), type=field.type)
+        return pa.table(columns_dict)
+
+    # Save the given table, replacing only the partitions of the cities it holds
+    def save(self, table_name: str, df: pd.DataFrame) -> None:
+        ds.write_dataset(self.to_arrow_table(table_name, df), self.get_table_directory(table_name),
+                         format="parquet", partitioning=CITY_PARTITIONING,
+                         basename_template="part-{i}.parquet",
+                         existing_data_behavior="delete_matching")
+
+    def get_dataset(self, table_name: str) -> ds.Dataset:
+        return ds.dataset(self.get_table_directory(table_name), format="parquet",
+                          schema=TABLE_SCHEMAS[table_name].append(pa.field("City", pa.string())),
+                          partitioning=CITY_PARTITIONING)
+
+    # Load the given columns (all of them by default) of the given cities (all of them by default).
+    # Only the requested columns and the requested cities partitions are read from disk
+    def load(self, table_name: str, columns: list[str] | None = None,
+             cities: list[str] | None = None) -> pd.DataFrame:
+        city_filter = None if cities is None else ds.field("City").isin(cities)
+        df = self.get_dataset(table_name).to_table(columns=columns, filter=city_filter).to_pandas()
+        if "City" in df.columns:
+            df["City"] = df["City"].astype("category")
+        if "Property_Type" in df.columns:
+            # The categories order of the notebook, so '.cat.codes' gives the same codes.
+            # NOTE: '.astype' of a CategoricalDtype with the same categories (in any order) keeps the loaded order
+            df["Property_Type"] = df["Property_Type"].cat.set_categories(PROPERTY_TYPE_CATEGORIES)
+        return df
+
+    # The cities the table holds (read from the partitions directories names only,
+    # which are URI encoded by the hive partitioning)
+    def get_cities(self, table_name: str) -> list[str]:
+        table_directory = self.get_table_directory(table_name)
+        if not os.path.isdir(table_directory):
+            return []
+        city_directories = [file_name for file_name in os.listdir(table_directory) if file_name.startswith("City=")]
+        return sorted(unquote(city_directory[len("City="):]) for city_directory in city_directories)
+
+    # Import a processed CSV file into the store
+    def import_csv(self, table_name: str, file_name: str) -> None:
+        self.save(table_name, pd.read_csv(file_name))
+
+
+if __name__ == '__main__':
+    store = NadlanDatasetStore()
+    store.import_csv("housing_units", os.path.join("Processed Data", "AllCities.csv"))
+    store.import_csv("environment", os.path.join("Processed Data", "AllCitiesEnvironment (MedianFill).csv"))
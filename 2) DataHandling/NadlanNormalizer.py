@@ -0,0 +1,199 @@
+"""
+__Brief Summary__:
+Typed parsing of the raw housing units values, shared by the scrapers (at ingest)
+and by the loaders of the raw CSV files.
+The raw data holds only strings: comma formatted prices, Hebrew floors
+(like "שלישית", "קומה 3" or "ראשונה, שניה") and "dd.mm.yyyy" sale dates
+(files that were written with typed columns hold "yyyy-mm-dd" sale dates instead).
+The functions below turn the Floor, Price, Rooms, Square_Meter and Sale_Date
+columns into compact typed columns, with exactly the same rules we used in
+"The Data Handling.ipynb" (step 2.5 for the floors):
+
+    1.  A floor that is a number (or an exact Hebrew floor name) is that number.
+
+    2.  A Hebrew floor that contains the word "קרקע" is the ground floor (0).
+
+    3.  Any other Hebrew floor gets the minimum floor value that appears in it.
+
+    4.  Anything else can't be parsed, and becomes NaN.
+
+A column usually holds only a few thousands distinct raw strings, so each
+distinct string is parsed only once (through a bounded cache), and the results
+are spread back over the whole column.
+"""
+
+from functools import lru_cache
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# The Hebrew floors names (see step 2.5.1 of "The Data Handling.ipynb")
+FLOOR_DICT = {
+    "קרקע": 0,
+    "ראשונה": 1,
+    "שניה": 2,
+    "שלישית": 3,
+    "רביעית": 4,
+    "חמישית": 5,
+    "שישית": 6,
+    "שביעית": 7,
+    "שמינית": 8,
+    "תשיעית": 9,
+    "עשירית": 10,
+    "אחת עשרה": 11,
+    "שתים עשרה": 12,
+    "שלוש עשרה": 13,
+    "ארבע עשרה": 14,
+    "חמש עשרה": 15,
+    "שש עשרה": 16,
+    "שבע עשרה": 17,
+    "שמונה עשרה": 18,
+    "תשע עשרה": 19,
+    "עשרים": 20,
+    "עשרים ואחת": 21,
+    "עשרים ושתיים": 22,
+    "עשרים ושלוש": 23,
+    "עשרים וארבע": 24,
+    "עשרים וחמש": 25,
+    "עשרים ושש": 26,
+    "עשרים ושבע": 27,
+    "עשרים ושמונה": 28,
+    "עשרים ותשע": 29,
+    "שלושים": 30,
+    "שלושים ואחת": 31,
+    "שלושים ושתים": 32,
+    "שלושים ושלוש": 33,
+    "שלושים וארבע": 34,
+    "שלושים וחמש": 35,
+    "שלושים ושש": 36,
+    "שלושים ושבע": 37,
+    "שלושים ושמונה": 38,
+    "שלושים ותשע": 39,
+    "ארבעים": 40,
+    "ארבעים ואחת": 41,
+    "ארבעים ושתיים": 42,
+    "ארבעים ושלוש": 43,
+    "ארבעים וארבע": 44,
+    "ארבעים וחמש": 45,
+    "ארבעים ושש": 46,
+    "ארבעים ושבע": 47,
+    "ארבעים ושמונה": 48,
+    "ארבעים ותשע": 49,
+    "חמישים": 50,
+    "חמישים ואחת": 51,
+    "חמישים ושתיים": 52,
+    "חמישים ושלוש": 53,
+    "חמישים וארבע": 54,
+}
+
+# Some floors are written as followed: קומה 1, קומה 2 etc'.
+NUM_OF_FLOORS = 54
+FLOOR_DICT2 = {f"קומה {key}": key for key in range(NUM_OF_FLOORS)}
+
+# The floors, by their value, in both of their writing styles
+FLOOR_DICT_REVERSE1 = {value: key for key, value in FLOOR_DICT.items()}
+FLOOR_DICT_REVERSE2 = {value: key for key, value in FLOOR_DICT2.items()}
+
+# Floors starting with one of these characters are "written in words"
+HEBREW_FLOOR_FIRST_CHARACTERS = set('-אבגדהוזחטיכלמנסעפצקרשת')
+
+# How many distinct raw strings each parser remembers
+PARSE_CACHE_SIZE = 65536
+
+# The compact dtypes of the typed columns
+# (the nullable integer types keep the missing values until the cleaning drops them)
+HOUSING_UNITS_DTYPES = {
+    "Floor": "Int16",
+    "Price": "Int32",
+    "Rooms": "float32",
+    "Square_Meter": "float32"
+}
+
+# The Sale_Date formats of our datasets: the website's raw text, and the typed output
+# NOTE: Be advised, this is a CONSTANT variable!
+SALE_DATE_FORMATS = ['%d.%m.%Y', '%Y-%m-%d']
+
+
+def is_blank(raw_value) -> bool:
+    # The website writes missing values as an empty string or a single space
+    return raw_value is None or (isinstance(raw_value, float) and np.isnan(raw_value)) or str(raw_value).strip() == ""
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_floor(raw_floor: str) -> float:
+    if is_blank(raw_floor):
+        return np.nan
+    raw_floor = str(raw_floor)
+    # An exact Hebrew floor name (קרקע, ראשונה, ... or קומה 1, קומה 2, ...)
+    if raw_floor in FLOOR_DICT:
+        return FLOOR_DICT[raw_floor]
+    if raw_floor in FLOOR_DICT2:
+        return FLOOR_DICT2[raw_floor]
+    # A floor that is written as a number
+    if raw_floor[0] not in HEBREW_FLOOR_FIRST_CHARACTERS:
+        return parse_number(raw_floor)
+    # A floor that contains the word 'קרקע' is a ground floor
+    if "קרקע" in raw_floor:
+        return 0
+    # The floor is the minimum floor value that appears in its sequence (ראשונה, שנייה -> ראשונה)
+    for key in range(NUM_OF_FLOORS):
+        if FLOOR_DICT_REVERSE1[key] in raw_floor or FLOOR_DICT_REVERSE2[key] in raw_floor:
+            return key
+    return np.nan
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_number(raw_number: str) -> float:
+    if is_blank(raw_number):
+        return np.nan
+    try:
+        return float(str(raw_number).replace(",", ""))
+    except ValueError:
+        return np.nan
+
+
+# Parse a Sale_Date value of any of our formats (NaT if it can't be parsed)
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_sale_date(raw_sale_date: str) -> pd.Timestamp:
+    if is_blank(raw_sale_date):
+        return pd.NaT
+    # (a typed date may have been written together with its time of day)
+    raw_sale_date = str(raw_sale_date).strip()[:10]
+    for sale_date_format in SALE_DATE_FORMATS:
+        try:
+            return pd.Timestamp(datetime.strptime(raw_sale_date, sale_date_format))
+        except ValueError:
+            continue
+    return pd.NaT
+
+
+# Parse every distinct value of the column only once, and spread the results over the whole column
+def parse_column(column: pd.Series, parser) -> pd.Series:
+    codes, uniques = pd.factorize(column)
+    parsed_uniques = np.array([parser(value) for value in uniques] + [parser(None)], dtype=object)
+    # 'codes' is -1 for missing values, which picks the parsed None at the end of 'parsed_uniques'
+    return pd.Series(parsed_uniques[codes], index=column.index)
+
+
+# Turn the raw housing units columns into typed (and compact) columns.
+# Columns that are missing from the given DataFrame are simply skipped
+def normalize_housing_units(housing_units_df: pd.DataFrame) -> pd.DataFrame:
+    housing_units_df = housing_units_df.copy()
+    parsers_dict = {"Floor": parse_floor, "Price": parse_number, "Rooms": parse_number, "Square_Meter": parse_number}
+    for column, parser in parsers_dict.items():
+        if column in housing_units_df.columns:
+            parsed_column = pd.to_numeric(parse_column(housing_units_df[column], parser), errors="coerce")
+            if HOUSING_UNITS_DTYPES[column].startswith("Int"):
+                parsed_column = np.trunc(parsed_column)
+            housing_units_df[column] = parsed_column.astype(HOUSING_UNITS_DTYPES[column])
+    if "Sale_Date" in housing_units_df.columns:
+        housing_units_df["Sale_Date"] = pd.to_datetime(parse_column(housing_units_df["Sale_Date"], parse_sale_date))
+    return housing_units_df
+
+
+# Load a raw housing units CSV file with typed columns (only the given columns, if given)
+def read_housing_units_csv(file_name: str, usecols: list[str] | None = None, **read_csv_kwargs) -> pd.DataFrame:
+    raw_df = pd.read_csv(file_name, usecols=usecols, dtype=str, keep_default_na=False, **read_csv_kwargs)
+    # The website writes missing values as an empty string or a single space
+    raw_df = raw_df.replace({"": np.nan, " ": np.nan})
+    return normalize_housing_units(raw_df)
@@ -0,0 +1,61 @@
+"""
+__Brief Summary__:
+Round trip tests of our dataset store.
+A table that is saved into the store and loaded back must hold the same values,
+and its Property_Type codes must be the notebook's codes (whatever order the
+property types were first seen in, which is the order of the Parquet dictionaries).
+"""
+
+import tempfile
+import unittest
+import pandas as pd
+from NadlanDatasetStore import NadlanDatasetStore, PROPERTY_TYPE_CATEGORIES
+
+
+# Housing units of two cities, with the property types codes in a different order than their categories order
+def create_housing_units_df() -> pd.DataFrame:
+    property_type_codes = [4, 2, 1, 3, 0, 2]
+    return pd.DataFrame({
+        "City": ["עיר א"] * 3 + ["עיר ב"] * 3,
+        "Neighborhood": ["שכונה 1", "שכונה 2", "שכונה 1", "שכונה 3", "שכונה 3", "שכונה 4"],
+        "Street": ["רחוב"] * 6,
+        "Building_Number": [1, 2, 3, 4, 5, 6],
+        "Property_Type": property_type_codes,
+        "Rooms": [3.0, 4.5, 2.0, 5.0, 6.0, 3.5],
+        "Floor": [1, 2, 0, 3, 0, 7],
+        "Square_Meter": [80.0, 100.0, 55.0, 120.0, 200.0, 90.0],
+        "Price": [1500000, 2000000, 900000, 2500000, 4000000, 1800000],
+        "Sale_Date": pd.to_datetime(["2023-01-01", "2023-02-01", "2023-03-01", "2023-04-01", "2023-05-01", "2023-06-01"])
+    })
+
+
+class NadlanDatasetStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.store = NadlanDatasetStore(self.temporary_directory.name)
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+
+    def load_sorted(self, **kwargs) -> pd.DataFrame:
+        return self.store.load("housing_units", **kwargs).sort_values("Building_Number").reset_index(drop=True)
+
+    def test_property_type_codes_round_trip(self) -> None:
+        housing_units_df = create_housing_units_df()
+        self.store.save("housing_units", housing_units_df)
+        loaded_df = self.load_sorted()
+        self.assertEqual(list(loaded_df["Property_Type"].cat.categories), PROPERTY_TYPE_CATEGORIES)
+        self.assertEqual(loaded_df["Property_Type"].cat.codes.tolist(), housing_units_df["Property_Type"].tolist())
+        self.assertEqual(loaded_df["Price"].tolist(), housing_units_df["Price"].tolist())
+        self.assertEqual(loaded_df["City"].astype(str).tolist(), housing_units_df["City"].tolist())
+
+    def test_load_a_single_city(self) -> None:
+        housing_units_df = create_housing_units_df()
+        self.store.save("housing_units", housing_units_df)
+        loaded_df = self.load_sorted(columns=["City", "Building_Number", "Property_Type"], cities=["עיר ב"])
+        self.assertEqual(loaded_df["Property_Type"].cat.codes.tolist(), housing_units_df["Property_Type"].tolist()[3:])
+        self.assertEqual(self.store.get_cities("housing_units"), ["עיר א", "עיר ב"])
+
+
+if __name__ == '__main__':
+    unittest.main()
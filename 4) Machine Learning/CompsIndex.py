@@ -0,0 +1,151 @@
+"""
+__Brief Summary__:
+A comparable sales ("comps") index over our housing units.
+The notebook's KNN classifier scans the whole training matrix for every single query.
+Our appraisers need, for a given listing, the K most similar past sales in the same city,
+by their Square_Meter, Rooms, Floor, Sale_Year and environment features.
+
+The index holds a KD-tree per City (the comps are never looked for across cities):
+
+    1.  Every feature is standardized by its City's mean and standard deviation (computed when
+        the City's tree is built), so no single feature (like Green_Areas_SQM) dominates the distance.
+
+    2.  New housing units (like the rows of a delta crawl) are inserted into a small pending buffer
+        of their City, which is scanned together with the tree on every query. Once the buffer grows
+        over 'rebuild_fraction' of the tree's size, the City's tree is rebuilt with all of its rows.
+
+    3.  The whole index is saved to disk (a file per City), so it is built only once.
+
+The rows are expected in the notebook's 'Save 1.csv' format (after the environment enrichment).
+"""
+
+import os
+import json
+import pickle
+import hashlib
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+# The features the comps are compared by
+# NOTE: Be advised, this is a CONSTANT variable!
+COMPS_FEATURES = ['Square_Meter', 'Rooms', 'Floor', 'Sale_Year', 'Kindergartens_And_Dormitories',
+                  'Education_Average_Distance', 'Green_Areas_SQM', 'Parks_And_Gardens', 'Green_Areas_Average_Distance',
+                  'Parks_And_Gardens_Average_Distance', 'Public_Building_Average_Distance', 'Institutions',
+                  'Schools_Institutions']
+
+
+# The comps index of a single City
+class CityCompsIndex(object):
+    def __init__(self, rows_df: pd.DataFrame, rebuild_fraction: float = 0.1) -> None:
+        # The City's housing units (the comps we return), and the pending ones (not in the tree yet)
+        self.rows_df = rows_df.reset_index(drop=True)
+        self.pending_rows_df = rows_df.iloc[0:0]
+
+        # How large the pending buffer may grow (relative to the tree) before we rebuild the tree
+        self.rebuild_fraction = rebuild_fraction
+        self.build_tree()
+
+    # (Re)build the City's tree from all of its rows, with fresh standardization values
+    def build_tree(self) -> None:
+        self.rows_df = pd.concat([self.rows_df, self.pending_rows_df], ignore_index=True)
+        self.pending_rows_df = self.rows_df.iloc[0:0]
+        features = self.rows_df[COMPS_FEATURES].to_numpy(dtype=np.float64)
+        self.features_mean = features.mean(axis=0)
+        # (a feature with a single value in the whole City gets a standard deviation of 1)
+        self.features_std = np.where(features.std(axis=0) > 0, features.std(axis=0), 1.0)
+        self.tree = cKDTree(self.standardize(features))
+        self.pending_points = np.empty((0, len(COMPS_FEATURES)))
+
+    def standardize(self, features: np.ndarray) -> np.ndarray:
+        return (features - self.features_mean) / self.features_std
+
+    # Insert new housing units (they are searched right away, and get into the tree on its next rebuild)
+    def insert(self, new_rows_df: pd.DataFrame) -> None:
+        self.pending_rows_df = pd.concat([self.pending_rows_df, new_rows_df], ignore_index=True)
+        self.pending_points = np.vstack([self.pending_points,
+                                         self.standardize(new_rows_df[COMPS_FEATURES].to_numpy(dtype=np.float64))])
+        if len(self.pending_rows_df) > self.rebuild_fraction * len(self.rows_df):
+            self.build_tree()
+
+    # The k nearest housing units of the given listings features --> (distances, rows), both sorted by distance
+    def query(self, features: np.ndarray, k: int) -> tuple[np.ndarray, pd.DataFrame]:
+        point = self.standardize(features)
+        tree_k = min(k, len(self.rows_df))
+        tree_distances, tree_positions = self.tree.query(point, k=tree_k)
+        distances = np.atleast_1d(tree_distances)
+        candidates_df = self.rows_df.iloc[np.atleast_1d(tree_positions)]
+        if len(self.pending_rows_df) > 0:
+            # The pending buffer is small, so it is simply scanned
+            pending_distances = np.linalg.norm(self.pending_points - point, axis=1)
+            distances = np.concatenate([distances, pending_distances])
+            candidates_df = pd.concat([candidates_df, self.pending_rows_df], ignore_index=True)
+        nearest_order = np.argsort(distances, kind="stable")[:k]
+        return distances[nearest_order], candidates_df.iloc[nearest_order].reset_index(drop=True)
+
+
+class CompsIndex(object):
+    def __init__(self, index_directory: str = "Comps Index", rebuild_fraction: float = 0.1) -> None:
+        # Where the index is saved (a file per City, and a file of the cities names)
+        self.index_directory = index_directory
+        self.rebuild_fraction = rebuild_fraction
+
+        # The index of every City, by its name
+        self.city_indices_dict: dict[str, CityCompsIndex] = {}
+
+    # Build the index of every City of the given housing units
+    def build(self, housing_units_df: pd.DataFrame) -> None:
+        housing_units_df = housing_units_df.dropna(subset=COMPS_FEATURES)
+        for city_name, city_df in housing_units_df.groupby("City", sort=False):
+            self.city_indices_dict[str(city_name)] = CityCompsIndex(city_df, self.rebuild_fraction)
+
+    # Insert new housing units into the index of their cities
+    def insert(self, new_rows_df: pd.DataFrame) -> None:
+        new_rows_df = new_rows_df.dropna(subset=COMPS_FEATURES)
+        for city_name, city_df in new_rows_df.groupby("City", sort=False):
+            if str(city_name) in self.city_indices_dict:
+                self.city_indices_dict[str(city_name)].insert(city_df)
+            else:
+                self.city_indices_dict[str(city_name)] = CityCompsIndex(city_df, self.rebuild_fraction)
+
+    # The k most similar past sales of the given listing (in its own City), with their distances.
+    # The listing's missing environment features are taken from its neighborhood's past sales
+    def query(self, listing: dict, k: int = 10) -> pd.DataFrame:
+        city_index = self.city_indices_dict[listing["City"]]
+        features = np.array([listing.get(feature, np.nan) for feature in COMPS_FEATURES], dtype=np.float64)
+        if np.isnan(features).any():
+            all_rows_df = pd.concat([city_index.rows_df, city_index.pending_rows_df])
+            neighborhood_df = all_rows_df[all_rows_df["Neighborhood"] == listing.get("Neighborhood")]
+            fill_values = (neighborhood_df if len(neighborhood_df) > 0 else all_rows_df)[COMPS_FEATURES].mean().to_numpy()
+            features = np.where(np.isnan(features), fill_values, features)
+        distances, comps_df = city_index.query(features, k)
+        return comps_df.assign(Comps_Distance=distances)
+
+    @staticmethod
+    def get_city_file_name(city_name: str) -> str:
+        # (the cities names are in Hebrew, so the files are named by their hash)
+        return hashlib.md5(city_name.encode("utf-8")).hexdigest() + ".pkl"
+
+    def save(self) -> None:
+        os.makedirs(self.index_directory, exist_ok=True)
+        for city_name, city_index in self.city_indices_dict.items():
+            city_file_name = os.path.join(self.index_directory, self.get_city_file_name(city_name))
+            with open(city_file_name + ".tmp", "wb") as city_file:
+                pickle.dump(city_index, city_file)
+            os.replace(city_file_name + ".tmp", city_file_name)
+        with open(os.path.join(self.index_directory, "cities.json"), "w", encoding="utf-8") as cities_file:
+            json.dump(list(self.city_indices_dict), cities_file, ensure_ascii=False)
+
+    # Load the index (of all the cities, or only of the given ones)
+    def load(self, cities: list[str] | None = None) -> None:
+        with open(os.path.join(self.index_directory, "cities.json"), "r", encoding="utf-8") as cities_file:
+            saved_cities = json.load(cities_file)
+        for city_name in saved_cities if cities is None else [city for city in cities if city in saved_cities]:
+            with open(os.path.join(self.index_directory, self.get_city_file_name(city_name)), "rb") as city_file:
+                self.city_indices_dict[city_name] = pickle.load(city_file)
+
+
+if __name__ == '__main__':
+    comps_index = CompsIndex()
+    comps_index.build(pd.read_csv("Save 1.csv"))
+    comps_index.save()
@@ -0,0 +1,194 @@
+"""
+__Brief Summary__:
+A parallel runner of our model comparison experiments.
+"The Machine Learning.ipynb" runs 'cross_val_score(model, ..., cv=100)' for the price
+regression one fold after the other, and then trains and scores KNN, RandomForest, GaussianNB
+and DecisionTree for the Rooms and the Property_Type targets one at a time.
+
+Here every experiment is given as a spec (a target, a model and a parameters grid),
+and all the (parameters, fold) fits of all the specs are run on a pool of worker processes:
+
+    1.  The design matrices are built once (see FeatureMatrixBuilder), and their arrays are saved
+        as .npy files. Every worker memory-maps them once, in the pool's initializer, so the
+        tasks themselves carry only small descriptions (which spec, which parameters, which fold)
+        and the training data is never pickled per task. The cross validation folds are split once
+        as well, and saved as the fold number of every train row (so a task finds its rows in O(n)).
+
+    2.  Every spec's best parameters (by their mean cross validation score) are fitted once more
+        on the whole train set, and scored on the test set.
+
+    3.  All the results are written into a single comparison table, with the scores, the time
+        every spec's fits took, and the wall-clock time of the whole run.
+"""
+
+import os
+import time
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, clone
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import KFold
+from sklearn.linear_model import LinearRegression
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.naive_bayes import GaussianNB
+from sklearn.ensemble import RandomForestClassifier
+from FeatureMatrixBuilder import FeatureMatrixBuilder
+
+# The arrays every worker memory-maps (filled by the pool's initializer): {target: {array name: array}}
+SHARED_ARRAYS_DICT: dict[str, dict[str, np.ndarray]] = {}
+
+
+# A single experiment --> a model, the target it predicts, and the parameters grid we search
+class ExperimentSpec(object):
+    def __init__(self, name: str, target: str, model: BaseEstimator, param_grid: dict[str, list] | None = None,
+                 scoring: str | None = None, n_splits: int = 5, dense: bool = False) -> None:
+        self.name = name
+        self.target = target
+        self.model = model
+        self.param_grid = {} if param_grid is None else param_grid
+        # By default, the regression of the price is scored by R^2 and the classifications by their accuracy
+        self.scoring = scoring if scoring is not None else ("r2" if target == "Price" else "accuracy")
+        self.n_splits = n_splits
+        # Models that can't handle sparse matrices (like GaussianNB) get a dense copy of their rows
+        self.dense = dense
+
+    # Every combination of the parameters grid
+    def get_param_combinations(self) -> list[dict]:
+        keys = sorted(self.param_grid)
+        return [dict(zip(keys, values)) for values in itertools.product(*[self.param_grid[key] for key in keys])]
+
+
+# The experiments of "The Machine Learning.ipynb"
+def create_notebook_specs() -> list[ExperimentSpec]:
+    specs = [ExperimentSpec("LinearRegression", "Price", LinearRegression(), n_splits=100)]
+    for target in ["Rooms", "Property_Type"]:
+        specs += [
+            ExperimentSpec(f"KNN ({target})", target, KNeighborsClassifier(), {"n_neighbors": [10]}),
+            ExperimentSpec(f"RandomForest ({target})", target, RandomForestClassifier()),
+            ExperimentSpec(f"GaussianNB ({target})", target, GaussianNB(), dense=True),
+            ExperimentSpec(f"DecisionTree ({target})", target, DecisionTreeClassifier(), {"max_depth": [10]})
+        ]
+    return specs
+
+
+# The pool's initializer --> memory-map the shared arrays once per worker process
+def load_shared_arrays(shared_directory: str, targets: list[str]) -> None:
+    for target in targets:
+        SHARED_ARRAYS_DICT[target] = {
+            file_name[:-4]: np.load(os.path.join(shared_directory, target, file_name), mmap_mode="r", allow_pickle=False)
+            for file_name in os.listdir(os.path.join(shared_directory, target)) if file_name.endswith(".npy")}
+
+
+def get_shared_matrix(target: str, matrix_name: str) -> sp.csr_matrix:
+    arrays = SHARED_ARRAYS_DICT[target]
+    return sp.csr_matrix((arrays[f"{matrix_name}_data"], arrays[f"{matrix_name}_indices"], arrays[f"{matrix_name}_indptr"]),
+                         shape=tuple(arrays[f"{matrix_name}_shape"]), copy=False)
+
+
+# A single task of the pool --> fit the spec's model with the given parameters, and score it.
+# 'fold_num' is the cross validation fold to hold out, or None for a fit on the whole train set
+# that is scored on the test set
+def run_task(spec: ExperimentSpec, params: dict, fold_num: int | None) -> dict:
+    X_train = get_shared_matrix(spec.target, "X_train")
+    Y_train = SHARED_ARRAYS_DICT[spec.target]["Y_train"]
+    if fold_num is None:
+        X_fit, Y_fit = X_train, Y_train
+        X_score, Y_score = get_shared_matrix(spec.target, "X_test"), SHARED_ARRAYS_DICT[spec.target]["Y_test"]
+    else:
+        # The fold number of every train row (split once, see 'save_shared_arrays')
+        fold_of_rows = SHARED_ARRAYS_DICT[spec.target][f"Folds_{spec.n_splits}"]
+        fit_rows, score_rows = np.flatnonzero(fold_of_rows != fold_num), np.flatnonzero(fold_of_rows == fold_num)
+        X_fit, Y_fit = X_train[fit_rows], Y_train[fit_rows]
+        X_score, Y_score = X_train[score_rows], Y_train[score_rows]
+    if spec.dense:
+        X_fit, X_score = X_fit.toarray(), X_score.toarray()
+    start_time = time.perf_counter()
+    model = clone(spec.model).set_params(**params).fit(X_fit, np.asarray(Y_fit))
+    fit_seconds = time.perf_counter() - start_time
+    score = get_scorer(spec.scoring)(model, X_score, np.asarray(Y_score))
+    return {"spec": spec.name, "params": params, "fold": fold_num, "score": score, "seconds": fit_seconds}
+
+
+class ExperimentRunner(object):
+    def __init__(self, specs: list[ExperimentSpec] | None = None, num_of_workers: int = os.cpu_count() or 1,
+                 shared_directory: str = "Experiment Arrays", results_file_name: str = "Experiments.csv",
+                 feature_matrix_builder: FeatureMatrixBuilder | None = None) -> None:
+        self.specs = create_notebook_specs() if specs is None else specs
+        self.num_of_workers = num_of_workers
+
+        # Where the workers' shared arrays are saved, and where the comparison table is written
+        self.shared_directory = shared_directory
+        self.results_file_name = results_file_name
+
+        self.feature_matrix_builder = FeatureMatrixBuilder() if feature_matrix_builder is None else feature_matrix_builder
+
+    # Build the design matrices of every target, and save their arrays for the workers to memory-map
+    def save_shared_arrays(self, housing_units_df: pd.DataFrame) -> None:
+        for target in sorted({spec.target for spec in self.specs}):
+            feature_matrices = self.feature_matrix_builder.build(housing_units_df, target)
+            target_directory = os.path.join(self.shared_directory, target)
+            os.makedirs(target_directory, exist_ok=True)
+            for matrix_name, matrix in [("X_train", feature_matrices.X_train), ("X_test", feature_matrices.X_test)]:
+                for array_name in ["data", "indices", "indptr"]:
+                    np.save(os.path.join(target_directory, f"{matrix_name}_{array_name}.npy"), getattr(matrix, array_name))
+                np.save(os.path.join(target_directory, f"{matrix_name}_shape.npy"), np.array(matrix.shape))
+            # (the targets are saved as numbers, so they can be memory-mapped without pickling)
+            np.save(os.path.join(target_directory, "Y_train.npy"), pd.to_numeric(pd.Series(feature_matrices.Y_train)).to_numpy())
+            np.save(os.path.join(target_directory, "Y_test.npy"), pd.to_numeric(pd.Series(feature_matrices.Y_test)).to_numpy())
+            # The cross validation folds of every number of splits the target's specs use
+            for n_splits in sorted({spec.n_splits for spec in self.specs if spec.target == target}):
+                fold_of_rows = np.empty(feature_matrices.X_train.shape[0], dtype=np.int16)
+                for fold_num, (_, score_rows) in enumerate(KFold(n_splits=n_splits, shuffle=True, random_state=0)
+                                                           .split(fold_of_rows)):
+                    fold_of_rows[score_rows] = fold_num
+                np.save(os.path.join(target_directory, f"Folds_{n_splits}.npy"), fold_of_rows)
+
+    # Run all the experiments, and return (and save) their comparison table
+    def run(self, housing_units_df: pd.DataFrame) -> pd.DataFrame:
+        self.save_shared_arrays(housing_units_df)
+        targets = sorted({spec.target for spec in self.specs})
+        start_time = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.num_of_workers, initializer=load_shared_arrays,
+                                 initargs=(self.shared_directory, targets)) as pool:
+            # 1. The cross validation of every parameters combination of every spec
+            cv_futures = []
+            for spec in self.specs:
+                for params in spec.get_param_combinations():
+                    cv_futures += [pool.submit(run_task, spec, params, fold_num) for fold_num in range(spec.n_splits)]
+            cv_results_df = pd.DataFrame([future.result() for future in cv_futures])
+            cv_results_df["params_key"] = cv_results_df["params"].map(lambda params: str(sorted(params.items())))
+
+            # 2. The best parameters of every spec, fitted on the whole train set and scored on the test set
+            best_rows = {}
+            test_futures = {}
+            for spec in self.specs:
+                spec_cv_df = cv_results_df[cv_results_df["spec"] == spec.name]
+                mean_scores = spec_cv_df.groupby("params_key")["score"].agg(["mean", "std"])
+                best_params_key = mean_scores["mean"].idxmax()
+                best_params = spec_cv_df.loc[spec_cv_df["params_key"] == best_params_key, "params"].iloc[0]
+                best_rows[spec.name] = {"Experiment": spec.name, "Target": spec.target, "Model": type(spec.model).__name__,
+                                        "Best_Params": best_params, "Scoring": spec.scoring, "Folds": spec.n_splits,
+                                        "CV_Mean_Score": mean_scores.loc[best_params_key, "mean"],
+                                        "CV_Std_Score": mean_scores.loc[best_params_key, "std"],
+                                        "CV_Fit_Seconds": spec_cv_df["seconds"].sum()}
+                test_futures[spec.name] = pool.submit(run_task, spec, best_params, None)
+            for spec_name, future in test_futures.items():
+                test_result = future.result()
+                best_rows[spec_name]["Test_Score"] = test_result["score"]
+                best_rows[spec_name]["Test_Fit_Seconds"] = test_result["seconds"]
+
+        results_df = pd.DataFrame(list(best_rows.values()))
+        results_df["Run_Wall_Clock_Seconds"] = time.perf_counter() - start_time
+        results_df["Num_Of_Workers"] = self.num_of_workers
+        results_df.to_csv(self.results_file_name, index=False)
+        return results_df
+
+
+if __name__ == '__main__':
+    df_Cities = pd.read_csv("Save 1.csv")
+    runner = ExperimentRunner()
+    print(runner.run(df_Cities))
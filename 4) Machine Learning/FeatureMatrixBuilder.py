@@ -0,0 +1,173 @@
+"""
+__Brief Summary__:
+A shared (and cached) builder of the models' design matrices.
+"The Machine Learning.ipynb" rebuilds its design matrix for every task: 'pd.get_dummies'
+turns City and Property_Type into dense 0/1 columns, and the scaler is fitted again each time
+(and the test set was scaled with 'fit_transform', i.e. with its own minimum and maximum).
+
+Here the design matrix is built once for every (data, target, split) and shared by all the models:
+
+    1.  City and Property_Type (unless it is the target) are one-hot encoded into a sparse CSR block.
+
+    2.  The 'num_vars' columns are MinMax scaled. The scaler is fitted on the train set only,
+        and the test set is only transformed with it.
+
+    3.  The other numeric columns (like Floor) are passed through as they are.
+
+The built matrices are cached on disk, under a hash of the input data and of the configuration,
+so a rerun (or another notebook) loads them instead of building them again. Within a process, the same
+matrix objects are handed to every estimator (no copies). Estimators that need a dense matrix
+(like GaussianNB) should call '.toarray()' themselves.
+"""
+
+import os
+import json
+import pickle
+import hashlib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import OneHotEncoder, MinMaxScaler
+
+# The numeric columns we scale (the notebook's 'num_vars', the target is always left out of them)
+# NOTE: Be advised, this is a CONSTANT variable!
+NUM_VARS = ['Sale_Year', 'Rooms', 'Square_Meter', 'Kindergartens_And_Dormitories', 'Education_Average_Distance',
+            'Green_Areas_SQM', 'Parks_And_Gardens', 'Green_Areas_Average_Distance', 'Parks_And_Gardens_Average_Distance',
+            'Public_Building_Average_Distance', 'Institutions', 'Schools_Institutions']
+
+# The columns we one-hot encode (the target is always left out of them)
+# NOTE: Be advised, this is a CONSTANT variable!
+CATEGORICAL_COLUMNS = ['City', 'Property_Type']
+
+# The columns that are never used as features
+# NOTE: Be advised, this is a CONSTANT variable!
+DROPPED_COLUMNS = ['Neighborhood', 'Street']
+
+
+# The fitted encoding of the features --> turns housing units rows into design matrix rows
+class FeaturePipeline(object):
+    def __init__(self, target: str, categorical_columns: list[str], scaled_columns: list[str],
+                 passthrough_columns: list[str]) -> None:
+        self.target = target
+        self.categorical_columns = categorical_columns
+        self.scaled_columns = scaled_columns
+        self.passthrough_columns = passthrough_columns
+
+        # Unknown cities (or property types) get an all zeros one-hot row
+        self.encoder = OneHotEncoder(handle_unknown="ignore", dtype=np.float32)
+        self.scaler = MinMaxScaler(feature_range=(0, 1))
+
+    # Pick the features columns of the given housing units (everything but the target and the text columns)
+    @staticmethod
+    def create(housing_units_df: pd.DataFrame, target: str) -> "FeaturePipeline":
+        feature_columns = [column for column in housing_units_df.columns
+                           if column != target and column not in DROPPED_COLUMNS and not column.startswith("Unnamed")]
+        categorical_columns = [column for column in CATEGORICAL_COLUMNS if column in feature_columns]
+        scaled_columns = [column for column in NUM_VARS if column in feature_columns]
+        passthrough_columns = [column for column in feature_columns
+                               if column not in categorical_columns and column not in scaled_columns]
+        return FeaturePipeline(target, categorical_columns, scaled_columns, passthrough_columns)
+
+    # Fit the encoder and the scaler (on the train set only!)
+    def fit(self, housing_units_df: pd.DataFrame) -> "FeaturePipeline":
+        self.encoder.fit(housing_units_df[self.categorical_columns].astype(str))
+        self.scaler.fit(housing_units_df[self.scaled_columns].to_numpy(dtype=np.float64))
+        return self
+
+    def transform(self, housing_units_df: pd.DataFrame) -> sp.csr_matrix:
+        one_hot_block = self.encoder.transform(housing_units_df[self.categorical_columns].astype(str))
+        scaled_block = self.scaler.transform(housing_units_df[self.scaled_columns].to_numpy(dtype=np.float64))
+        passthrough_block = housing_units_df[self.passthrough_columns].to_numpy(dtype=np.float32)
+        return sp.hstack([one_hot_block, sp.csr_matrix(scaled_block.astype(np.float32)), sp.csr_matrix(passthrough_block)],
+                         format="csr", dtype=np.float32)
+
+    # The names of the design matrix columns (like 'pd.get_dummies' names its columns)
+    def get_feature_names(self) -> list[str]:
+        one_hot_names = [f"{column}_{category}" for column, categories in zip(self.categorical_columns, self.encoder.categories_)
+                         for category in categories]
+        return one_hot_names + self.scaled_columns + self.passthrough_columns
+
+
+# The built design matrices of a single task
+class FeatureMatrices(object):
+    def __init__(self, X_train: sp.csr_matrix, X_test: sp.csr_matrix, Y_train: np.ndarray, Y_test: np.ndarray,
+                 pipeline: FeaturePipeline) -> None:
+        self.X_train = X_train
+        self.X_test = X_test
+        self.Y_train = Y_train
+        self.Y_test = Y_test
+        self.pipeline = pipeline
+
+    @property
+    def feature_names(self) -> list[str]:
+        return self.pipeline.get_feature_names()
+
+
+class FeatureMatrixBuilder(object):
+    def __init__(self, cache_directory: str = "Feature Cache") -> None:
+        # Where the built matrices are saved (one sub directory per cache key)
+        self.cache_directory = cache_directory
+
+        # The matrices we already built (or loaded) in this process, by their cache key
+        self.memory_cache: dict[str, FeatureMatrices] = {}
+
+    # A hash of the data itself (its values, its columns and its index) and of the configuration
+    @staticmethod
+    def get_cache_key(housing_units_df: pd.DataFrame, config: dict) -> str:
+        cache_hash = hashlib.sha256()
+        cache_hash.update(pd.util.hash_pandas_object(housing_units_df, index=True).to_numpy().tobytes())
+        cache_hash.update(json.dumps([list(map(str, housing_units_df.columns)), config], sort_keys=True).encode("utf-8"))
+        return cache_hash.hexdigest()[:24]
+
+    # Build (or load from the cache) the design matrices of the given target
+    def build(self, housing_units_df: pd.DataFrame, target: str,
+              test_size: float = 0.2, random_state: int = 0) -> FeatureMatrices:
+        config = {"target": target, "test_size": test_size, "random_state": random_state,
+                  "num_vars": NUM_VARS, "categorical_columns": CATEGORICAL_COLUMNS}
+        cache_key = self.get_cache_key(housing_units_df, config)
+        if cache_key in self.memory_cache:
+            return self.memory_cache[cache_key]
+        cache_key_directory = os.path.join(self.cache_directory, cache_key)
+        if os.path.isdir(cache_key_directory):
+            feature_matrices = self.load_from_disk(cache_key_directory)
+        else:
+            feature_matrices = self.build_matrices(housing_units_df, target, test_size, random_state)
+            self.save_to_disk(feature_matrices, cache_key_directory)
+        self.memory_cache[cache_key] = feature_matrices
+        return feature_matrices
+
+    def build_matrices(self, housing_units_df: pd.DataFrame, target: str,
+                       test_size: float, random_state: int) -> FeatureMatrices:
+        train_df, test_df = train_test_split(housing_units_df, test_size=test_size, random_state=random_state)
+        pipeline = FeaturePipeline.create(housing_units_df, target).fit(train_df)
+        return FeatureMatrices(pipeline.transform(train_df), pipeline.transform(test_df),
+                               train_df[target].to_numpy(), test_df[target].to_numpy(), pipeline)
+
+    def save_to_disk(self, feature_matrices: FeatureMatrices, cache_key_directory: str) -> None:
+        # We write into a temporary directory first, so a crash never leaves a half written cache entry behind
+        os.makedirs(cache_key_directory + ".tmp", exist_ok=True)
+        sp.save_npz(os.path.join(cache_key_directory + ".tmp", "X_train.npz"), feature_matrices.X_train)
+        sp.save_npz(os.path.join(cache_key_directory + ".tmp", "X_test.npz"), feature_matrices.X_test)
+        np.save(os.path.join(cache_key_directory + ".tmp", "Y_train.npy"), feature_matrices.Y_train)
+        np.save(os.path.join(cache_key_directory + ".tmp", "Y_test.npy"), feature_matrices.Y_test)
+        with open(os.path.join(cache_key_directory + ".tmp", "pipeline.pkl"), "wb") as pipeline_file:
+            pickle.dump(feature_matrices.pipeline, pipeline_file)
+        os.replace(cache_key_directory + ".tmp", cache_key_directory)
+
+    def load_from_disk(self, cache_key_directory: str) -> FeatureMatrices:
+        with open(os.path.join(cache_key_directory, "pipeline.pkl"), "rb") as pipeline_file:
+            pipeline = pickle.load(pipeline_file)
+        return FeatureMatrices(sp.load_npz(os.path.join(cache_key_directory, "X_train.npz")).tocsr(),
+                               sp.load_npz(os.path.join(cache_key_directory, "X_test.npz")).tocsr(),
+                               np.load(os.path.join(cache_key_directory, "Y_train.npy"), allow_pickle=True),
+                               np.load(os.path.join(cache_key_directory, "Y_test.npy"), allow_pickle=True),
+                               pipeline)
+
+
+if __name__ == '__main__':
+    df_Cities = pd.read_csv("Save 1.csv")
+    builder = FeatureMatrixBuilder()
+    for target in ['Price', 'Rooms', 'Property_Type']:
+        matrices = builder.build(df_Cities, target)
+        print(f"{target}: X_train {matrices.X_train.shape}, X_test {matrices.X_test.shape}")
@@ -0,0 +1,71 @@
+"""
+__Brief Summary__:
+Attaching the environment features to the housing units (step 1 of "The Machine Learning.ipynb").
+The notebook loops over every neighborhood of the environment table and over every one
+of its columns, and assigns each value with 'df_Cities.loc[df_Cities.Neighborhood==..., col]',
+which is a full scan of the housing units table --> (neighborhoods x 12) scans.
+It also matches the rows by the neighborhood name alone, so neighborhoods that share
+the same name in different cities get each other's environment data.
+
+Here the (City, Neighborhood) keys of both tables are normalized once
+(including the removal of the "שכונת " prefix), and the environment features are
+attached with a single hash join. The housing units rows that matched no neighborhood
+are reported, instead of silently staying with NaN values.
+"""
+
+import pandas as pd
+
+# The prefix some of the neighborhoods names start with (in one dataset, but not in the other)
+# NOTE: Be advised, this is a CONSTANT variable!
+NEIGHBORHOOD_PREFIX = "שכונת"
+
+# The columns both tables are joined by
+# NOTE: Be advised, this is a CONSTANT variable!
+JOIN_KEY_COLUMNS = ["City", "Neighborhood"]
+
+
+# Remove the "שכונת " prefix from the neighborhoods names (like the notebook's [6::] slicing),
+# every distinct name is handled only once
+def normalize_neighborhood_names(neighborhoods: pd.Series) -> pd.Series:
+    unique_names = pd.Series(neighborhoods.dropna().unique())
+    normalized_names = unique_names.where(~unique_names.str.startswith(NEIGHBORHOOD_PREFIX),
+                                          unique_names.str[len(NEIGHBORHOOD_PREFIX) + 1:])
+    return neighborhoods.map(dict(zip(unique_names, normalized_names)))
+
+
+# Return a copy of the given table with normalized join keys
+def normalize_join_keys(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df["City"] = df["City"].astype(str).str.strip()
+    df["Neighborhood"] = normalize_neighborhood_names(df["Neighborhood"].astype(str).str.strip())
+    return df
+
+
+# Attach the environment features to the housing units, by their (City, Neighborhood).
+# Returns the enriched housing units (in their original order), and the housing units
+# that matched no neighborhood in the environment table (their environment features are NaN)
+def enrich_with_environment(housing_units_df: pd.DataFrame,
+                            environment_df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    housing_units_df = normalize_join_keys(housing_units_df)
+    environment_df = normalize_join_keys(environment_df).drop_duplicates(subset=JOIN_KEY_COLUMNS, keep="last")
+
+    enriched_df = housing_units_df.merge(environment_df, how="left", on=JOIN_KEY_COLUMNS,
+                                         validate="many_to_one", indicator=True)
+    enriched_df.index = housing_units_df.index
+    unmatched_mask = enriched_df.pop("_merge") == "left_only"
+    return enriched_df, housing_units_df.loc[unmatched_mask]
+
+
+# How many housing units of every (City, Neighborhood) matched no neighborhood, from the most common ones
+def report_unmatched_neighborhoods(unmatched_df: pd.DataFrame) -> pd.DataFrame:
+    report_df = unmatched_df.groupby(JOIN_KEY_COLUMNS, observed=True).size().reset_index(name="Housing_Units")
+    report_df = report_df.sort_values("Housing_Units", ascending=False, ignore_index=True)
+    print(f"{len(unmatched_df)} housing units in {len(report_df)} neighborhoods matched no environment data")
+    return report_df
+
+
+if __name__ == '__main__':
+    df_Cities = pd.read_csv("AllCities.csv")
+    df_Cities_Env_Avg = pd.read_csv("AllCitiesEnvorinment (AverageFill).csv")
+    df_Cities, df_Unmatched = enrich_with_environment(df_Cities, df_Cities_Env_Avg)
+    print(report_unmatched_neighborhoods(df_Unmatched).head(20))
@@ -0,0 +1,266 @@
+"""
+__Brief Summary__:
+A local (batch) prediction service of our trained models.
+The models of "The Machine Learning.ipynb" existed only inside the notebook's session,
+so here they are trained once, saved to disk together with their feature pipelines
+(see FeatureMatrixBuilder.FeaturePipeline), and served by a small HTTP server.
+The served models are the notebook's price regression (LinearRegression), and its best
+classifiers of the Rooms and the Property_Type (RandomForest):
+
+    1.  The models, their feature pipelines and the environment table are loaded once, at startup.
+
+    2.  A listing (or a bulk file of listings) needs its City, Neighborhood, Floor, Square_Meter
+        and Sale_Year, and the Price, Rooms and Property_Type it knows. Every model predicts only
+        the listings that have all of its inputs (the classifiers take the Price as an input, so
+        a listing without a Price gets only a Price prediction). Its environment features are
+        looked up by its (City, Neighborhood) in an in-memory cache, with the City's average for
+        unknown neighborhoods, and the engineered Institutions columns are added like in the notebook.
+
+    3.  Concurrent single-listing requests are grouped into micro-batches (up to 'max_batch_size'
+        listings, or whatever arrived within 'max_wait_seconds'), so every batch is encoded
+        and predicted with a single vectorized call per model. If a batch fails, its listings
+        are predicted one by one, so a bad listing fails only its own request.
+
+Usage:
+    POST /predict with a JSON listing (or a JSON list of listings)
+    --> a JSON object (or a list of them) with the prediction of every served target.
+"""
+
+import os
+import sys
+import json
+import queue
+import pickle
+import threading
+from concurrent.futures import Future
+from datetime import date
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Callable
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator
+from sklearn.linear_model import LinearRegression
+from sklearn.ensemble import RandomForestClassifier
+from FeatureMatrixBuilder import FeatureMatrixBuilder, FeaturePipeline
+from NeighborhoodEnricher import normalize_join_keys
+
+# The property types, by their categorical codes, are shared with the data handling stage
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "2) DataHandling"))
+from NadlanCleaningPipeline import PROPERTY_TYPE_CATEGORIES
+
+# The environment columns that are merged into the engineered Institutions columns (like in the notebook)
+# NOTE: Be advised, this is a CONSTANT variable!
+INSTITUTIONS_COLUMNS = ['Public_Institutions', 'Community_Institutions', 'Religious_Institutions']
+SCHOOLS_INSTITUTIONS_COLUMNS = ['Schools', 'Non_Formal_Educational_Institutions']
+
+
+# Save a trained model together with the feature pipeline its matrices were built with
+def save_model(models_directory: str, target: str, model: BaseEstimator, pipeline: FeaturePipeline) -> None:
+    os.makedirs(models_directory, exist_ok=True)
+    with open(os.path.join(models_directory, f"{target}.pkl"), "wb") as model_file:
+        pickle.dump({"model": model, "pipeline": pipeline}, model_file)
+
+
+# The model we serve for every target (the notebook's price regression, and its best classifiers)
+def create_served_models() -> dict[str, BaseEstimator]:
+    return {"Price": LinearRegression(), "Rooms": RandomForestClassifier(), "Property_Type": RandomForestClassifier()}
+
+
+# Train the served models (on the cached design matrices) and save them
+def train_and_save_models(housing_units_df: pd.DataFrame, models_directory: str = "Models") -> None:
+    # (like in the notebook, the Rooms are classified as whole numbers)
+    housing_units_df = housing_units_df.assign(Rooms=housing_units_df["Rooms"].astype("int64"))
+    feature_matrix_builder = FeatureMatrixBuilder()
+    for target, model in create_served_models().items():
+        feature_matrices = feature_matrix_builder.build(housing_units_df, target)
+        model.fit(feature_matrices.X_train, feature_matrices.Y_train)
+        save_model(models_directory, target, model, feature_matrices.pipeline)
+
+
+# Groups single requests that arrive at the same time into batches, on a background thread
+class MicroBatcher(object):
+    def __init__(self, predict_batch: Callable[[list], list], max_batch_size: int = 512,
+                 max_wait_seconds: float = 0.005) -> None:
+        # Predicts a whole list of requests at once (and returns their results, in the same order)
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+
+        self.requests_queue: queue.Queue = queue.Queue()
+        self.batching_thread = threading.Thread(target=self.batching_loop, daemon=True)
+        self.batching_thread.start()
+
+    # Hand a single request over to the next batch, and wait for its result
+    def submit(self, request) -> Future:
+        future = Future()
+        self.requests_queue.put((request, future))
+        return future
+
+    def batching_loop(self) -> None:
+        while True:
+            # Wait for the first request of the batch, and then collect whatever arrives right after it
+            batch = [self.requests_queue.get()]
+            try:
+                while len(batch) < self.max_batch_size:
+                    batch.append(self.requests_queue.get(timeout=self.max_wait_seconds))
+            except queue.Empty:
+                pass
+            requests_list, futures_list = zip(*batch)
+            try:
+                for future, result in zip(futures_list, self.predict_batch(list(requests_list))):
+                    future.set_result(result)
+            except Exception:
+                # A single bad request must not fail the others --> predict every request of the batch on its own,
+                # so only the bad ones get the error
+                for request, future in zip(requests_list, futures_list):
+                    try:
+                        future.set_result(self.predict_batch([request])[0])
+                    except Exception as exception:
+                        future.set_exception(exception)
+
+
+class PredictionService(object):
+    def __init__(self, models_directory: str = "Models",
+                 environment_file_name: str = "AllCitiesEnvorinment (AverageFill).csv",
+                 max_batch_size: int = 512, max_wait_seconds: float = 0.005, port: int = 0) -> None:
+        # The served models (with their feature pipelines), by their target --> loaded once
+        self.models_dict: dict[str, dict] = {}
+        for file_name in sorted(os.listdir(models_directory)):
+            if file_name.endswith(".pkl"):
+                with open(os.path.join(models_directory, file_name), "rb") as model_file:
+                    self.models_dict[file_name[:-4]] = pickle.load(model_file)
+
+        # The environment features cache: {(City, Neighborhood): features}, and every City's average
+        environment_df = normalize_join_keys(pd.read_csv(environment_file_name))
+        self.environment_columns = [column for column in environment_df.columns if column not in ["City", "Neighborhood"]]
+        self.environment_cache = {(city, neighborhood): values for city, neighborhood, values in
+                                  zip(environment_df["City"], environment_df["Neighborhood"],
+                                      environment_df[self.environment_columns].to_numpy(dtype=np.float64))}
+        city_averages_df = environment_df.groupby("City")[self.environment_columns].mean()
+        self.city_averages = dict(zip(city_averages_df.index, city_averages_df.to_numpy(dtype=np.float64)))
+        self.national_average = environment_df[self.environment_columns].mean().to_numpy(dtype=np.float64)
+
+        self.batcher = MicroBatcher(self.predict_listings, max_batch_size, max_wait_seconds)
+
+        # Where we serve the predictions from (port 0 means any free port)
+        self.port = port
+        self.server = None
+        self.server_thread = None
+
+    # The environment features of a neighborhood (or its City's average, if we don't know the neighborhood)
+    def lookup_environment(self, city: str, neighborhood: str) -> np.ndarray:
+        environment = self.environment_cache.get((city, neighborhood))
+        if environment is None:
+            environment = self.city_averages.get(city, self.national_average)
+        return environment
+
+    # Turn raw listings into the rows the feature pipelines expect (the notebook's 'Save 1.csv' columns)
+    def prepare_listings(self, listings_df: pd.DataFrame) -> pd.DataFrame:
+        listings_df = normalize_join_keys(listings_df)
+        if "Sale_Year" not in listings_df.columns:
+            listings_df["Sale_Year"] = date.today().year
+        # The property types may be given by their names, or by their categorical codes (or not at all)
+        if "Property_Type" in listings_df.columns and not pd.api.types.is_integer_dtype(listings_df["Property_Type"]):
+            property_type_codes = listings_df["Property_Type"].map({name: code for code, name in enumerate(PROPERTY_TYPE_CATEGORIES)})
+            property_type_codes = property_type_codes.fillna(pd.to_numeric(listings_df["Property_Type"], errors="coerce"))
+            # (integer codes, so the pipeline's encoder sees "1" like in the training data, and not "1.0")
+            listings_df["Property_Type"] = property_type_codes.astype("Int64")
+        environment_block = np.vstack([self.lookup_environment(city, neighborhood) for city, neighborhood
+                                       in zip(listings_df["City"], listings_df["Neighborhood"])])
+        listings_df = pd.concat([listings_df.reset_index(drop=True),
+                                 pd.DataFrame(environment_block, columns=self.environment_columns)], axis=1)
+        listings_df["Institutions"] = listings_df[INSTITUTIONS_COLUMNS].sum(axis=1)
+        listings_df["Schools_Institutions"] = listings_df[SCHOOLS_INSTITUTIONS_COLUMNS].sum(axis=1)
+        return listings_df
+
+    # Predict every served target of the given listings (a vectorized call per model).
+    # A listing that lacks some of a model's inputs gets no prediction (None) of that model's target
+    def predict_dataframe(self, listings_df: pd.DataFrame) -> pd.DataFrame:
+        prepared_df = self.prepare_listings(listings_df)
+        predictions_df = pd.DataFrame(index=range(len(prepared_df)))
+        for target, served_model in self.models_dict.items():
+            pipeline = served_model["pipeline"]
+            input_columns = pipeline.categorical_columns + pipeline.scaled_columns + pipeline.passthrough_columns
+            has_inputs_mask = prepared_df.reindex(columns=input_columns).notna().all(axis=1).to_numpy()
+            predictions = pd.Series([None] * len(prepared_df), dtype=object)
+            if has_inputs_mask.any():
+                design_matrix = pipeline.transform(prepared_df[has_inputs_mask])
+                target_predictions = served_model["model"].predict(design_matrix)
+                # (the property types are predicted by their categorical codes, we return their names)
+                if target == "Property_Type":
+                    target_predictions = [PROPERTY_TYPE_CATEGORIES[int(code)] for code in target_predictions]
+                predictions[has_inputs_mask] = list(target_predictions)
+            predictions_df[target] = predictions
+        return predictions_df
+
+    # The micro-batches' prediction --> a list of listings dictionaries to a list of predictions dictionaries
+    def predict_listings(self, listings_list: list[dict]) -> list[dict]:
+        return self.predict_dataframe(pd.DataFrame(listings_list)).to_dict(orient="records")
+
+    # A single listing, through the micro-batcher (so concurrent callers share their predict calls)
+    def predict_one(self, listing: dict) -> dict:
+        return self.batcher.submit(listing).result()
+
+    # A bulk file of listings (CSV), predicted in chunks, with the predictions added as new columns
+    def predict_file(self, listings_file_name: str, output_file_name: str, chunk_size: int = 100_000) -> None:
+        if os.path.exists(output_file_name):
+            os.remove(output_file_name)
+        for listings_df in pd.read_csv(listings_file_name, chunksize=chunk_size):
+            predictions_df = self.predict_dataframe(listings_df).add_prefix("Predicted_")
+            pd.concat([listings_df.reset_index(drop=True), predictions_df], axis=1) \
+                .to_csv(output_file_name, mode="a", header=not os.path.exists(output_file_name), index=False)
+
+    # The base url of the service
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    # Start serving the predictions on a background thread, and return the base url
+    def start(self) -> str:
+        service = self
+
+        class PredictionHandler(BaseHTTPRequestHandler):
+            # Keep-alive connections, so a client can send many requests over one connection
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:
+                content_length = int(self.headers.get("Content-Length", 0))
+                try:
+                    body = json.loads(self.rfile.read(content_length))
+                    if isinstance(body, list):
+                        response = service.predict_listings(body)
+                    else:
+                        response = service.predict_one(body)
+                    status = 200
+                except Exception as exception:
+                    response, status = {"error": str(exception)}, 400
+                response_bytes = json.dumps(response, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(response_bytes)))
+                self.end_headers()
+                self.wfile.write(response_bytes)
+
+            # Keep the service output clean
+            def log_message(self, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", self.port), PredictionHandler)
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+        return self.url
+
+    # Stop serving the predictions
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+if __name__ == '__main__':
+    if not os.path.isdir("Models"):
+        train_and_save_models(pd.read_csv("Save 1.csv"))
+    prediction_service = PredictionService(port=8080)
+    print(f"serving predictions on {prediction_service.start()}/predict")
+    prediction_service.server_thread.join()
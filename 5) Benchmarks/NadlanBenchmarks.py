@@ -0,0 +1,205 @@
+"""
+__Brief Summary__:
+An end-to-end benchmark suite of our pipeline.
+Every stage is timed on data of a configurable size, and the results are appended to a JSON file
+(together with the git commit they were measured at), so a regression shows up between versions:
+
+    1.  scraper --> NadlanScraper against a local NadlanFixtureSite (housing units rows per second).
+
+    2.  cleaning --> NadlanCleaningPipeline over a synthetic raw "AllCities.csv" (raw rows per second).
+
+    3.  environment_cleaning --> EnvironmentCleaner over a synthetic raw "AllCitiesEnvironment.csv".
+
+    4.  enrichment --> NeighborhoodEnricher's join of the cleaned housing units with the environment data.
+
+    5.  feature_matrix / model_training / model_prediction --> FeatureMatrixBuilder and the notebook's
+        price regression (LinearRegression).
+
+The synthetic data comes from NadlanDataGenerator. The scraper benchmark needs Chrome
+(and its driver); if it can't run, its failure is recorded instead of its timing.
+
+Usage:
+    python NadlanBenchmarks.py [number of housing units rows]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+from datetime import datetime
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+BENCHMARKS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+for stage_directory in ["1) WebCrawling", "2) DataHandling", "4) Machine Learning"]:
+    sys.path.append(os.path.join(BENCHMARKS_DIRECTORY, "..", stage_directory))
+from NadlanDataGenerator import NadlanDataGenerator
+from NadlanFixtureSite import NadlanFixtureSite
+from NadlanCleaningPipeline import NadlanCleaningPipeline
+from EnvironmentCleaner import clean_environment, fill_missing_by_city
+from NeighborhoodEnricher import enrich_with_environment
+from FeatureMatrixBuilder import FeatureMatrixBuilder
+
+
+class NadlanBenchmarks(object):
+    def __init__(self, num_of_rows: int = 300_000, num_of_cities: int = 16, num_of_neighborhoods: int = 10,
+                 fixture_num_of_cities: int = 2, fixture_num_of_neighborhoods: int = 2,
+                 fixture_num_of_housing_units: int = 120, fixture_load_delay_ms: int = 300,
+                 include_scraper: bool = True,
+                 results_file_name: str = os.path.join(BENCHMARKS_DIRECTORY, "BenchmarkResults.json"),
+                 seed: int = 0) -> None:
+        # The size of the synthetic datasets
+        self.num_of_rows = num_of_rows
+        self.num_of_cities = num_of_cities
+        self.num_of_neighborhoods = num_of_neighborhoods
+
+        # The size of the fixture website the scraper crawls (and whether we crawl it at all)
+        self.fixture_num_of_cities = fixture_num_of_cities
+        self.fixture_num_of_neighborhoods = fixture_num_of_neighborhoods
+        self.fixture_num_of_housing_units = fixture_num_of_housing_units
+        self.fixture_load_delay_ms = fixture_load_delay_ms
+        self.include_scraper = include_scraper
+
+        # Where the results of every run are appended
+        self.results_file_name = results_file_name
+        self.seed = seed
+
+        # The timings of the current run: {benchmark name: {"seconds", "rows", "rows_per_second"}}
+        self.results_dict: dict[str, dict] = {}
+
+    def get_config(self) -> dict:
+        return {key: value for key, value in vars(self).items() if key not in ["results_dict", "results_file_name"]}
+
+    # The commit the benchmarks were measured at
+    @staticmethod
+    def get_version() -> str:
+        try:
+            return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARKS_DIRECTORY,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return "unknown"
+
+    def record(self, name: str, start_time: float, num_of_rows: int) -> None:
+        seconds = time.perf_counter() - start_time
+        self.results_dict[name] = {"seconds": seconds, "rows": num_of_rows,
+                                   "rows_per_second": num_of_rows / seconds if seconds > 0 else None}
+        print(f"{name}: {num_of_rows} rows in {seconds:.2f} seconds")
+
+    def benchmark_scraper(self, working_directory: str) -> None:
+        # (selenium is needed only by this benchmark)
+        from NadlanScraper import NadlanScraper
+        fixture_site = NadlanFixtureSite(num_of_cities=self.fixture_num_of_cities,
+                                         num_of_neighborhoods=self.fixture_num_of_neighborhoods,
+                                         num_of_housing_units=self.fixture_num_of_housing_units,
+                                         load_delay_ms=self.fixture_load_delay_ms, seed=self.seed)
+        crawling_target_url = fixture_site.start()
+        try:
+            output_file_name = os.path.join(working_directory, "Scraped.csv")
+            scraper = NadlanScraper(city_indices=list(range(self.fixture_num_of_cities)),
+                                    crawling_target_url=crawling_target_url, output_file_name=output_file_name)
+            start_time = time.perf_counter()
+            scraper.main_scraper()
+            self.record("scraper", start_time, len(pd.read_csv(output_file_name)))
+            scraper.nadlan_driver.quit()
+        finally:
+            fixture_site.stop()
+
+    # Clean the raw housing units file, and return the cleaned file's name
+    def benchmark_cleaning(self, raw_file_name: str, working_directory: str) -> str:
+        cleaned_file_name = os.path.join(working_directory, "AllCitiesCleaned.csv")
+        start_time = time.perf_counter()
+        NadlanCleaningPipeline().clean_file(raw_file_name, cleaned_file_name)
+        self.record("cleaning", start_time, self.num_of_rows)
+        return cleaned_file_name
+
+    # Clean (and fill) the raw environment file, and return the AverageFill environment data
+    def benchmark_environment_cleaning(self, raw_file_name: str) -> pd.DataFrame:
+        raw_environment_df = pd.read_csv(raw_file_name)
+        start_time = time.perf_counter()
+        cleaned_environment_df = clean_environment(raw_environment_df)
+        fill_missing_by_city(cleaned_environment_df, "median")
+        environment_df = fill_missing_by_city(cleaned_environment_df, "mean")
+        self.record("environment_cleaning", start_time, len(raw_environment_df))
+        return environment_df
+
+    # Join the cleaned housing units with the environment data, and return the notebook's 'Save 1.csv' rows
+    def benchmark_enrichment(self, cleaned_file_name: str, environment_df: pd.DataFrame) -> pd.DataFrame:
+        housing_units_df = pd.read_csv(cleaned_file_name)
+        # The preparation steps of "The Machine Learning.ipynb"
+        housing_units_df["Sale_Year"] = pd.to_datetime(housing_units_df["Sale_Date"], format='%Y-%m-%d').dt.year
+        housing_units_df = housing_units_df.drop(columns=["Building_Number", "Sale_Date"])
+        housing_units_df = housing_units_df[housing_units_df["Street"] != "Unknown"]
+        start_time = time.perf_counter()
+        enriched_df, _ = enrich_with_environment(housing_units_df, environment_df)
+        self.record("enrichment", start_time, len(housing_units_df))
+        enriched_df = enriched_df.dropna().reset_index(drop=True)
+        enriched_df["Institutions"] = enriched_df["Public_Institutions"] + enriched_df["Community_Institutions"] \
+            + enriched_df["Religious_Institutions"]
+        enriched_df["Schools_Institutions"] = enriched_df["Schools"] + enriched_df["Non_Formal_Educational_Institutions"]
+        return enriched_df.drop(columns=['Public_Institutions', 'Community_Institutions', 'Religious_Institutions',
+                                         'Schools', 'Non_Formal_Educational_Institutions'])
+
+    def benchmark_models(self, enriched_df: pd.DataFrame, working_directory: str) -> None:
+        start_time = time.perf_counter()
+        feature_matrices = FeatureMatrixBuilder(os.path.join(working_directory, "Feature Cache")).build(enriched_df, "Price")
+        self.record("feature_matrix", start_time, len(enriched_df))
+
+        start_time = time.perf_counter()
+        model = LinearRegression().fit(feature_matrices.X_train, feature_matrices.Y_train)
+        self.record("model_training", start_time, feature_matrices.X_train.shape[0])
+
+        start_time = time.perf_counter()
+        model.predict(feature_matrices.X_test)
+        self.record("model_prediction", start_time, feature_matrices.X_test.shape[0])
+
+    # Run all the benchmarks, append their results to the results file, and return them
+    def run(self) -> dict:
+        working_directory = tempfile.mkdtemp(prefix="NadlanBenchmarks_")
+        try:
+            generator = NadlanDataGenerator(self.num_of_cities, self.num_of_neighborhoods, seed=self.seed)
+            raw_file_name, raw_environment_file_name = generator.generate_files(working_directory, self.num_of_rows)
+            if self.include_scraper:
+                try:
+                    self.benchmark_scraper(working_directory)
+                # (a scraper that gives up ends its process, so we catch its exit as well)
+                except (Exception, SystemExit) as exception:
+                    self.results_dict["scraper"] = {"error": str(exception)}
+                    print(f"scraper: failed ({exception})")
+            cleaned_file_name = self.benchmark_cleaning(raw_file_name, working_directory)
+            environment_df = self.benchmark_environment_cleaning(raw_environment_file_name)
+            enriched_df = self.benchmark_enrichment(cleaned_file_name, environment_df)
+            self.benchmark_models(enriched_df, working_directory)
+        finally:
+            shutil.rmtree(working_directory, ignore_errors=True)
+        return self.save_results()
+
+    # Append the current run to the results file, and print how it compares with the previous run
+    def save_results(self) -> dict:
+        runs_list = []
+        if os.path.exists(self.results_file_name):
+            with open(self.results_file_name, "r", encoding="utf-8") as results_file:
+                runs_list = json.load(results_file)
+        run = {"version": self.get_version(), "timestamp": datetime.now().isoformat(timespec="seconds"),
+               "config": self.get_config(), "results": self.results_dict}
+        if len(runs_list) > 0:
+            self.print_comparison(runs_list[-1], run)
+        runs_list.append(run)
+        with open(self.results_file_name, "w", encoding="utf-8") as results_file:
+            json.dump(runs_list, results_file, indent=1)
+        return run
+
+    @staticmethod
+    def print_comparison(previous_run: dict, run: dict) -> None:
+        print(f"Compared with {previous_run['version']} ({previous_run['timestamp']}):")
+        for name, result in run["results"].items():
+            previous_result = previous_run["results"].get(name, {})
+            if result.get("rows_per_second") and previous_result.get("rows_per_second"):
+                print(f"    {name}: x{result['rows_per_second'] / previous_result['rows_per_second']:.2f} rows per second")
+
+
+if __name__ == '__main__':
+    benchmarks = NadlanBenchmarks(num_of_rows=int(sys.argv[1]) if len(sys.argv) > 1 else 300_000)
+    benchmarks.run()
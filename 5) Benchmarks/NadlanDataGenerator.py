@@ -0,0 +1,125 @@
+"""
+__Brief Summary__:
+A synthetic generator of raw "AllCities.csv" and "AllCitiesEnvironment.csv" shaped data,
+for benchmarking the data handling and machine learning stages at any size.
+The values look like the ones our scrapers collect from the real website:
+
+    1.  Housing units --> "dd.mm.yyyy" sale dates, "street number" addresses (sometimes missing),
+        Hebrew property types (including the non residential ones the cleaning drops),
+        Hebrew floors (like "שלישית", "קומה 7" or "ראשונה, שניה"), comma formatted prices,
+        blank (' ') values, duplicated rows and outliers.
+
+    2.  Environment --> the texts of the "מה בסביבה" iframe (like "4 בתי ספר", '18,272 מ"ר' or "720 מטר"),
+        with some zero values, for every neighborhood of the housing units (industrial zones included).
+
+The data is random, but reproducible by its seed.
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "1) WebCrawling"))
+from NadlanColumns import HOUSING_UNITS_COLUMNS, ENVIRONMENT_COLUMNS
+from NadlanFixtureSite import CITY_NAMES, NEIGHBORHOOD_NAMES, STREET_NAMES
+
+# All the property types the website lists (the first ones are residential, the last ones are not)
+# NOTE: Be advised, this is a CONSTANT variable!
+RAW_PROPERTY_TYPES = ["דירה בבית קומות", "בית פרטי", "קוטג' דו משפחתי", "קוטג' חד משפחתי", "קוטג' טורי",
+                      "בית בודד", "דירת גן", "דירת גג", "דירת גג (פנטהאוז)", "דופלקס", "מיני פנטהאוז",
+                      "חד משפחתי (וילה)", "חנות", "משרד", "מחסן", "חניה"]
+RAW_PROPERTY_TYPES_WEIGHTS = [60, 4, 3, 2, 2, 1, 6, 4, 2, 3, 1, 1, 4, 4, 2, 1]
+
+# The floors the website lists (Hebrew names, "קומה N", sequences and plain numbers)
+# NOTE: Be advised, this is a CONSTANT variable!
+RAW_FLOORS = ["קרקע", "ראשונה", "שניה", "שלישית", "רביעית", "חמישית", "שישית", "שביעית", "עשירית",
+              "קומה 3", "קומה 8", "קומה 12", "ראשונה, שניה", "קרקע, ראשונה", "מרתף, קרקע", "2", "5", "11", " "]
+
+# The rooms the website lists (0 and blank values included)
+# NOTE: Be advised, this is a CONSTANT variable!
+RAW_ROOMS = ["1", "2", "2.5", "3", "3.5", "4", "4.5", "5", "5.5", "6", "0", " "]
+
+
+class NadlanDataGenerator(object):
+    def __init__(self, num_of_cities: int = 16, num_of_neighborhoods: int = 10, seed: int = 0) -> None:
+        self.random = np.random.default_rng(seed)
+
+        # The cities and their neighborhoods (the names repeat with a number, past the fixture's names lists)
+        self.city_names = [CITY_NAMES[idx % len(CITY_NAMES)] + ("" if idx < len(CITY_NAMES) else f" {idx}")
+                           for idx in range(num_of_cities)]
+        self.neighborhood_names = [NEIGHBORHOOD_NAMES[idx % len(NEIGHBORHOOD_NAMES)]
+                                   + ("" if idx < len(NEIGHBORHOOD_NAMES) else f" {idx}")
+                                   for idx in range(num_of_neighborhoods)]
+
+    # Raw housing units, like the ones NadlanScraper writes ('duplicates_fraction' of them are duplicated rows)
+    def generate_housing_units(self, num_of_rows: int, duplicates_fraction: float = 0.01) -> pd.DataFrame:
+        num_of_unique_rows = num_of_rows - int(num_of_rows * duplicates_fraction)
+        days = self.random.integers(1, 29, num_of_unique_rows)
+        months = self.random.integers(1, 13, num_of_unique_rows)
+        years = self.random.integers(2015, 2023, num_of_unique_rows)
+        square_meters = np.clip(self.random.normal(95, 35, num_of_unique_rows), 12, 650).astype(int)
+        prices = (square_meters * self.random.normal(22, 8, num_of_unique_rows).clip(4, 80)).astype(int) * 1000
+        building_numbers = self.random.integers(1, 150, num_of_unique_rows).astype(str)
+        # Some building numbers have a letter, and some addresses have no number (or no street at all)
+        building_numbers = np.where(self.random.random(num_of_unique_rows) < 0.05,
+                                    np.char.add(building_numbers, "א"), building_numbers)
+        streets = self.random.choice(STREET_NAMES, num_of_unique_rows)
+        missing_address_mask = self.random.random(num_of_unique_rows) < 0.03
+        housing_units_df = pd.DataFrame({
+            "Sale_Date": [f"{day:02d}.{month:02d}.{year}" for day, month, year in zip(days, months, years)],
+            "City": self.random.choice(self.city_names, num_of_unique_rows),
+            "Neighborhood": self.random.choice(self.neighborhood_names, num_of_unique_rows),
+            "Street": np.where(missing_address_mask, " ", streets),
+            "Building_Number": np.where(missing_address_mask, " ", building_numbers),
+            "Property_Type": self.random.choice(RAW_PROPERTY_TYPES, num_of_unique_rows,
+                                                p=np.array(RAW_PROPERTY_TYPES_WEIGHTS) / sum(RAW_PROPERTY_TYPES_WEIGHTS)),
+            "Rooms": self.random.choice(RAW_ROOMS, num_of_unique_rows),
+            "Floor": self.random.choice(RAW_FLOORS, num_of_unique_rows),
+            "Square_Meter": np.where(self.random.random(num_of_unique_rows) < 0.02, " ", square_meters.astype(str)),
+            "Price": [f"{price:,}" for price in prices]
+        }, columns=HOUSING_UNITS_COLUMNS)
+        duplicated_rows_df = housing_units_df.sample(n=num_of_rows - num_of_unique_rows, replace=True,
+                                                     random_state=int(self.random.integers(2 ** 31)))
+        return pd.concat([housing_units_df, duplicated_rows_df], ignore_index=True) \
+            .sample(frac=1.0, random_state=int(self.random.integers(2 ** 31))).reset_index(drop=True)
+
+    # A raw environment row for every (City, Neighborhood), like the ones NadlanEnvironmentScraper writes
+    def generate_environment(self) -> pd.DataFrame:
+        rows_list = []
+        for city_name in self.city_names:
+            for neighborhood_name in self.neighborhood_names:
+                # About 5% of the values are missing (the website shows them as 0)
+                counts = np.where(self.random.random(7) < 0.05, 0, self.random.integers(1, 40, 7))
+                distances = np.where(self.random.random(4) < 0.05, 0, self.random.integers(150, 1500, 4))
+                rows_list.append([
+                    city_name,
+                    neighborhood_name,
+                    f"{counts[0]} בתי ספר",
+                    f"{counts[1]} גני ילדים ומעונות",
+                    f"{counts[2]} מוסדות חינוך בלתי פורמלי",
+                    f"{distances[0]} מטר",
+                    f'{int(self.random.integers(0, 250_000)):,} מ"ר',
+                    f"{counts[3]}",
+                    f"{distances[1]} מטר",
+                    f"{distances[2]} מטר",
+                    f"{counts[4]} מוסדות ציבור",
+                    f"{counts[5]} מוסדות קהילתיים",
+                    f"{counts[6]} מוסדות דת",
+                    f"{distances[3]} מטר"
+                ])
+        return pd.DataFrame(rows_list, columns=ENVIRONMENT_COLUMNS)
+
+    # Write both raw datasets into the given directory (as "AllCities.csv" and "AllCitiesEnvironment.csv")
+    def generate_files(self, output_directory: str, num_of_rows: int) -> tuple[str, str]:
+        os.makedirs(output_directory, exist_ok=True)
+        housing_units_file_name = os.path.join(output_directory, "AllCities.csv")
+        environment_file_name = os.path.join(output_directory, "AllCitiesEnvironment.csv")
+        self.generate_housing_units(num_of_rows).to_csv(housing_units_file_name, index=False)
+        self.generate_environment().to_csv(environment_file_name, index=False)
+        return housing_units_file_name, environment_file_name
+
+
+if __name__ == '__main__':
+    generator = NadlanDataGenerator()
+    print(generator.generate_files("Synthetic Data", num_of_rows=315_000))